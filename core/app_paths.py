@@ -0,0 +1,103 @@
+"""Qt-free resolution of the user folders the application writes to.
+
+The results match ``QStandardPaths.writableLocation`` for the locations the
+app uses, so the GUI and the headless daemon share one config file:
+
+* Windows: the Documents / Pictures known folders (``SHGetKnownFolderPath``),
+  which follow a relocated or OneDrive-redirected folder.
+* Linux and other XDG desktops: ``XDG_DOCUMENTS_DIR`` / ``XDG_PICTURES_DIR``
+  from the environment or ``~/.config/user-dirs.dirs``.
+* Otherwise ``~/Documents`` and ``~/Pictures``.
+"""
+
+from __future__ import annotations
+
+import os
+import platform
+import re
+from typing import Optional
+
+
+COMPANY_NAME = "UMKGL Solutions"
+APP_SUBFOLDER_NAME = "FOTOapp"
+
+# FOLDERID_Documents és FOLDERID_Pictures
+_KNOWN_FOLDER_IDS = {
+    "documents": "{FDD39AD0-238F-46AF-ADB4-6C85480369C7}",
+    "pictures": "{33E28130-4E1E-4676-835A-98395C3BC3BB}",
+}
+_XDG_KEYS = {"documents": "XDG_DOCUMENTS_DIR", "pictures": "XDG_PICTURES_DIR"}
+_FALLBACK_NAMES = {"documents": "Documents", "pictures": "Pictures"}
+
+
+def _windows_known_folder(kind: str) -> Optional[str]:
+    import ctypes
+    import uuid
+    from ctypes import wintypes
+
+    class GUID(ctypes.Structure):
+        _fields_ = [
+            ("Data1", wintypes.DWORD),
+            ("Data2", wintypes.WORD),
+            ("Data3", wintypes.WORD),
+            ("Data4", ctypes.c_ubyte * 8),
+        ]
+
+    folder_uuid = uuid.UUID(_KNOWN_FOLDER_IDS[kind])
+    guid = GUID(
+        folder_uuid.fields[0],
+        folder_uuid.fields[1],
+        folder_uuid.fields[2],
+        (ctypes.c_ubyte * 8).from_buffer_copy(folder_uuid.bytes[8:]),
+    )
+    path_ptr = ctypes.c_wchar_p()
+    result = ctypes.windll.shell32.SHGetKnownFolderPath(ctypes.byref(guid), 0, None, ctypes.byref(path_ptr))
+    try:
+        return path_ptr.value if result == 0 else None
+    finally:
+        ctypes.windll.ole32.CoTaskMemFree(path_ptr)
+
+
+def _xdg_user_dir(kind: str) -> Optional[str]:
+    key = _XDG_KEYS[kind]
+    value = os.environ.get(key)
+    if not value:
+        config_home = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+        try:
+            with open(os.path.join(config_home, "user-dirs.dirs"), "r", encoding="utf-8") as f:
+                for line in f:
+                    match = re.match(rf'\s*{key}\s*=\s*"(.*)"\s*$', line)
+                    if match:
+                        value = match.group(1)
+                        break
+        except OSError:
+            return None
+    if not value:
+        return None
+    value = value.replace("$HOME", os.path.expanduser("~"))
+    # Az XDG a saját mappát jelöli, ha a könyvtár nincs beállítva
+    if os.path.normpath(value) == os.path.normpath(os.path.expanduser("~")):
+        return None
+    return value
+
+
+def user_folder(kind: str) -> str:
+    """Return the user's ``"documents"`` or ``"pictures"`` folder."""
+    path = None
+    try:
+        if platform.system() == "Windows":
+            path = _windows_known_folder(kind)
+        else:
+            path = _xdg_user_dir(kind)
+    except Exception:
+        path = None
+    return path or os.path.join(os.path.expanduser("~"), _FALLBACK_NAMES[kind])
+
+
+def app_data_dir() -> str:
+    """Folder of the config, run store, journal and logs."""
+    return os.path.join(user_folder("documents"), COMPANY_NAME, APP_SUBFOLDER_NAME)
+
+
+def logs_dir() -> str:
+    return os.path.join(app_data_dir(), "logs")
@@ -0,0 +1,607 @@
+"""Warm webcam session shared by the photo captures.
+
+Opening a camera typically takes 0.5-3 s and the first frames after opening
+are under-exposed while the auto exposure settles. :class:`CameraSession`
+therefore keeps the device open between photos:
+
+* The device is opened on the first :meth:`CameraSession.grab`, and
+  warm-up frames are discarded. At least ``warmup_frames`` are dropped. With
+  ``warmup_until_stable`` dropping continues until the mean brightness of
+  the last ``stable_frames`` frames varies by at most ``exposure_tolerance``
+  (capped at ``warmup_max_frames``).
+* After ``idle_timeout`` seconds without a photo the device is released.
+  The next photo opens it again; ``0`` closes it after every photo.
+* Drivers (V4L2, DirectShow) queue frames while nobody reads them, so the
+  first read after an idle pause would return a frame from the start of
+  the pause. Before such a grab up to ``flush_frames`` queued frames are
+  dropped with ``grab()`` (no decoding), until a grab has to wait for a
+  live frame. Where the backend supports it the queue is also shortened
+  with ``CAP_PROP_BUFFERSIZE``.
+* A failed read releases the device and reopens it (``REOPEN_ATTEMPTS``),
+  so an unplugged or reset camera recovers on the next photo.
+* With ``burst_frames`` > 1 :meth:`CameraSession.grab_best` reads that many
+  frames spread over ``burst_window`` seconds and returns the sharpest,
+  best exposed one (scored by :mod:`core.frame_quality`).
+
+Grabs are serialised by a lock, so the session can be used from the
+scheduler's worker threads. :func:`get_camera_session` returns the session
+shared per source. The source is a device index, a video file or URL, or
+``"synthetic"`` for :class:`SyntheticCamera`, which needs no hardware.
+
+The latency of the warm session against opening the device per photo::
+
+    python -m core.camera_session --source synthetic --shots 10
+    python -m core.camera_session --source 0 --shots 10 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional, Union
+
+try:
+    from .frame_quality import select_best
+    from .run_journal import percentile
+except ImportError:
+    # Ha önállóan futtatjuk teszteléshez
+    from frame_quality import select_best
+    from run_journal import percentile
+
+
+logger = logging.getLogger(__name__)
+
+SYNTHETIC_SOURCE = "synthetic"
+REOPEN_ATTEMPTS = 2
+# Ennél hosszabb szünet után a meghajtó sorában régi képkockák lehetnek (mp)
+FLUSH_IDLE_SECONDS = 0.2
+# Ha egy grab() ennyi ideig vár, már élő képkockát kapott: a sor kiürült (mp)
+FRESH_FRAME_SECONDS = 0.005
+# A fényerő méréséhez minden ennyiedik sort / oszlopot nézzük
+BRIGHTNESS_STRIDE = 8
+
+DEFAULT_CAMERA_SETTINGS = {
+    "source": 0,
+    "idle_timeout": 120.0,
+    "warmup_frames": 5,
+    "warmup_until_stable": True,
+    "warmup_max_frames": 30,
+    "stable_frames": 3,
+    "exposure_tolerance": 2.0,
+    "burst_frames": 1,
+    "burst_window": 0.3,
+    "flush_frames": 4,
+}
+
+_OPTION_TYPES = {
+    "idle_timeout": float,
+    "warmup_frames": int,
+    "warmup_until_stable": bool,
+    "warmup_max_frames": int,
+    "stable_frames": int,
+    "exposure_tolerance": float,
+    "reopen_attempts": int,
+    "burst_frames": int,
+    "burst_window": float,
+    "flush_frames": int,
+}
+
+CameraSource = Union[int, str, Callable[[], object]]
+
+
+class CameraError(RuntimeError):
+    """The camera could not be opened or delivered no frame."""
+
+
+class SyntheticCamera:
+    """Hardware-free stand-in for ``cv2.VideoCapture``.
+
+    Opening sleeps ``open_delay`` seconds, every read waits one frame
+    interval, and the frames brighten over the first
+    ``exposure_ramp_frames`` reads like a settling auto exposure. After
+    ``fail_after`` reads every read fails, as with an unplugged device.
+
+    With ``buffer_size`` > 0 the camera keeps producing frames while
+    nobody reads, and queues the oldest ``buffer_size`` of them like a
+    V4L2 driver. A read then returns a queued (stale) frame at once.
+    ``last_frame_time`` is the ``time.perf_counter()`` capture time of the
+    last frame returned.
+    """
+
+    def __init__(
+        self,
+        size: tuple[int, int] = (640, 480),
+        open_delay: float = 0.8,
+        fps: float = 30.0,
+        exposure_ramp_frames: int = 8,
+        target_level: int = 128,
+        fail_after: Optional[int] = None,
+        buffer_size: int = 0,
+    ):
+        import numpy as np
+
+        time.sleep(max(0.0, open_delay))
+        width, height = size
+        # Vízszintes színátmenet, hogy a képkockák ne legyenek egyszínűek
+        gradient = np.linspace(0.5, 1.5, width, dtype=np.float32)
+        self._base = np.repeat(gradient[np.newaxis, :, np.newaxis], height, axis=0).repeat(3, axis=2)
+        self._frame_interval = 1.0 / fps if fps > 0 else 0.0
+        self._ramp = max(1, int(exposure_ramp_frames))
+        self._target = float(target_level)
+        self._fail_after = fail_after
+        self._buffer_size = max(0, int(buffer_size)) if self._frame_interval else 0
+        self._reads = 0
+        self._opened = True
+        # Az utolsó kiolvasott képkocka rögzítési ideje
+        self.last_frame_time = time.perf_counter()
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def grab(self) -> bool:
+        """Take the next frame from the queue (or wait for a live one) without decoding it."""
+        if not self._opened or (self._fail_after is not None and self._reads >= self._fail_after):
+            return False
+        now = time.perf_counter()
+        if not self._frame_interval:
+            self.last_frame_time = now
+        elif self._buffer_size:
+            # A sor megtelte után érkező képkockákat a meghajtó eldobja
+            queued_from = now - self._buffer_size * self._frame_interval
+            next_frame = max(self.last_frame_time + self._frame_interval, queued_from)
+            if next_frame > now:
+                time.sleep(next_frame - now)
+            self.last_frame_time = next_frame
+        else:
+            # Nincs sor: minden olvasás a következő élő képkockára vár
+            time.sleep(self._frame_interval)
+            self.last_frame_time = time.perf_counter()
+        self._reads += 1
+        return True
+
+    def retrieve(self):
+        import numpy as np
+
+        level = self._target * min(1.0, self._reads / self._ramp)
+        return True, np.clip(self._base * level, 0, 255).astype(np.uint8)
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def release(self) -> None:
+        self._opened = False
+
+
+def open_capture(source: CameraSource):
+    """Open *source* and return a capture object (``read`` / ``isOpened`` / ``release``)."""
+    if callable(source):
+        return source()
+    if source == SYNTHETIC_SOURCE:
+        return SyntheticCamera()
+    # Az OpenCV betöltése lassú, csak az első megnyitáskor töltjük be.
+    import cv2
+
+    if isinstance(source, str) and source.strip().isdigit():
+        source = int(source)
+    capture = cv2.VideoCapture(source)
+    # Rövid meghajtósor: kevesebb régi képkocka marad tétlenség után (nem minden backend tudja)
+    capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return capture
+
+
+def mean_brightness(frame) -> float:
+    """Mean pixel level (0-255) of a sparse sample of *frame*."""
+    return float(frame[::BRIGHTNESS_STRIDE, ::BRIGHTNESS_STRIDE].mean())
+
+
+class CameraSession:
+    """Keeps one camera open between photos; see the module docstring."""
+
+    def __init__(
+        self,
+        source: CameraSource = DEFAULT_CAMERA_SETTINGS["source"],
+        *,
+        idle_timeout: float = DEFAULT_CAMERA_SETTINGS["idle_timeout"],
+        warmup_frames: int = DEFAULT_CAMERA_SETTINGS["warmup_frames"],
+        warmup_until_stable: bool = DEFAULT_CAMERA_SETTINGS["warmup_until_stable"],
+        warmup_max_frames: int = DEFAULT_CAMERA_SETTINGS["warmup_max_frames"],
+        stable_frames: int = DEFAULT_CAMERA_SETTINGS["stable_frames"],
+        exposure_tolerance: float = DEFAULT_CAMERA_SETTINGS["exposure_tolerance"],
+        reopen_attempts: int = REOPEN_ATTEMPTS,
+        burst_frames: int = DEFAULT_CAMERA_SETTINGS["burst_frames"],
+        burst_window: float = DEFAULT_CAMERA_SETTINGS["burst_window"],
+        flush_frames: int = DEFAULT_CAMERA_SETTINGS["flush_frames"],
+    ):
+        self.source = source
+        self._lock = threading.RLock()
+        self._capture = None
+        self._idle_timer: Optional[threading.Timer] = None
+        self._idle_generation = 0
+        self.opens = 0
+        self.read_failures = 0
+        self.last_warmup_frames = 0
+        self.last_flushed_frames = 0
+        self.last_stages: dict = {}
+        self._last_read_at = 0.0
+        self.configure(
+            idle_timeout=idle_timeout,
+            warmup_frames=warmup_frames,
+            warmup_until_stable=warmup_until_stable,
+            warmup_max_frames=warmup_max_frames,
+            stable_frames=stable_frames,
+            exposure_tolerance=exposure_tolerance,
+            reopen_attempts=reopen_attempts,
+            burst_frames=burst_frames,
+            burst_window=burst_window,
+            flush_frames=flush_frames,
+        )
+
+    @classmethod
+    def from_settings(cls, settings: Optional[dict] = None) -> "CameraSession":
+        options = normalize_camera_settings(settings)
+        return cls(options.pop("source"), **options)
+
+    def configure(self, **options) -> None:
+        """Update the options; warm-up settings apply from the next opening."""
+        with self._lock:
+            for name, value in options.items():
+                if name not in _OPTION_TYPES:
+                    raise TypeError(f"Ismeretlen kamera beállítás: {name}")
+                setattr(self, name, _OPTION_TYPES[name](value))
+            self.idle_timeout = max(0.0, self.idle_timeout)
+            self.warmup_frames = max(0, self.warmup_frames)
+            self.warmup_max_frames = max(self.warmup_frames, self.warmup_max_frames)
+            self.stable_frames = max(2, self.stable_frames)
+            self.reopen_attempts = max(0, self.reopen_attempts)
+            self.burst_frames = max(1, self.burst_frames)
+            self.burst_window = max(0.0, self.burst_window)
+            self.flush_frames = max(0, self.flush_frames)
+
+    @property
+    def is_open(self) -> bool:
+        return self._capture is not None
+
+    def grab(self):
+        """Return one frame (BGR ``numpy`` array) from the warm device.
+
+        ``last_stages`` afterwards holds the durations of this grab
+        (``camera_open`` and ``warmup`` only when the device was opened,
+        ``flush`` only when stale frames were dropped after a pause).
+        Raises :class:`CameraError` when no frame could be read.
+        """
+        with self._lock:
+            self._cancel_idle_close()
+            stages: dict = {}
+            try:
+                return self._grab_locked(stages)
+            finally:
+                self.last_stages = stages
+                self._schedule_idle_close()
+
+    def grab_best(self):
+        """Return ``(frame, quality)``: the best frame of a ``burst_frames`` burst.
+
+        ``quality`` holds the scores of the chosen frame (see
+        :class:`core.frame_quality.FrameScore`) with its index and the burst
+        size, or is ``None`` when bursts are off (``burst_frames`` == 1).
+        ``last_stages`` additionally holds ``burst`` (reading the rest of
+        the burst) and ``scoring``. Raises :class:`CameraError` like
+        :meth:`grab` when not even the first frame could be read.
+        """
+        with self._lock:
+            self._cancel_idle_close()
+            stages: dict = {}
+            try:
+                frame = self._grab_locked(stages)
+                if self.burst_frames <= 1:
+                    return frame, None
+                frames = [frame] + self._read_burst(stages)
+            finally:
+                self.last_stages = stages
+                self._schedule_idle_close()
+
+        started = time.perf_counter()
+        best, scores = select_best(frames)
+        stages["scoring"] = time.perf_counter() - started
+        quality = scores[best].as_dict()
+        quality.update(frame_index=best, burst_frames=len(frames))
+        return frames[best], quality
+
+    def _read_burst(self, stages: dict) -> list:
+        """Read the remaining burst frames, evenly spaced over ``burst_window``."""
+        started = time.perf_counter()
+        interval = self.burst_window / (self.burst_frames - 1)
+        frames = []
+        for index in range(1, self.burst_frames):
+            delay = started + index * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            ok, frame = self._read()
+            if not ok:
+                # A sorozat csonka marad; a már beolvasott képkockákból választunk
+                self.read_failures += 1
+                break
+            frames.append(frame)
+        stages["burst"] = time.perf_counter() - started
+        return frames
+
+    def close(self) -> None:
+        with self._lock:
+            self._cancel_idle_close()
+            self._release()
+
+    def _grab_locked(self, stages: dict):
+        last_error: Optional[CameraError] = None
+        for _attempt in range(1 + self.reopen_attempts):
+            if self._capture is None:
+                try:
+                    self._open(stages)
+                except CameraError as exc:
+                    last_error = exc
+                    continue
+            elif time.perf_counter() - self._last_read_at > FLUSH_IDLE_SECONDS:
+                self._flush(stages)
+            started = time.perf_counter()
+            ok, frame = self._read()
+            stages["grab"] = time.perf_counter() - started
+            if ok:
+                return frame
+            self.read_failures += 1
+            last_error = CameraError(f"A kamera nem adott képkockát: {self.source!r}")
+            logger.warning("Nem sikerült képkockát olvasni a kamerából (%r), újranyitás...", self.source)
+            self._release()
+        raise last_error or CameraError(f"A kamera nem érhető el: {self.source!r}")
+
+    def _open(self, stages: dict) -> None:
+        started = time.perf_counter()
+        try:
+            capture = open_capture(self.source)
+        except Exception as exc:
+            raise CameraError(f"A kamera nem nyitható meg: {self.source!r} ({exc})") from exc
+        if capture is None or not capture.isOpened():
+            if capture is not None:
+                capture.release()
+            raise CameraError(f"A kamera nem nyitható meg: {self.source!r}")
+        self._capture = capture
+        self.opens += 1
+        stages["camera_open"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        self.last_warmup_frames = self._warm_up()
+        stages["warmup"] = time.perf_counter() - started
+        logger.info(
+            "Kamera megnyitva (%r): %.2f mp, %d bemelegítő képkocka eldobva (%.2f mp).",
+            self.source,
+            stages["camera_open"],
+            self.last_warmup_frames,
+            stages["warmup"],
+        )
+
+    def _warm_up(self) -> int:
+        """Discard frames until the count (and the exposure) settle; return their number."""
+        levels: deque[float] = deque(maxlen=self.stable_frames)
+        limit = self.warmup_max_frames if self.warmup_until_stable else self.warmup_frames
+        discarded = 0
+        while discarded < limit:
+            ok, frame = self._read()
+            if not ok:
+                break
+            discarded += 1
+            levels.append(mean_brightness(frame))
+            if discarded < self.warmup_frames:
+                continue
+            if not self.warmup_until_stable:
+                break
+            if len(levels) == levels.maxlen and max(levels) - min(levels) <= self.exposure_tolerance:
+                break
+        else:
+            if self.warmup_until_stable and limit:
+                logger.warning(
+                    "A kamera expozíciója %d képkocka után sem állt be (%r).", discarded, self.source
+                )
+        return discarded
+
+    def _flush(self, stages: dict) -> None:
+        """Drop the frames the driver queued while the device sat idle."""
+        grab = getattr(self._capture, "grab", None)
+        dropped = 0
+        started = time.perf_counter()
+        while grab is not None and dropped < self.flush_frames:
+            grab_started = time.perf_counter()
+            try:
+                if not grab():
+                    break
+            except Exception:
+                logger.debug("Kivétel a kamera sorának ürítésekor.", exc_info=True)
+                break
+            dropped += 1
+            if time.perf_counter() - grab_started >= FRESH_FRAME_SECONDS:
+                # Ez a grab() már élő képkockára várt, a sor üres
+                break
+        self.last_flushed_frames = dropped
+        if dropped:
+            stages["flush"] = time.perf_counter() - started
+
+    def _read(self):
+        try:
+            ok, frame = self._capture.read()
+        except Exception:
+            logger.debug("Kivétel a kamera olvasásakor.", exc_info=True)
+            return False, None
+        self._last_read_at = time.perf_counter()
+        return bool(ok) and frame is not None, frame
+
+    def _release(self) -> None:
+        capture, self._capture = self._capture, None
+        if capture is not None:
+            try:
+                capture.release()
+            except Exception:
+                logger.debug("Kivétel a kamera lezárásakor.", exc_info=True)
+
+    def _schedule_idle_close(self) -> None:
+        if self._capture is None:
+            return
+        if self.idle_timeout <= 0:
+            self._release()
+            return
+        generation = self._idle_generation
+        self._idle_timer = threading.Timer(self.idle_timeout, self._close_if_idle, args=(generation,))
+        self._idle_timer.daemon = True
+        self._idle_timer.start()
+
+    def _cancel_idle_close(self) -> None:
+        self._idle_generation += 1
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+
+    def _close_if_idle(self, generation: int) -> None:
+        with self._lock:
+            if generation != self._idle_generation or self._capture is None:
+                return
+            self._idle_timer = None
+            self._release()
+        logger.info("Kamera lezárva %.1f mp tétlenség után (%r).", self.idle_timeout, self.source)
+
+
+def normalize_camera_settings(settings: Optional[dict]) -> dict:
+    """Return the camera settings completed with the defaults."""
+    options = dict(DEFAULT_CAMERA_SETTINGS)
+    for key, value in (settings or {}).items():
+        if key in options and value is not None:
+            options[key] = value
+    return options
+
+
+_sessions: dict[str, CameraSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_camera_session(settings: Optional[dict] = None) -> CameraSession:
+    """Return the session shared by every photo of the configured source."""
+    options = normalize_camera_settings(settings)
+    source = options.pop("source")
+    key = repr(source)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = CameraSession(source, **options)
+        else:
+            session.configure(**options)
+        return session
+
+
+def close_all_sessions() -> int:
+    """Release every shared camera; return how many were open."""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    opened = sum(1 for session in sessions if session.is_open)
+    for session in sessions:
+        session.close()
+    return opened
+
+
+# --- Latency comparison ---
+
+
+def _per_call_open(source: CameraSource) -> tuple[float, float]:
+    """The previous behaviour: open, read one frame, release. Returns (seconds, brightness)."""
+    started = time.perf_counter()
+    capture = open_capture(source)
+    try:
+        ok, frame = capture.read() if capture.isOpened() else (False, None)
+    finally:
+        capture.release()
+    if not ok or frame is None:
+        raise CameraError(f"A kamera nem adott képkockát: {source!r}")
+    return time.perf_counter() - started, mean_brightness(frame)
+
+
+def _stats(values: list[float]) -> dict:
+    return {
+        "median": statistics.median(values) if values else None,
+        "p95": percentile(values, 95),
+        "max": max(values) if values else None,
+    }
+
+
+def benchmark(source: CameraSource, shots: int = 10, settings: Optional[dict] = None) -> dict:
+    """Compare opening per photo with the warm session on *source*."""
+    per_call = [_per_call_open(source) for _ in range(max(1, shots))]
+
+    options = normalize_camera_settings(settings)
+    options.pop("source")
+    session = CameraSession(source, **options)
+    try:
+        started = time.perf_counter()
+        first = session.grab()
+        first_seconds = time.perf_counter() - started
+        warm = []
+        warm_levels = [mean_brightness(first)]
+        for _ in range(max(1, shots)):
+            started = time.perf_counter()
+            frame = session.grab()
+            warm.append(time.perf_counter() - started)
+            warm_levels.append(mean_brightness(frame))
+    finally:
+        session.close()
+
+    return {
+        "source": repr(source),
+        "shots": len(per_call),
+        "per_call_open": {**_stats([seconds for seconds, _ in per_call]), "brightness": statistics.mean(level for _, level in per_call)},
+        "session_first": {"seconds": first_seconds, "warmup_frames": session.last_warmup_frames},
+        "session_warm": {**_stats(warm), "brightness": statistics.mean(warm_levels)},
+    }
+
+
+def format_benchmark(report: dict) -> str:
+    def _ms(value):
+        return "-" if value is None else f"{value * 1000:.1f}"
+
+    per_call = report["per_call_open"]
+    warm = report["session_warm"]
+    first = report["session_first"]
+    lines = [
+        f"Forrás: {report['source']}, {report['shots']} kép",
+        f"{'':<32} {'medián ms':>10} {'p95 ms':>10} {'max ms':>10} {'fényerő':>9}",
+        f"{'megnyitás képenként':<32} {_ms(per_call['median']):>10} {_ms(per_call['p95']):>10} {_ms(per_call['max']):>10} {per_call['brightness']:>9.1f}",
+        f"{'meleg munkamenet':<32} {_ms(warm['median']):>10} {_ms(warm['p95']):>10} {_ms(warm['max']):>10} {warm['brightness']:>9.1f}",
+        f"Első kép a munkamenetben (megnyitás + {first['warmup_frames']} bemelegítő képkocka): {_ms(first['seconds'])} ms",
+    ]
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Webkamera: meleg munkamenet és képenkénti megnyitás összevetése.")
+    parser.add_argument("--source", default="0", help="eszközszám, videófájl / URL vagy 'synthetic'")
+    parser.add_argument("--shots", type=int, default=10, help="képek száma mérésenként")
+    parser.add_argument("--warmup-frames", type=int, default=DEFAULT_CAMERA_SETTINGS["warmup_frames"])
+    parser.add_argument("--no-stable-warmup", action="store_true", help="csak a bemelegítő képkockák száma számít")
+    parser.add_argument("--json", action="store_true", help="JSON kimenet")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    source: CameraSource = int(args.source) if args.source.strip().isdigit() else args.source
+    settings = {"warmup_frames": args.warmup_frames, "warmup_until_stable": not args.no_stable_warmup}
+    try:
+        report = benchmark(source, args.shots, settings)
+    except CameraError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    print(json.dumps(report, indent=2) if args.json else format_benchmark(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""Serialises captures that need the foreground window.
+
+Program and Discord captures bring a window to the front, attach thread
+input and click into it; two of them running at the same time steal the
+focus from each other. Such captures take a ticket from the shared
+:class:`CaptureArbiter` and only start once it is granted. Waiting tickets
+are served by priority (manual test captures first), then in request order.
+Full-screen and region grabs do not need the foreground and bypass the
+arbiter.
+
+Two ways to wait for the slot:
+
+* :meth:`CaptureArbiter.request` is non-blocking; ``on_granted`` is called
+  (on the releasing thread) once the ticket is granted. Event-driven code
+  such as :class:`core.discord_capture.DiscordCaptureJob` uses this.
+* :meth:`CaptureArbiter.acquire` / :meth:`CaptureArbiter.foreground` block
+  the calling worker thread.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_MANUAL = 0
+PRIORITY_SCHEDULED = 10
+
+# Ennyi idő után egy el nem engedett jegyet elveszettnek tekintünk
+DEFAULT_MAX_HOLD_SECONDS = 120.0
+# Ennyit várhat egy blokkoló (munkaszálon futó) képkészítés a sorára
+DEFAULT_FOREGROUND_TIMEOUT = 300.0
+
+
+class CaptureTicket:
+    """A place in the foreground queue."""
+
+    def __init__(
+        self,
+        arbiter: "CaptureArbiter",
+        label: str,
+        priority: int,
+        on_granted: Optional[Callable[["CaptureTicket"], None]],
+    ):
+        self.arbiter = arbiter
+        self.label = label
+        self.priority = priority
+        self.requested_at = time.monotonic()
+        self.granted_at: Optional[float] = None
+        self.released = False
+        self._on_granted = on_granted
+
+    @property
+    def granted(self) -> bool:
+        return self.granted_at is not None
+
+    @property
+    def wait_seconds(self) -> float:
+        """Time spent in the queue (so far, if not yet granted)."""
+        end = self.granted_at if self.granted_at is not None else time.monotonic()
+        return end - self.requested_at
+
+    def release(self) -> None:
+        """Give up the slot, or leave the queue if still waiting."""
+        self.arbiter.release(self)
+
+
+class CaptureArbiter:
+    """Priority queue granting the foreground to one capture at a time."""
+
+    def __init__(self, max_hold_seconds: float = DEFAULT_MAX_HOLD_SECONDS):
+        self.max_hold_seconds = max_hold_seconds
+        self._lock = threading.Lock()
+        self._queue: list[tuple[int, int, CaptureTicket]] = []
+        self._counter = itertools.count()
+        self._current: Optional[CaptureTicket] = None
+        self._wait_stats: dict[str, dict] = {}
+
+    def request(
+        self,
+        label: str,
+        priority: int = PRIORITY_SCHEDULED,
+        on_granted: Optional[Callable[[CaptureTicket], None]] = None,
+    ) -> CaptureTicket:
+        """Queue a capture and return its ticket without waiting.
+
+        ``on_granted`` may run synchronously inside this call when the slot
+        is free, otherwise on the thread that releases the previous ticket.
+        """
+        ticket = CaptureTicket(self, label, priority, on_granted)
+        with self._lock:
+            heapq.heappush(self._queue, (priority, next(self._counter), ticket))
+            queued = len(self._queue)
+        logger.debug("Előtér-kérés sorba állítva: %s (prioritás: %d, várakozók: %d)", label, priority, queued)
+        self._dispatch()
+        return ticket
+
+    def acquire(
+        self,
+        label: str,
+        priority: int = PRIORITY_SCHEDULED,
+        timeout: Optional[float] = None,
+    ) -> Optional[CaptureTicket]:
+        """Block until the slot is granted; ``None`` when *timeout* expires."""
+        granted = threading.Event()
+        ticket = self.request(label, priority, on_granted=lambda _ticket: granted.set())
+        if granted.wait(timeout):
+            return ticket
+        self.release(ticket)
+        if ticket.granted:
+            # A várakozás lejárta és a kiosztás között megkapta a helyet
+            return None
+        logger.warning("Az előtér nem szabadult fel %.1f másodperc alatt: %s", ticket.wait_seconds, label)
+        return None
+
+    @contextmanager
+    def foreground(
+        self,
+        label: str,
+        priority: int = PRIORITY_SCHEDULED,
+        timeout: Optional[float] = None,
+    ) -> Iterator[Optional[CaptureTicket]]:
+        """Context manager around :meth:`acquire`; yields ``None`` on timeout."""
+        ticket = self.acquire(label, priority, timeout)
+        try:
+            yield ticket
+        finally:
+            if ticket is not None:
+                ticket.release()
+
+    def release(self, ticket: CaptureTicket) -> None:
+        with self._lock:
+            if ticket.released:
+                return
+            ticket.released = True
+            if self._current is ticket:
+                self._current = None
+                held = time.monotonic() - (ticket.granted_at or time.monotonic())
+            else:
+                held = None
+                self._queue = [entry for entry in self._queue if entry[2] is not ticket]
+                heapq.heapify(self._queue)
+        if held is not None:
+            logger.debug("Előtér felszabadítva: %s (%.2f mp)", ticket.label, held)
+        self._dispatch()
+
+    def wait_stats(self) -> dict:
+        """Return per-label queue wait statistics (count, total, max seconds)."""
+        with self._lock:
+            return {label: dict(stats) for label, stats in self._wait_stats.items()}
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+    def _dispatch(self) -> None:
+        with self._lock:
+            current = self._current
+            if (
+                current is not None
+                and current.granted_at is not None
+                and time.monotonic() - current.granted_at > self.max_hold_seconds
+            ):
+                logger.warning(
+                    "Az előteret %.0f másodperce foglaló '%s' jegy felszabadítva (valószínűleg elveszett).",
+                    time.monotonic() - current.granted_at,
+                    current.label,
+                )
+                current.released = True
+                self._current = None
+            if self._current is not None or not self._queue:
+                return
+            _priority, _seq, ticket = heapq.heappop(self._queue)
+            ticket.granted_at = time.monotonic()
+            self._current = ticket
+            wait = ticket.wait_seconds
+            stats = self._wait_stats.setdefault(ticket.label, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            stats["count"] += 1
+            stats["total_seconds"] += wait
+            stats["max_seconds"] = max(stats["max_seconds"], wait)
+
+        log = logger.info if wait >= 0.5 else logger.debug
+        log("Előtér kiosztva: %s (várakozás a sorban: %.2f mp)", ticket.label, wait)
+        if ticket._on_granted is not None:
+            try:
+                ticket._on_granted(ticket)
+            except Exception:
+                logger.exception("Hiba az előtér kiosztásának visszahívásában (%s).", ticket.label)
+                self.release(ticket)
+
+
+_arbiter: Optional[CaptureArbiter] = None
+_arbiter_lock = threading.Lock()
+
+
+def get_capture_arbiter() -> CaptureArbiter:
+    """Return the shared arbiter, creating it on first use."""
+    global _arbiter
+    with _arbiter_lock:
+        if _arbiter is None:
+            _arbiter = CaptureArbiter()
+        return _arbiter
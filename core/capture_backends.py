@@ -0,0 +1,498 @@
+"""Interchangeable screen-grab backends with automatic selection.
+
+Every screen and region grab of :mod:`core.screenshot_taker` goes through a
+:class:`CaptureBackend`:
+
+* ``imagegrab``: :func:`PIL.ImageGrab.grab` (the previous behaviour),
+* ``qscreen``: Qt ``QScreen.grabWindow``; only when the GUI runs, calls from
+  other threads are executed on the GUI thread,
+* ``xshm``: X11 MIT-SHM grabs through reused shared-memory segments on
+  Linux (see :mod:`core.x11_shm`),
+* ``synthetic``: a deterministic gradient of the requested size, which
+  needs no display (for tests; never selected automatically).
+
+With ``"capture_backend": "auto"`` (the default) the first grab of a region
+size runs a short micro-benchmark of the available backends and keeps the
+fastest one whose frames have the expected size; the scheduler runs it at
+startup. For full-screen grabs the expected size is that of the fallback
+backend's full-screen frame, so a backend covering a different area (e.g.
+only the primary monitor of a multi-monitor desktop) is never chosen. The choice and the measured times are logged. A backend name in
+the setting pins it; when the pinned backend does not work the automatic
+choice is used. A backend that fails later is dropped and the grab falls
+back to ``imagegrab``. Backends decode into frames of the shared
+:class:`~core.frame_pool.FramePool` where they can. The comparison on the
+current display (wall and CPU time and newly allocated bytes per grab)::
+
+    python -m core.capture_backends
+    python -m core.capture_backends --region 0,0,800,600 --rounds 10 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Optional
+
+try:
+    from .frame_pool import decode_frame, frame_nbytes, get_frame_pool, is_pooled, release_frame
+    from .x11_shm import XShmBackend
+except ImportError:
+    # Ha önállóan futtatjuk teszteléshez
+    from frame_pool import decode_frame, frame_nbytes, get_frame_pool, is_pooled, release_frame
+    from x11_shm import XShmBackend
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+logger = logging.getLogger(__name__)
+
+AUTO = "auto"
+FALLBACK_BACKEND = "imagegrab"
+BENCHMARK_ROUNDS = 3
+QT_GRAB_TIMEOUT = 5.0
+SYNTHETIC_SIZE = (1920, 1080)
+
+Region = Optional[tuple[int, int, int, int]]
+
+
+class CaptureBackend:
+    """One way of grabbing the screen; *region* is an ``(left, top, right, bottom)`` bbox."""
+
+    name = ""
+
+    def available(self) -> bool:
+        """Cheap check whether the backend can work in this process."""
+        return True
+
+    def grab(self, region: Region) -> "Image.Image":
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class ImageGrabBackend(CaptureBackend):
+    name = "imagegrab"
+
+    def grab(self, region: Region) -> "Image.Image":
+        from PIL import ImageGrab
+
+        return ImageGrab.grab(bbox=region)
+
+
+class QtScreenBackend(CaptureBackend):
+    """``QScreen.grabWindow`` of the screen containing the region."""
+
+    name = "qscreen"
+
+    def available(self) -> bool:
+        # Qt-t nem töltünk be miatta: ha a GUI nem fut, nincs mit használni
+        if "PySide6.QtGui" not in sys.modules:
+            return False
+        from PySide6.QtGui import QGuiApplication
+
+        return QGuiApplication.instance() is not None
+
+    def grab(self, region: Region) -> "Image.Image":
+        from PySide6.QtCore import QThread, QTimer
+        from PySide6.QtGui import QGuiApplication
+
+        app = QGuiApplication.instance()
+        if app is None:
+            raise RuntimeError("Nincs futó Qt alkalmazás.")
+        if QThread.currentThread() == app.thread():
+            return self._grab_now(region)
+
+        # A QScreen csak a GUI szálon használható, oda küldjük a kérést.
+        future: Future = Future()
+
+        def _call():
+            try:
+                future.set_result(self._grab_now(region))
+            except BaseException as exc:
+                future.set_exception(exc)
+
+        QTimer.singleShot(0, app, _call)
+        return future.result(QT_GRAB_TIMEOUT)
+
+    @staticmethod
+    def _grab_now(region: Region) -> "Image.Image":
+        from PySide6.QtCore import QPoint
+        from PySide6.QtGui import QGuiApplication, QImage
+
+        if region is None:
+            screen = QGuiApplication.primaryScreen()
+            pixmap = screen.grabWindow(0)
+        else:
+            left, top, right, bottom = region
+            screen = QGuiApplication.screenAt(QPoint(left, top)) or QGuiApplication.primaryScreen()
+            origin = screen.geometry().topLeft()
+            pixmap = screen.grabWindow(0, left - origin.x(), top - origin.y(), right - left, bottom - top)
+        if pixmap.isNull():
+            raise RuntimeError("A QScreen nem adott képet.")
+        image = pixmap.toImage()
+        # A natív 32 bites formátumot (kis endián BGRX) közvetlenül dekódoljuk
+        if image.format() not in (
+            QImage.Format.Format_RGB32,
+            QImage.Format.Format_ARGB32,
+            QImage.Format.Format_ARGB32_Premultiplied,
+        ):
+            image = image.convertToFormat(QImage.Format.Format_RGB32)
+        rawmode = "BGRX" if sys.byteorder == "little" else "XRGB"
+        return decode_frame(image.constBits(), (image.width(), image.height()), rawmode, image.bytesPerLine())
+
+
+class SyntheticBackend(CaptureBackend):
+    """Deterministic frames (a gradient) without a display."""
+
+    name = "synthetic"
+
+    def __init__(self, size: tuple[int, int] = SYNTHETIC_SIZE):
+        self.size = size
+        self._frames: dict[tuple[int, int], "Image.Image"] = {}
+
+    def grab(self, region: Region) -> "Image.Image":
+        from PIL import Image
+
+        size = self.size if region is None else (region[2] - region[0], region[3] - region[1])
+        frame = self._frames.get(size)
+        if frame is None:
+            horizontal = Image.linear_gradient("L").rotate(90).resize(size)
+            vertical = Image.linear_gradient("L").resize(size)
+            frame = self._frames[size] = Image.merge("RGB", (horizontal, vertical, Image.new("L", size, 96)))
+        # Másolat a készletből: a hívó (pl. a dátumbélyegző) helyben módosítja a képet
+        copy = get_frame_pool().acquire("RGB", size)
+        copy.paste(frame)
+        return copy
+
+
+BACKEND_TYPES: dict[str, type] = {}
+# Az automatikus választás jelöltjei, a holtversenyben előnyben részesítettel kezdve
+AUTO_CANDIDATES: list[str] = []
+
+
+def register_backend(backend_type: type, auto: bool = True) -> None:
+    """Make *backend_type* selectable by name (and by the benchmark when *auto*)."""
+    BACKEND_TYPES[backend_type.name] = backend_type
+    if auto and backend_type.name not in AUTO_CANDIDATES:
+        AUTO_CANDIDATES.append(backend_type.name)
+
+
+register_backend(ImageGrabBackend)
+register_backend(QtScreenBackend)
+register_backend(XShmBackend)
+register_backend(SyntheticBackend, auto=False)
+
+
+def region_size(region: Region) -> Optional[tuple[int, int]]:
+    return None if region is None else (region[2] - region[0], region[3] - region[1])
+
+
+@dataclass
+class BackendTiming:
+    """Benchmark result of one backend; ``seconds`` is the median per grab.
+
+    ``cpu_seconds`` is the mean process CPU time per grab, which shows how
+    many frames per second a backend can sustain on one core.
+    ``allocated_bytes`` is the mean memory newly allocated per grab in the
+    steady state: Python buffers (traced peak) plus frame storage that did
+    not come back from the :class:`~core.frame_pool.FramePool`.
+    """
+
+    name: str
+    seconds: Optional[float] = None
+    error: Optional[str] = None
+    cpu_seconds: Optional[float] = None
+    allocated_bytes: Optional[int] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.seconds is not None
+
+
+def measure_backend(
+    backend: CaptureBackend,
+    region: Region,
+    rounds: int = BENCHMARK_ROUNDS,
+    measure_memory: bool = False,
+    expected_size: Optional[tuple[int, int]] = None,
+) -> BackendTiming:
+    """Time *rounds* grabs of *region* after one warm-up grab.
+
+    A backend whose frame is not *expected_size* (by default the size of
+    *region*; unchecked for a full-screen grab without it) fails. With
+    *measure_memory* the allocations per grab are measured as well (see
+    :func:`measure_allocations`).
+    """
+    if not backend.available():
+        return BackendTiming(backend.name, error="nem elérhető")
+    expected = expected_size or region_size(region)
+    timings = []
+    try:
+        frame = backend.grab(region)
+        release_frame(frame)
+        if expected is not None and frame.size != expected:
+            return BackendTiming(backend.name, error=f"hibás képméret: {frame.size[0]}x{frame.size[1]}")
+        cpu_started = time.process_time()
+        for _ in range(max(1, rounds)):
+            started = time.perf_counter()
+            # A mentő szál a kódolás után adja vissza a képet a készletbe
+            release_frame(backend.grab(region))
+            timings.append(time.perf_counter() - started)
+        cpu_seconds = (time.process_time() - cpu_started) / len(timings)
+        allocated_bytes = measure_allocations(backend, region) if measure_memory else None
+    except Exception as exc:
+        return BackendTiming(backend.name, error=str(exc) or exc.__class__.__name__)
+    return BackendTiming(
+        backend.name, seconds=statistics.median(timings), cpu_seconds=cpu_seconds, allocated_bytes=allocated_bytes
+    )
+
+
+def measure_allocations(backend: CaptureBackend, region: Region, rounds: int = 3) -> int:
+    """Mean bytes newly allocated by one steady-state grab of *region*.
+
+    Runs separately from the timing, because tracing slows allocations down.
+    """
+    import tracemalloc
+
+    pool = get_frame_pool()
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    total = 0
+    try:
+        for _ in range(max(1, rounds)):
+            pool_before = pool.stats()["allocated_bytes"]
+            tracemalloc.reset_peak()
+            traced_before = tracemalloc.get_traced_memory()[0]
+            frame = backend.grab(region)
+            total += tracemalloc.get_traced_memory()[1] - traced_before
+            if is_pooled(frame):
+                total += pool.stats()["allocated_bytes"] - pool_before
+            else:
+                total += frame_nbytes(frame.mode, frame.size)
+            release_frame(frame)
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    return total // max(1, rounds)
+
+
+def _format_timings(timings: list[BackendTiming]) -> str:
+    return ", ".join(
+        f"{timing.name} {timing.seconds * 1000:.1f} ms" if timing.ok else f"{timing.name}: {timing.error}"
+        for timing in timings
+    )
+
+
+class BackendSelector:
+    """Picks and caches the backend used for each region size."""
+
+    def __init__(self, preferred: str = AUTO, rounds: int = BENCHMARK_ROUNDS):
+        self._lock = threading.RLock()
+        self._backends: dict[str, CaptureBackend] = {}
+        self._choices: dict[Optional[tuple[int, int]], str] = {}
+        # Méretek, amelyekhez éppen fut a mérés (a záron kívül)
+        self._selecting: set[Optional[tuple[int, int]]] = set()
+        # A configure() minden változtatásnál növeli; a régi beállítással mért választás eldobandó
+        self._generation = 0
+        self.rounds = rounds
+        self.preferred = AUTO
+        self.configure(preferred)
+
+    def configure(self, preferred: Optional[str]) -> None:
+        """Set the pinned backend name or ``"auto"``; a change forgets the earlier choices."""
+        preferred = (preferred or AUTO).strip().lower()
+        if preferred != AUTO and preferred not in BACKEND_TYPES:
+            logger.warning("Ismeretlen képkészítő backend: %r, automatikus választás lesz.", preferred)
+            preferred = AUTO
+        with self._lock:
+            if preferred != self.preferred:
+                self.preferred = preferred
+                self._choices.clear()
+                self._generation += 1
+
+    def backend(self, name: str) -> CaptureBackend:
+        with self._lock:
+            backend = self._backends.get(name)
+            if backend is None:
+                backend = self._backends[name] = BACKEND_TYPES[name]()
+            return backend
+
+    def choices(self) -> dict:
+        """The chosen backend per region size (``"WxH"`` or ``"teljes"``)."""
+        with self._lock:
+            return {
+                ("teljes" if size is None else f"{size[0]}x{size[1]}"): name
+                for size, name in self._choices.items()
+            }
+
+    def backend_for(self, region: Region) -> CaptureBackend:
+        """The backend chosen for the size of *region*, selecting it on first use.
+
+        The benchmark runs outside the lock: a ``qscreen`` grab from a worker
+        thread waits for the GUI thread, which may itself be grabbing. While
+        another thread measures this size, the caller gets the fallback
+        backend instead of waiting.
+        """
+        key = region_size(region)
+        with self._lock:
+            name = self._choices.get(key)
+            if name is not None:
+                return self.backend(name)
+            if key in self._selecting:
+                return self.backend(FALLBACK_BACKEND)
+            self._selecting.add(key)
+            generation = self._generation
+        try:
+            name = self._select(region)
+        finally:
+            with self._lock:
+                self._selecting.discard(key)
+        with self._lock:
+            if generation == self._generation:
+                name = self._choices.setdefault(key, name)
+        return self.backend(name)
+
+    def grab(self, region: Region) -> "Image.Image":
+        backend = self.backend_for(region)
+        try:
+            return backend.grab(region)
+        except Exception:
+            if backend.name == FALLBACK_BACKEND:
+                raise
+            logger.warning(
+                "A(z) %s képkészítő backend hibát adott, visszaállás: %s.", backend.name, FALLBACK_BACKEND, exc_info=True
+            )
+            with self._lock:
+                self._choices[region_size(region)] = FALLBACK_BACKEND
+            return self.backend(FALLBACK_BACKEND).grab(region)
+
+    def warm_up(self, regions: list[Region]) -> dict:
+        """Select the backend for every region now (e.g. at startup); return :meth:`choices`."""
+        for region in regions:
+            self.backend_for(region)
+        return self.choices()
+
+    def _full_screen_size(self) -> Optional[tuple[int, int]]:
+        """Size of the fallback backend's full-screen frame, the reference for ``region=None``."""
+        try:
+            frame = self.backend(FALLBACK_BACKEND).grab(None)
+        except Exception as exc:
+            logger.warning("A teljes képernyő mérete nem állapítható meg (%s): %s", FALLBACK_BACKEND, exc)
+            return None
+        size = frame.size
+        release_frame(frame)
+        return size
+
+    def _select(self, region: Region) -> str:
+        size = region_size(region)
+        size_text = "teljes képernyő" if size is None else f"{size[0]}x{size[1]}"
+        # Teljes képernyőnél a backendek más-más területet rögzíthetnek (pl.
+        # csak az elsődleges monitort): a tartalék backend méretéhez mérünk.
+        expected = size if size is not None else self._full_screen_size()
+        if self.preferred != AUTO:
+            timing = measure_backend(self.backend(self.preferred), region, rounds=1, expected_size=expected)
+            if timing.ok:
+                logger.info("Képkészítő backend (%s): %s, beállításból.", size_text, self.preferred)
+                return self.preferred
+            logger.warning(
+                "A beállított %s képkészítő backend nem használható (%s), automatikus választás.",
+                self.preferred,
+                timing.error,
+            )
+
+        timings = [
+            measure_backend(self.backend(name), region, self.rounds, expected_size=expected) for name in AUTO_CANDIDATES
+        ]
+        working = [timing for timing in timings if timing.ok]
+        if not working:
+            logger.error("Egyik képkészítő backend sem működik (%s); %s marad.", _format_timings(timings), FALLBACK_BACKEND)
+            return FALLBACK_BACKEND
+        best = min(working, key=lambda timing: timing.seconds)
+        logger.info(
+            "Képkészítő backend (%s): %s, %.1f ms / kép (mérés: %s).",
+            size_text,
+            best.name,
+            best.seconds * 1000,
+            _format_timings(timings),
+        )
+        return best.name
+
+
+_selector: Optional[BackendSelector] = None
+_selector_lock = threading.Lock()
+# A parancssori mérés Qt alkalmazása; a referencia tartja életben a mérés alatt
+_qt_app = None
+
+
+def get_backend_selector() -> BackendSelector:
+    global _selector
+    with _selector_lock:
+        if _selector is None:
+            _selector = BackendSelector()
+        return _selector
+
+
+def configure_capture_backend(preferred: Optional[str]) -> None:
+    """Apply the ``capture_backend`` setting (a backend name or ``"auto"``)."""
+    get_backend_selector().configure(preferred)
+
+
+def grab_screen(region: Region = None) -> "Image.Image":
+    """Grab *region* (or the whole screen) with the selected backend."""
+    return get_backend_selector().grab(region)
+
+
+def _parse_region(text: Optional[str]) -> Region:
+    if not text:
+        return None
+    x, y, width, height = (int(value) for value in text.split(","))
+    return (x, y, x + width, y + height)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="A képkészítő backendek sebessége az aktuális kijelzőn.")
+    parser.add_argument("--region", help="x,y,szélesség,magasság (alapból a teljes képernyő)")
+    parser.add_argument("--rounds", type=int, default=10, help="mérések száma backendenként")
+    parser.add_argument("--qt", action="store_true", help="Qt alkalmazás indítása a qscreen backendhez")
+    parser.add_argument("--json", action="store_true", help="JSON kimenet")
+    args = parser.parse_args(argv)
+
+    region = _parse_region(args.region)
+    if args.qt:
+        from PySide6.QtGui import QGuiApplication
+
+        global _qt_app
+        _qt_app = QGuiApplication.instance() or QGuiApplication(sys.argv[:1])
+    selector = BackendSelector()
+    timings = [measure_backend(selector.backend(name), region, args.rounds, measure_memory=True) for name in BACKEND_TYPES]
+    working = [timing for timing in timings if timing.ok and timing.name in AUTO_CANDIDATES]
+    best = min(working, key=lambda timing: timing.seconds).name if working else None
+    if args.json:
+        print(json.dumps({"region": region, "selected": best, "backends": [asdict(timing) for timing in timings]}, indent=2))
+        return 0
+    for timing in timings:
+        marker = "*" if timing.name == best else " "
+        if timing.ok:
+            fps = 1.0 / timing.cpu_seconds if timing.cpu_seconds else float("inf")
+            print(
+                f"{marker} {timing.name:<12} {timing.seconds * 1000:>9.2f} ms / kép, "
+                f"CPU {timing.cpu_seconds * 1000:>8.2f} ms / kép (~{fps:.0f} kép/mp egy magon), "
+                f"új foglalás {timing.allocated_bytes / 1024:>9.1f} KiB / kép"
+            )
+        else:
+            print(f"{marker} {timing.name:<12} {timing.error}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
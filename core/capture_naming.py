@@ -0,0 +1,101 @@
+"""Collision-free file names for captures.
+
+Every capture is named after a single capture instant with millisecond
+resolution plus a per-process sequence number::
+
+    Kép_2024_01_31_10-00-00-123_000042.png
+
+The name is claimed with an exclusive create (``O_CREAT | O_EXCL``) before
+the image is encoded, so two captures can never overwrite each other or an
+existing file. If the name is already taken (another process, clock step
+back) the next sequence number is tried.
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import re
+import threading
+from datetime import date, datetime
+from typing import Optional
+
+
+FILENAME_TIME_FORMAT = "%Y_%m_%d_%H-%M-%S"
+MAX_NAME_ATTEMPTS = 1000
+
+_NAME_PATTERN = re.compile(
+    r"_(?P<time>\d{4}_\d{2}_\d{2}_\d{2}-\d{2}-\d{2})(?:-(?P<ms>\d{3}))?(?:_(?P<seq>\d+))?(?=\.|$)"
+)
+
+_sequence = itertools.count(1)
+_sequence_lock = threading.Lock()
+
+
+def next_sequence() -> int:
+    """Return the next value of the per-process capture counter."""
+    with _sequence_lock:
+        return next(_sequence)
+
+
+def capture_filename(prefix: str, extension: str, capture_time: datetime, sequence: int) -> str:
+    """Build the file name for a capture taken at *capture_time*."""
+    stamp = capture_time.strftime(FILENAME_TIME_FORMAT)
+    return f"{prefix}_{stamp}-{capture_time.microsecond // 1000:03d}_{sequence:06d}{extension}"
+
+
+def day_pattern(prefix: str, day: date) -> str:
+    """Glob pattern matching the captures of *prefix* taken on *day*."""
+    return f"{prefix}_{day.strftime('%Y_%m_%d')}_*"
+
+
+def parse_capture_time(filename: str) -> Optional[datetime]:
+    """Return the capture instant encoded in *filename*, if any.
+
+    Names written before millisecond naming (``..._%H-%M-%S.png``) are
+    understood as well.
+    """
+    match = _NAME_PATTERN.search(os.path.basename(filename))
+    if not match:
+        return None
+    try:
+        parsed = datetime.strptime(match.group("time"), FILENAME_TIME_FORMAT)
+    except ValueError:
+        return None
+    if match.group("ms"):
+        parsed = parsed.replace(microsecond=int(match.group("ms")) * 1000)
+    return parsed
+
+
+def reserve_capture_path(
+    save_directory: str,
+    prefix: str,
+    extension: str,
+    capture_time: Optional[datetime] = None,
+) -> str:
+    """Create an empty, exclusively owned file for a new capture and return its path.
+
+    The caller is expected to fill (and on failure remove) the file.
+    """
+    if capture_time is None:
+        capture_time = datetime.now()
+    os.makedirs(save_directory, exist_ok=True)
+    for _ in range(MAX_NAME_ATTEMPTS):
+        path = os.path.join(
+            save_directory, capture_filename(prefix, extension, capture_time, next_sequence())
+        )
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            continue
+        os.close(fd)
+        return path
+    raise FileExistsError(f"Nem található szabad fájlnév: {prefix} ({save_directory})")
+
+
+def discard_reserved_path(path: str) -> None:
+    """Remove a reserved file whose write failed; errors are ignored."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -3,31 +3,50 @@
 import json
 import os
 import sys
+import uuid
 
-# Figyelem: A PySide6 importokat eltávolítottuk innen, hogy ne fussanak le túl korán!
+try:
+    from .app_paths import APP_SUBFOLDER_NAME, COMPANY_NAME, app_data_dir, user_folder
+    from .camera_session import DEFAULT_CAMERA_SETTINGS
+    from .duplicate_filter import DEFAULT_DEDUP_SETTINGS
+    from .image_formats import DEFAULT_OUTPUT_FORMAT, normalize_output_format
+    from .job_options import DEFAULT_SCHEDULER_SETTINGS
+    from .run_journal import JOURNAL_FILENAME
+    from .run_store import RUN_STORE_FILENAME
+    from .timestamp_overlay import DEFAULT_TIMESTAMP_STYLE
+except ImportError:
+    # Ha önállóan futtatjuk teszteléshez
+    from app_paths import APP_SUBFOLDER_NAME, COMPANY_NAME, app_data_dir, user_folder
+    from camera_session import DEFAULT_CAMERA_SETTINGS
+    from duplicate_filter import DEFAULT_DEDUP_SETTINGS
+    from image_formats import DEFAULT_OUTPUT_FORMAT, normalize_output_format
+    from job_options import DEFAULT_SCHEDULER_SETTINGS
+    from run_journal import JOURNAL_FILENAME
+    from run_store import RUN_STORE_FILENAME
+    from timestamp_overlay import DEFAULT_TIMESTAMP_STYLE
+
+# A mappák feloldása Qt nélkül történik (core/app_paths.py), így a
+# konfiguráció a grafikus felület nélküli démonból is betölthető.
 
 class ConfigManager:
-    COMPANY_NAME = "UMKGL Solutions"
-    APP_SUBFOLDER_NAME = "FOTOapp"
+    COMPANY_NAME = COMPANY_NAME
+    APP_SUBFOLDER_NAME = APP_SUBFOLDER_NAME
 
-    def __init__(self, config_filename="fotoapp_config.json"):
-        self.config_filename = config_filename
-        self.config_path = self._get_config_path()
+    def __init__(self, config_filename="fotoapp_config.json", config_path=None):
+        self.config_filename = os.path.basename(config_path) if config_path else config_filename
+        self.config_path = config_path or self._get_config_path()
         self._ensure_config_dir_exists()
 
-    def _get_qstandard_path(self, location_enum):
-        """Késleltetett importálással éri el a QStandardPaths-t."""
-        from PySide6.QtCore import QStandardPaths
-        return QStandardPaths.writableLocation(location_enum)
-
     def _get_config_path(self):
-        from PySide6.QtCore import QStandardPaths
-        documents_location = self._get_qstandard_path(QStandardPaths.StandardLocation.DocumentsLocation)
-        if not documents_location:
-            fallback_dir = os.path.join(os.path.abspath("."), self.COMPANY_NAME, self.APP_SUBFOLDER_NAME)
-            return os.path.join(fallback_dir, self.config_filename)
-        config_dir = os.path.join(documents_location, self.COMPANY_NAME, self.APP_SUBFOLDER_NAME)
-        return os.path.join(config_dir, self.config_filename)
+        return os.path.join(app_data_dir(), self.config_filename)
+
+    def run_store_path(self):
+        """A futásnapló (SQLite) helye: a konfigurációs fájl mellett."""
+        return os.path.join(os.path.dirname(self.config_path), RUN_STORE_FILENAME)
+
+    def journal_path(self):
+        """A futási előzmények (JSONL) helye: a konfigurációs fájl mellett."""
+        return os.path.join(os.path.dirname(self.config_path), JOURNAL_FILENAME)
 
     def _ensure_config_dir_exists(self):
         dir_path = os.path.dirname(self.config_path)
@@ -38,8 +57,7 @@ class ConfigManager:
                 print(f"Hiba a config mappa létrehozásakor ({dir_path}): {e}", file=sys.stderr)
 
     def get_default_settings(self):
-        from PySide6.QtCore import QStandardPaths
-        pictures_location = self._get_qstandard_path(QStandardPaths.StandardLocation.PicturesLocation)
+        pictures_location = user_folder("pictures")
         screenshots_app_folder = "FOTOapp_Screenshots"
 
         if pictures_location:
@@ -54,15 +72,38 @@ class ConfigManager:
             "capture_type": "screenshot",
             "screenshot_mode": "fullscreen",
             "custom_area": {"x": 0, "y": 0, "width": 100, "height": 100},
+            # Szabálytípusok: napi időpont, intervallum (másodperc, opcionális
+            # napi ablakkal) és cron kifejezés - lásd core/triggers.py
             "schedules": [],
+            # Végrehajtó és futási szabályok (átfedés, összevonás, türelmi idő,
+            # futásnapló és elmaradt futások pótlása); az egyes szabályok
+            # felülírhatják - lásd core/job_options.py
+            "scheduler_settings": dict(DEFAULT_SCHEDULER_SETTINGS),
             "target_window": "",
             "include_timestamp": True,
             "timestamp_position": "top-left",
+            # A dátumbélyegző betűtípusa, mérete, színe és opcionális háttérdoboza
+            "timestamp_style": dict(DEFAULT_TIMESTAMP_STYLE),
+            # Alapértelmezett kimeneti formátum; az egyes ütemezések felülírhatják
+            # a saját "output_format" kulcsukkal.
+            "output_format": dict(DEFAULT_OUTPUT_FORMAT),
+            # Közel azonos egymást követő képek kiszűrése (alapból kikapcsolva)
+            "dedup": dict(DEFAULT_DEDUP_SETTINGS),
+            # Képernyőkép-készítő backend: "auto" (indításkor mért leggyorsabb),
+            # "imagegrab", "qscreen" vagy "synthetic" - lásd core/capture_backends.py
+            "capture_backend": "auto",
+            # Webkamerás fotó ("capture_type": "photo"): a kamera nyitva marad a
+            # képek között - lásd core/camera_session.py
+            "camera": dict(DEFAULT_CAMERA_SETTINGS),
             "discord_settings": {
                 "stay_foreground": False,
                 "use_hotkey": False,
                 "hotkey_number": 1,
                 "window_title": "",
+                "delay_after_hotkey": 2.0,
+                "wait_until_stable": False,
+                "stable_frames": 3,
+                "stable_tolerance": 1.5,
             },
         }
 
@@ -81,11 +122,44 @@ class ConfigManager:
                         settings[key].setdefault(sub_key, sub_val)
                 else:
                     settings.setdefault(key, value)
+            if self.ensure_schedule_ids(settings):
+                # A pótolt azonosítókat visszaírjuk, különben minden indításkor
+                # új azonosítót (és új feladatot, üres futásnaplóval) kapnának.
+                self.save_settings(settings)
             return settings
         except (FileNotFoundError, json.JSONDecodeError, Exception) as e:
             print(f"Hiba a config betöltésekor ({self.config_path}): {e}", file=sys.stderr)
             return self.get_default_settings()
 
+    @staticmethod
+    def new_schedule_id():
+        return uuid.uuid4().hex
+
+    @staticmethod
+    def ensure_schedule_ids(settings):
+        """Stabil ``id`` kulcsot ad azoknak az ütemezési szabályoknak, amelyeknek még nincs.
+
+        Az azonosító alapján tudja az ütemező újratöltéskor eldönteni, melyik
+        feladat változott. Visszaadja, hogy kellett-e azonosítót pótolni.
+        """
+        changed = False
+        for schedule_item in (settings or {}).get("schedules", []):
+            if isinstance(schedule_item, dict) and not schedule_item.get("id"):
+                schedule_item["id"] = ConfigManager.new_schedule_id()
+                changed = True
+        return changed
+
+    @staticmethod
+    def resolve_output_format(settings, schedule_item=None):
+        """Visszaadja az ütemezésre érvényes kimeneti formátumot.
+
+        Ha az ütemezési szabály saját ``output_format`` kulccsal rendelkezik,
+        az érvényes, különben a globális beállítás.
+        """
+        if isinstance(schedule_item, dict) and schedule_item.get("output_format"):
+            return normalize_output_format(schedule_item["output_format"])
+        return normalize_output_format((settings or {}).get("output_format"))
+
     def save_settings(self, settings):
         try:
             self._ensure_config_dir_exists()
@@ -0,0 +1,167 @@
+"""Headless capture daemon: the scheduled captures without the GUI and Qt.
+
+Loads the same ``fotoapp_config.json`` as the GUI, runs the scheduler and
+logs to ``fotoapp_daemon.log`` in the usual log folder::
+
+    python -m core.daemon
+    python -m core.daemon --config D:\\fotoapp\\fotoapp_config.json --log-level DEBUG
+
+The config file is watched, so changes saved from the GUI on another
+machine (or by hand) are applied without a restart. Do not run the daemon
+and the GUI on the same config at the same time: both would capture.
+Stops on Ctrl+C / SIGTERM.
+"""
+
+from __future__ import annotations
+
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import argparse
+import logging
+import os
+import platform
+import signal
+import sys
+import threading
+from typing import Optional
+
+try:
+    from .config_manager import ConfigManager
+    from .dispatcher import ThreadDispatcher
+    from .image_writer import shutdown_image_writer
+    from .logging_setup import setup_logging
+    from .scheduler import Scheduler
+    from .window_index import close_window_index
+except ImportError:
+    # Ha önállóan futtatjuk teszteléshez
+    from config_manager import ConfigManager
+    from dispatcher import ThreadDispatcher
+    from image_writer import shutdown_image_writer
+    from logging_setup import setup_logging
+    from scheduler import Scheduler
+    from window_index import close_window_index
+
+
+logger = logging.getLogger(__name__)
+
+CONFIG_POLL_SECONDS = 5.0
+STOP_TIMEOUT = 60.0
+
+
+def resident_memory_bytes() -> Optional[int]:
+    """Current resident set size of the process, if the platform tells it."""
+    try:
+        if platform.system() == "Windows":
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [
+                    ("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+            return None
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _config_mtime(path: str) -> Optional[float]:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def run(config_path: Optional[str] = None, stop_event: Optional[threading.Event] = None) -> int:
+    """Run the scheduler until *stop_event* is set (or a signal arrives)."""
+    stop_event = stop_event or threading.Event()
+    config_manager = ConfigManager(config_path=config_path)
+    settings = config_manager.load_settings()
+    logger.info("Konfiguráció betöltve: %s", config_manager.config_path)
+
+    # A nem blokkoló Discord képkészítés eseményciklusa
+    dispatcher = ThreadDispatcher().start()
+    scheduler = Scheduler(
+        run_store_path=config_manager.run_store_path(),
+        journal_path=config_manager.journal_path(),
+        call_later=dispatcher.call_later,
+    )
+    scheduler.start(settings)
+
+    rss = resident_memory_bytes()
+    logger.info(
+        "Démon elindult %.2f másodperc alatt (memória: %s, Qt betöltve: %s).",
+        time.perf_counter() - _IMPORT_STARTED,
+        f"{rss / (1024 * 1024):.1f} MiB" if rss else "ismeretlen",
+        "igen" if "PySide6" in sys.modules else "nem",
+    )
+
+    last_mtime = _config_mtime(config_manager.config_path)
+    try:
+        while not stop_event.wait(CONFIG_POLL_SECONDS):
+            mtime = _config_mtime(config_manager.config_path)
+            if mtime is not None and mtime != last_mtime:
+                last_mtime = mtime
+                logger.info("A konfiguráció megváltozott, feladatok újratöltése.")
+                scheduler.reload_jobs(config_manager.load_settings())
+    finally:
+        logger.info("Démon leállítása...")
+        try:
+            # A Discord feladatokat az őket hajtó szálon kell megszakítani.
+            dispatcher.run_sync(scheduler.stop, timeout=STOP_TIMEOUT)
+        except Exception:
+            logger.exception("Hiba az ütemező leállításakor.")
+        shutdown_image_writer(wait=True)
+        close_window_index()
+        dispatcher.stop()
+        logger.info("Démon leállt.")
+    return 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="FOTOapp ütemezett képkészítés grafikus felület nélkül.")
+    parser.add_argument("--config", help="a konfigurációs fájl (alapból a GUI-val közös fotoapp_config.json)")
+    parser.add_argument("--log-level", default="INFO", help="naplózási szint (DEBUG, INFO, WARNING, ...)")
+    parser.add_argument("--no-console", action="store_true", help="csak fájlba naplóz")
+    args = parser.parse_args(argv)
+
+    log_file = setup_logging(
+        "fotoapp_daemon.log",
+        level=getattr(logging, str(args.log_level).upper(), logging.INFO),
+        console=not args.no_console,
+    )
+    logger.info("Naplófájl: %s", log_file)
+
+    stop_event = threading.Event()
+
+    def _request_stop(signum, _frame):
+        logger.info("Leállítási jelzés érkezett (%s).", signal.Signals(signum).name)
+        stop_event.set()
+
+    for signal_name in ("SIGINT", "SIGTERM", "SIGBREAK"):
+        if hasattr(signal, signal_name):
+            signal.signal(getattr(signal, signal_name), _request_stop)
+
+    return run(args.config, stop_event)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
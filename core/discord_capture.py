@@ -0,0 +1,403 @@
+"""Event-driven, non-blocking variant of the Discord two-step capture.
+
+A blocking workflow built on ``time.sleep`` freezes the Qt event loop when
+it is executed on the GUI thread. :class:`DiscordCaptureJob` performs the
+steps (focus, probe, hotkey, settle, grab and save) as a state machine where
+every wait is a timer callback scheduled through ``call_later``. The event
+loop therefore keeps running between steps. The blocking
+:func:`core.screenshot_taker.take_discord_screenshot` drives the same job on
+a private :class:`core.dispatcher.ThreadDispatcher`.
+
+``call_later(delay_seconds, callback)`` is injected so the module itself
+does not depend on Qt; the GUI passes a ``QTimer.singleShot`` based
+implementation. It must be safe to call from any thread: the first step is
+scheduled from whichever thread releases the foreground slot of the
+:class:`~core.capture_arbiter.CaptureArbiter`.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import logging
+import platform
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Callable, Optional
+
+try:
+    from . import screenshot_taker as shots
+    from .capture_arbiter import PRIORITY_SCHEDULED, CaptureTicket, get_capture_arbiter
+except ImportError:
+    # Ha önállóan futtatjuk teszteléshez
+    import screenshot_taker as shots
+    from capture_arbiter import PRIORITY_SCHEDULED, CaptureTicket, get_capture_arbiter
+
+if platform.system() == "Windows":
+    import win32api
+    import win32con
+    import win32gui
+    import win32process
+
+
+logger = logging.getLogger(__name__)
+
+CallLater = Callable[[float, Callable[[], None]], None]
+
+FOCUS_TIMEOUT = 2.0
+FOCUS_POLL_INTERVAL = 0.01
+FOCUS_GRACE_DELAY = 0.1
+PROBE_TIMEOUT = 2.0
+PROBE_POLL_INTERVAL = 0.1
+KEY_STEP_DELAY = 0.05
+
+_active_jobs: set["DiscordCaptureJob"] = set()
+_active_jobs_lock = threading.Lock()
+
+
+class DiscordCaptureJob:
+    """A single Discord capture driven by timer callbacks.
+
+    The job must be started and driven on one thread (the Qt main thread in
+    the GUI). ``on_finished`` receives the
+    :class:`~core.screenshot_taker.CapturedFrame` of the capture, or ``None``
+    when a step failed, timed out or the job was cancelled. The image is written in
+    the background; ``on_saved`` receives the writer future, resolving to a
+    :class:`~core.image_writer.CaptureResult`, from a writer thread and is
+    only called when an image was captured.
+
+    The job first queues for the foreground at the shared capture arbiter
+    (``priority``; see :mod:`core.capture_arbiter`) and holds it until the
+    final grab, or gives up after ``queue_timeout`` seconds in the queue.
+    The time spent queued is stored in the frame's
+    ``info["queue_wait_seconds"]``. Discord is only focused, not captured:
+    the activation time and the size of the window bitmap that was not
+    rendered go to ``info["activate_seconds"]`` and
+    ``info["skipped_capture_bytes"]``. With ``wait_until_stable`` the settle
+    step waits until the region stops changing, using ``delay_after_hotkey``
+    as an upper bound; the measured time is ``info["settle_seconds"]``.
+    """
+
+    def __init__(
+        self,
+        save_directory: str,
+        filename_prefix: str = "Kép",
+        area: Optional[object] = None,
+        add_timestamp: bool = False,
+        timestamp_position: str = "top-left",
+        stay_foreground: bool = False,
+        use_hotkey: bool = False,
+        hotkey_number: int = 1,
+        window_title: str = "Discord",
+        delay_after_hotkey: float = 10.0,
+        wait_until_stable: bool = False,
+        stable_frames: int = 3,
+        stable_tolerance: float = 1.5,
+        *,
+        call_later: CallLater,
+        timestamp_style: Optional[dict] = None,
+        on_finished: Optional[Callable[[Optional[shots.CapturedFrame]], None]] = None,
+        on_saved: Optional[Callable[[Future], None]] = None,
+        output_format: Optional[dict] = None,
+        duplicate_filter=None,
+        dedup_key: Optional[str] = None,
+        priority: int = PRIORITY_SCHEDULED,
+        queue_timeout: Optional[float] = None,
+    ):
+        self.save_directory = save_directory
+        self.filename_prefix = filename_prefix
+        self.region = shots._normalize_region(area)
+        self.add_timestamp = add_timestamp
+        self.timestamp_position = timestamp_position
+        self.timestamp_style = timestamp_style
+        self.stay_foreground = stay_foreground
+        self.use_hotkey = use_hotkey
+        self.hotkey_number = max(0, min(9, int(hotkey_number)))
+        self.window_title = window_title or "Discord"
+        self.delay_after_hotkey = max(0.0, float(delay_after_hotkey))
+        self.wait_until_stable = wait_until_stable
+        self.stable_frames = stable_frames
+        self.stable_tolerance = stable_tolerance
+
+        self._call_later = call_later
+        self._on_finished = on_finished
+        self._on_saved = on_saved
+        self.output_format = output_format
+        self.duplicate_filter = duplicate_filter
+        self.dedup_key = dedup_key
+        self.priority = priority
+        self.queue_timeout = queue_timeout
+
+        self.state = "idle"
+        self._finished = False
+        self._hwnd = None
+        self._original_hwnd = None
+        self._attached_threads: Optional[tuple[int, int]] = None
+        self._deadline = 0.0
+        self._activate_start = 0.0
+        self._activation: Optional[shots.WindowActivation] = None
+        self._settle_start = 0.0
+        self._tracker: Optional[shots.FrameStabilityTracker] = None
+        self._ticket: Optional[CaptureTicket] = None
+
+    # --- Public API ---
+
+    def start(self) -> None:
+        """Start the capture; returns immediately."""
+        if self.state != "idle":
+            return
+        with _active_jobs_lock:
+            _active_jobs.add(self)
+        self.state = "queued"
+        self._ticket = get_capture_arbiter().request(
+            f"discord:{self.window_title}",
+            self.priority,
+            on_granted=lambda _ticket: self._schedule(0.0, self._step_focus),
+        )
+        if self.queue_timeout is not None:
+            self._schedule(self.queue_timeout, self._check_queue_timeout)
+
+    def _check_queue_timeout(self) -> None:
+        if self.state == "queued":
+            self._fail("A Discord képkészítés nem kapott sorra, kihagyva.")
+
+    def cancel(self, reason: str = "megszakítva") -> None:
+        """Abort the capture at the next opportunity and clean up."""
+        if not self._finished:
+            self._fail(f"A Discord képkészítés megszakítva ({reason}).", level=logging.WARNING)
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    # --- Scheduling helpers ---
+
+    def _schedule(self, delay: float, step: Callable[[], None]) -> None:
+        def _run():
+            if self._finished:
+                return
+            try:
+                step()
+            except Exception:
+                logger.exception("Hiba a Discord képkészítés '%s' lépésében.", self.state)
+                self._finish(None)
+
+        self._call_later(max(0.0, delay), _run)
+
+    def _enter(self, state: str, timeout: Optional[float] = None) -> None:
+        self.state = state
+        if timeout is not None:
+            self._deadline = time.monotonic() + timeout
+
+    def _deadline_passed(self) -> bool:
+        return time.monotonic() > self._deadline
+
+    # --- Steps ---
+
+    def _step_focus(self) -> None:
+        self._enter("focus", FOCUS_TIMEOUT)
+        self._activate_start = time.perf_counter()
+        if platform.system() != "Windows":
+            self._fail("A Discord mód csak Windows rendszeren támogatott.")
+            return
+
+        self._hwnd = shots._find_window(self.window_title, "discord.exe")
+        if not self._hwnd:
+            self._fail(f"A '{self.window_title}' ablak nem található.")
+            return
+
+        try:
+            self._original_hwnd = win32gui.GetForegroundWindow()
+        except Exception:
+            self._original_hwnd = None
+
+        target_thread_id, _ = win32process.GetWindowThreadProcessId(self._hwnd)
+        current_thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        ctypes.windll.user32.AttachThreadInput(current_thread_id, target_thread_id, True)
+        self._attached_threads = (current_thread_id, target_thread_id)
+
+        # Only restore minimized windows; SW_RESTORE would shrink a maximized one.
+        if win32gui.IsIconic(self._hwnd):
+            win32gui.ShowWindow(self._hwnd, win32con.SW_RESTORE)
+        win32gui.SetForegroundWindow(self._hwnd)
+        self._schedule(0.0, self._poll_focus)
+
+    def _poll_focus(self) -> None:
+        if win32gui.GetForegroundWindow() == self._hwnd:
+            # Give the window a brief moment to receive focus before key presses.
+            self._enter("probe")
+            self._schedule(FOCUS_GRACE_DELAY, self._start_probe)
+            return
+        if self._deadline_passed():
+            self._fail(f"A '{self.window_title}' ablak nem került az előtérbe.")
+            return
+        self._schedule(FOCUS_POLL_INTERVAL, self._poll_focus)
+
+    def _start_probe(self) -> None:
+        self._enter("probe", PROBE_TIMEOUT)
+        self._poll_probe()
+
+    def _poll_probe(self) -> None:
+        if shots._probe_pixel_matches():
+            import pyautogui
+
+            pyautogui.click(*shots.DISCORD_PROBE_POINT)
+            self._step_hotkey()
+            return
+        if self._deadline_passed():
+            self._fail("A Discord ablak ellenőrző pixele nem jelent meg időben.")
+            return
+        self._schedule(PROBE_POLL_INTERVAL, self._poll_probe)
+
+    def _step_hotkey(self) -> None:
+        self._enter("hotkey")
+        if not self.use_hotkey:
+            self._verify_foreground()
+            return
+
+        vk_code = ord(str(self.hotkey_number))
+        key_events = [
+            (win32con.VK_LCONTROL, 0),
+            (vk_code, 0),
+            (vk_code, win32con.KEYEVENTF_KEYUP),
+            (win32con.VK_LCONTROL, win32con.KEYEVENTF_KEYUP),
+        ]
+
+        def _send(index: int) -> None:
+            key, flags = key_events[index]
+            win32api.keybd_event(key, 0, flags, 0)
+            if index + 1 < len(key_events):
+                self._schedule(KEY_STEP_DELAY, lambda: _send(index + 1))
+            else:
+                self._verify_foreground()
+
+        _send(0)
+
+    def _verify_foreground(self) -> None:
+        if win32gui.GetForegroundWindow() != self._hwnd:
+            self._fail(f"A '{self.window_title}' ablak időközben elvesztette az előtér státuszát.")
+            return
+        self._activation = shots.WindowActivation.measure(self._hwnd, self._activate_start)
+        logger.debug(
+            "Discord előtérbe hozva %.2f mp alatt, ablakkép nélkül (megtakarított puffer: %.1f MiB).",
+            self._activation.seconds,
+            self._activation.skipped_capture_bytes / (1024 * 1024),
+        )
+        self._detach_input()
+        self._step_settle()
+
+    def _step_settle(self) -> None:
+        self._enter("settle", self.delay_after_hotkey)
+        self._settle_start = time.monotonic()
+        if not self.wait_until_stable:
+            self._schedule(self.delay_after_hotkey, self._step_grab)
+            return
+        self._tracker = shots.FrameStabilityTracker(self.stable_frames, self.stable_tolerance)
+        self._schedule(min(shots.STABLE_MIN_WAIT, self.delay_after_hotkey), self._poll_settle)
+
+    def _poll_settle(self) -> None:
+        if self._deadline_passed():
+            logger.info(
+                "A képernyő nem stabilizálódott %.2f másodperc alatt, a felső korlát után folytatjuk.",
+                time.monotonic() - self._settle_start,
+            )
+            self._step_grab()
+            return
+        if self._tracker.update(shots._grab_probe(self.region)):
+            logger.info(
+                "A képernyő %.2f másodperc alatt stabilizálódott.",
+                time.monotonic() - self._settle_start,
+            )
+            self._step_grab()
+            return
+        self._schedule(shots.STABLE_PROBE_INTERVAL, self._poll_settle)
+
+    def _step_grab(self) -> None:
+        self._enter("grab")
+        settle_time = time.monotonic() - self._settle_start
+        grab_start = time.perf_counter()
+        img = shots._capture_screen(self.region)
+        if img is None:
+            self._fail("Nem sikerült a képernyőképet elkészíteni.")
+            return
+        capture_time = datetime.now()
+        img.info["grab_seconds"] = time.perf_counter() - grab_start
+        img.info["settle_seconds"] = settle_time
+        img.info["queue_wait_seconds"] = self._ticket.wait_seconds if self._ticket else 0.0
+        if self._activation is not None:
+            img.info["activate_seconds"] = self._activation.seconds
+            img.info["skipped_capture_bytes"] = self._activation.skipped_capture_bytes
+
+        self._enter("save")
+        frame = shots._finalize_capture(
+            img,
+            self.save_directory,
+            self.filename_prefix,
+            add_timestamp=self.add_timestamp,
+            timestamp_position=self.timestamp_position,
+            timestamp_style=self.timestamp_style,
+            capture_time=capture_time,
+            on_saved=self._on_saved,
+            output_format=self.output_format,
+            duplicate_filter=self.duplicate_filter,
+            dedup_key=self.dedup_key,
+        )
+        self._finish(frame)
+
+    # --- Completion and cleanup ---
+
+    def _fail(self, message: str, level: int = logging.ERROR) -> None:
+        logger.log(level, "%s (lépés: %s)", message, self.state)
+        self._finish(None)
+
+    def _detach_input(self) -> None:
+        if self._attached_threads is None:
+            return
+        current_thread_id, target_thread_id = self._attached_threads
+        self._attached_threads = None
+        try:
+            ctypes.windll.user32.AttachThreadInput(current_thread_id, target_thread_id, False)
+        except Exception:
+            logger.warning("A szálbemenet leválasztása nem sikerült.", exc_info=True)
+
+    def _restore_foreground(self) -> None:
+        if self.stay_foreground or platform.system() != "Windows" or not self._original_hwnd:
+            return
+        try:
+            if win32gui.IsWindow(self._original_hwnd):
+                win32gui.SetForegroundWindow(self._original_hwnd)
+        except Exception:
+            logger.warning("Az eredeti ablakot nem sikerült visszaállítani az előtérbe.")
+
+    def _release_foreground(self) -> None:
+        if self._ticket is not None:
+            self._ticket.release()
+
+    def _finish(self, img: Optional[shots.CapturedFrame]) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        self.state = "done" if img is not None else "failed"
+        self._detach_input()
+        self._restore_foreground()
+        self._release_foreground()
+        with _active_jobs_lock:
+            _active_jobs.discard(self)
+        if self._on_finished:
+            try:
+                self._on_finished(img)
+            except Exception:
+                logger.exception("Hiba a Discord képkészítés befejező visszahívásában.")
+
+
+def cancel_all(reason: str = "leállítás") -> int:
+    """Cancel every running :class:`DiscordCaptureJob` and return their count.
+
+    Must be called on the thread that drives the jobs.
+    """
+    with _active_jobs_lock:
+        jobs = list(_active_jobs)
+    for job in jobs:
+        job.cancel(reason)
+    return len(jobs)
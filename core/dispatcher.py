@@ -0,0 +1,86 @@
+"""Qt-free ``call_later`` implementation for running without a GUI.
+
+The event-driven Discord capture (:class:`core.discord_capture.DiscordCaptureJob`)
+needs a ``call_later(delay_seconds, callback)`` that runs every callback on
+one thread. The GUI uses the Qt event loop for that; the headless daemon uses
+:class:`ThreadDispatcher`, a single thread serving a timer heap.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class ThreadDispatcher:
+    """Runs scheduled callbacks in order on a dedicated thread."""
+
+    def __init__(self, name: str = "CaptureDispatcher"):
+        self._heap: list[tuple[float, int, Callable[[], None]]] = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self) -> "ThreadDispatcher":
+        self._thread.start()
+        return self
+
+    def call_later(self, delay_seconds: float, callback: Callable[[], None]) -> None:
+        """Run *callback* on the dispatcher thread after *delay_seconds*; thread-safe."""
+        due = time.monotonic() + max(0.0, float(delay_seconds))
+        with self._condition:
+            if self._stopped:
+                return
+            heapq.heappush(self._heap, (due, next(self._counter), callback))
+            self._condition.notify()
+
+    def run_sync(self, callback: Callable[[], object], timeout: Optional[float] = None):
+        """Run *callback* on the dispatcher thread and return its result."""
+        if threading.current_thread() is self._thread:
+            return callback()
+        future: Future = Future()
+
+        def _call():
+            try:
+                future.set_result(callback())
+            except BaseException as exc:
+                future.set_exception(exc)
+
+        self.call_later(0.0, _call)
+        return future.result(timeout)
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        """Stop the thread; callbacks not yet due are dropped."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    if self._heap:
+                        wait = self._heap[0][0] - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._condition.wait(wait)
+                    else:
+                        self._condition.wait()
+                if self._stopped:
+                    return
+                _due, _seq, callback = heapq.heappop(self._heap)
+            try:
+                callback()
+            except Exception:
+                logger.exception("Hiba a diszpécser visszahívásában.")
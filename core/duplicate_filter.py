@@ -0,0 +1,189 @@
+"""Perceptual duplicate suppression for scheduled captures.
+
+Each new frame is reduced to a small grayscale thumbnail and hashed (dHash
+or aHash). When the hash is within ``threshold`` bits of the last *saved*
+frame of the same job, the capture counts as a duplicate and is either
+skipped or recorded only as a metadata line in ``DUPLICATES_FILENAME``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+logger = logging.getLogger(__name__)
+
+MODE_SKIP = "skip"
+MODE_RECORD = "record"
+ALGORITHMS = ("dhash", "ahash")
+
+DUPLICATES_FILENAME = "fotoapp_duplicates.jsonl"
+
+DEFAULT_DEDUP_SETTINGS = {
+    "enabled": False,
+    "threshold": 6,
+    "hash_size": 16,
+    "algorithm": "dhash",
+    "mode": MODE_SKIP,
+}
+
+
+def dhash(img: Image.Image, hash_size: int = 16) -> int:
+    """Difference hash: compares horizontally adjacent thumbnail pixels."""
+    from PIL import Image
+
+    small = img.resize((hash_size + 1, hash_size), Image.Resampling.BOX).convert("L")
+    pixels = small.tobytes()
+    width = hash_size + 1
+    value = 0
+    for row in range(hash_size):
+        offset = row * width
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def ahash(img: Image.Image, hash_size: int = 16) -> int:
+    """Average hash: compares every thumbnail pixel with the mean."""
+    from PIL import Image
+
+    small = img.resize((hash_size, hash_size), Image.Resampling.BOX).convert("L")
+    pixels = small.tobytes()
+    mean = sum(pixels) / len(pixels)
+    value = 0
+    for pixel in pixels:
+        value = (value << 1) | (pixel > mean)
+    return value
+
+
+def hamming_distance(first: int, second: int) -> int:
+    return (first ^ second).bit_count()
+
+
+@dataclass
+class DuplicateCheck:
+    """Outcome of :meth:`DuplicateFilter.check`."""
+
+    key: str
+    image_hash: int
+    distance: Optional[int]
+    is_duplicate: bool
+
+
+class DuplicateFilter:
+    """Remembers the hash of the last saved frame per job key."""
+
+    def __init__(
+        self,
+        threshold: int = DEFAULT_DEDUP_SETTINGS["threshold"],
+        hash_size: int = DEFAULT_DEDUP_SETTINGS["hash_size"],
+        algorithm: str = DEFAULT_DEDUP_SETTINGS["algorithm"],
+        mode: str = DEFAULT_DEDUP_SETTINGS["mode"],
+    ):
+        self._lock = threading.Lock()
+        self._last: dict[str, tuple[int, str]] = {}
+        self.checked = 0
+        self.skipped = 0
+        self.configure(threshold=threshold, hash_size=hash_size, algorithm=algorithm, mode=mode)
+
+    @classmethod
+    def from_settings(cls, settings: Optional[dict]) -> "DuplicateFilter":
+        merged = {**DEFAULT_DEDUP_SETTINGS, **(settings or {})}
+        return cls(merged["threshold"], merged["hash_size"], merged["algorithm"], merged["mode"])
+
+    def configure(self, *, threshold=None, hash_size=None, algorithm=None, mode=None) -> None:
+        """Update the parameters; changing the hash kind forgets stored hashes."""
+        with self._lock:
+            if threshold is not None:
+                self.threshold = max(0, int(threshold))
+            if mode is not None:
+                self.mode = mode if mode in (MODE_SKIP, MODE_RECORD) else MODE_SKIP
+            new_size = max(4, int(hash_size)) if hash_size is not None else getattr(self, "hash_size", 16)
+            new_algorithm = algorithm if algorithm in ALGORITHMS else getattr(self, "algorithm", "dhash")
+            if new_size != getattr(self, "hash_size", None) or new_algorithm != getattr(self, "algorithm", None):
+                self._last.clear()
+            self.hash_size = new_size
+            self.algorithm = new_algorithm
+
+    def configure_from_settings(self, settings: Optional[dict]) -> None:
+        merged = {**DEFAULT_DEDUP_SETTINGS, **(settings or {})}
+        self.configure(
+            threshold=merged["threshold"],
+            hash_size=merged["hash_size"],
+            algorithm=merged["algorithm"],
+            mode=merged["mode"],
+        )
+
+    def compute_hash(self, img: Image.Image) -> int:
+        if self.algorithm == "ahash":
+            return ahash(img, self.hash_size)
+        return dhash(img, self.hash_size)
+
+    def check(self, key: str, img: Image.Image) -> DuplicateCheck:
+        """Hash *img* and compare it with the last saved frame of *key*.
+
+        Non-duplicate frames become the new reference for *key*.
+        """
+        image_hash = self.compute_hash(img)
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            self.checked += 1
+            previous = self._last.get(key)
+            distance = hamming_distance(image_hash, previous[0]) if previous else None
+            is_duplicate = distance is not None and distance <= self.threshold
+            if is_duplicate:
+                self.skipped += 1
+            else:
+                self._last[key] = (image_hash, now)
+            checked, skipped = self.checked, self.skipped
+
+        rate = 100.0 * skipped / checked
+        if is_duplicate:
+            logger.info(
+                "Duplikátum képkészítés (%s, eltérés: %d bit, küszöb: %d) - %s. Kihagyási arány: %d/%d (%.1f%%).",
+                key,
+                distance,
+                self.threshold,
+                "csak metaadat" if self.mode == MODE_RECORD else "kihagyva",
+                skipped,
+                checked,
+                rate,
+            )
+        else:
+            logger.debug("Új képtartalom (%s, eltérés: %s bit).", key, distance)
+        return DuplicateCheck(key, image_hash, distance, is_duplicate)
+
+    def record(self, save_directory: str, check: DuplicateCheck) -> None:
+        """Append a metadata entry for a duplicate capture (``record`` mode)."""
+        with self._lock:
+            reference_time = self._last.get(check.key, (None, None))[1]
+        entry = {
+            "time": datetime.now().isoformat(timespec="milliseconds"),
+            "job": check.key,
+            "distance": check.distance,
+            "hash": f"{check.image_hash:x}",
+            "reference_time": reference_time,
+        }
+        try:
+            os.makedirs(save_directory, exist_ok=True)
+            with open(os.path.join(save_directory, DUPLICATES_FILENAME), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as exc:
+            logger.warning("Nem sikerült a duplikátum bejegyzést rögzíteni: %s", exc)
+
+    def forget(self, key: Optional[str] = None) -> None:
+        """Drop the stored reference for *key*, or for every job."""
+        with self._lock:
+            if key is None:
+                self._last.clear()
+            else:
+                self._last.pop(key, None)
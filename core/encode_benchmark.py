@@ -0,0 +1,161 @@
+"""Encode-cost benchmark for the supported output formats.
+
+Runs representative screenshots through every encoder configuration and
+reports encode time, bytes on disk and decode time::
+
+    python -m core.encode_benchmark                 # synthetic UI samples
+    python -m core.encode_benchmark shot1.png ...   # your own captures
+    python -m core.encode_benchmark --capture       # the current screen
+
+The synthetic samples imitate typical UI screenshots (flat panels, text,
+a small photographic area) so the numbers are meaningful without a display.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import random
+import statistics
+import time
+from typing import Iterable
+
+from PIL import Image, ImageDraw
+
+try:
+    from .image_formats import (
+        FORMAT_JPEG,
+        FORMAT_PNG,
+        FORMAT_WEBP,
+        FORMAT_WEBP_LOSSLESS,
+        save_image,
+    )
+except ImportError:
+    # Ha önállóan futtatjuk teszteléshez
+    from image_formats import (
+        FORMAT_JPEG,
+        FORMAT_PNG,
+        FORMAT_WEBP,
+        FORMAT_WEBP_LOSSLESS,
+        save_image,
+    )
+
+
+BENCHMARK_FORMATS = [
+    ("png-1", {"format": FORMAT_PNG, "compress_level": 1}),
+    ("png-3", {"format": FORMAT_PNG, "compress_level": 3}),
+    ("png-6", {"format": FORMAT_PNG, "compress_level": 6}),
+    ("png-9", {"format": FORMAT_PNG, "compress_level": 9}),
+    ("webp-lossless-0", {"format": FORMAT_WEBP_LOSSLESS, "quality": 0}),
+    ("webp-lossless-50", {"format": FORMAT_WEBP_LOSSLESS, "quality": 50}),
+    ("webp-85", {"format": FORMAT_WEBP, "quality": 85}),
+    ("jpeg-90", {"format": FORMAT_JPEG, "quality": 90}),
+    ("jpeg-75", {"format": FORMAT_JPEG, "quality": 75}),
+]
+
+
+def synthetic_screenshots(size: tuple[int, int] = (1920, 1080)) -> list[tuple[str, Image.Image]]:
+    """Return deterministic UI-like sample images."""
+    rng = random.Random(1234)
+    width, height = size
+
+    dashboard = Image.new("RGB", size, (47, 49, 54))
+    draw = ImageDraw.Draw(dashboard)
+    draw.rectangle((0, 0, 240, height), fill=(32, 34, 37))
+    for row in range(0, height, 28):
+        draw.text((16, row + 6), f"Csatorna #{row // 28:03d}", fill=(220, 221, 222))
+    for panel in range(6):
+        x0 = 270 + (panel % 3) * 540
+        y0 = 40 + (panel // 3) * 500
+        draw.rectangle((x0, y0, x0 + 500, y0 + 460), fill=(54, 57, 63), outline=(32, 34, 37))
+        points = [(x0 + 20 + i * 12, y0 + 400 - rng.randint(0, 300)) for i in range(38)]
+        draw.line(points, fill=(88, 101, 242), width=2)
+        for line in range(8):
+            draw.text((x0 + 20, y0 + 20 + line * 14), f"Mérőszám {line}: {rng.random():.4f}", fill="white")
+
+    chat = Image.new("RGB", size, (54, 57, 63))
+    draw = ImageDraw.Draw(chat)
+    for row in range(0, height - 40, 22):
+        words = " ".join(rng.choice(["lorem", "ipsum", "dolor", "sit", "amet", "képernyő", "teszt"]) for _ in range(rng.randint(4, 18)))
+        draw.text((80, row + 4), words, fill=(220, 221, 222))
+    photo = Image.effect_mandelbrot((480, 270), (-2.0, -1.0, 1.0, 1.0), 100).convert("RGB")
+    chat.paste(photo, (width - 560, 120))
+
+    return [("dashboard", dashboard), ("chat", chat)]
+
+
+def _time_call(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def benchmark_image(img: Image.Image, repeat: int = 3) -> list[dict]:
+    """Benchmark every configuration in ``BENCHMARK_FORMATS`` on *img*."""
+    results = []
+    for label, output_format in BENCHMARK_FORMATS:
+        buffer = io.BytesIO()
+
+        def _encode():
+            buffer.seek(0)
+            buffer.truncate()
+            save_image(img, buffer, output_format)
+
+        try:
+            encode_seconds = _time_call(_encode, repeat)
+        except (OSError, KeyError) as exc:
+            results.append({"format": label, "error": str(exc)})
+            continue
+        data = buffer.getvalue()
+
+        def _decode():
+            Image.open(io.BytesIO(data)).load()
+
+        decode_seconds = _time_call(_decode, repeat)
+        results.append(
+            {
+                "format": label,
+                "encode_ms": encode_seconds * 1000,
+                "bytes": len(data),
+                "decode_ms": decode_seconds * 1000,
+            }
+        )
+    return results
+
+
+def print_report(name: str, img: Image.Image, results: Iterable[dict]) -> None:
+    print(f"\n{name} ({img.width}x{img.height}, {img.mode})")
+    print(f"{'formátum':<18}{'kódolás ms':>12}{'méret KiB':>12}{'dekódolás ms':>14}")
+    for row in results:
+        if "error" in row:
+            print(f"{row['format']:<18}  nem elérhető: {row['error']}")
+            continue
+        print(
+            f"{row['format']:<18}{row['encode_ms']:>12.1f}{row['bytes'] / 1024:>12.1f}{row['decode_ms']:>14.1f}"
+        )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Kimeneti formátumok kódolási költségének mérése")
+    parser.add_argument("images", nargs="*", help="Mérendő képfájlok (alapértelmezés: szintetikus minták)")
+    parser.add_argument("--capture", action="store_true", help="Az aktuális képernyő mérése is")
+    parser.add_argument("--repeat", type=int, default=3, help="Ismétlések száma formátumonként")
+    args = parser.parse_args(argv)
+
+    samples = [(path, Image.open(path).convert("RGB")) for path in args.images]
+    if args.capture:
+        from PIL import ImageGrab
+
+        samples.append(("képernyő", ImageGrab.grab()))
+    if not samples:
+        samples = synthetic_screenshots()
+
+    for name, img in samples:
+        print_report(name, img, benchmark_image(img, max(1, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
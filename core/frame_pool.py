@@ -0,0 +1,172 @@
+"""Reusable frame buffers for the capture backends.
+
+A capture used to allocate its pixels several times: the raw grab buffer,
+a Pillow image built from it, and another full copy for the client-area
+crop. At several captures per second that is hundreds of MB/s of allocator
+churn. :class:`FramePool` keeps released buffers and hands them out again:
+
+* :meth:`FramePool.acquire` returns a Pillow image of the requested mode
+  and size, reusing a released one when possible; backends decode into it
+  in place (:func:`decode_frame`),
+* :meth:`FramePool.acquire_buffer` returns a raw ``bytearray`` for grab
+  APIs that fill a caller-provided buffer (e.g. ``GetBitmapBits``).
+
+A crop is never materialised separately: :func:`decode_frame` reads the
+crop rectangle straight out of the source buffer (byte offset plus the
+source row stride), so the only copy is the one conversion into the frame
+that is stamped, hashed and encoded.
+
+Ownership: a frame passed to :func:`core.image_writer.ImageWriter.submit`
+is released by the writer once it is saved; a frame that is dropped (e.g.
+a duplicate) is released by the capture code. A released image must not
+be touched any more: its pixels and its ``info`` belong to the next
+capture. The capture functions therefore return a
+:class:`~core.screenshot_taker.CapturedFrame` (size, mode and a copy of
+``info``) instead of the image. Images not taken from the pool are
+ignored by :func:`release_frame`.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import defaultdict
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+# Ennyi felszabadított képet / puffert tartunk meg kulcsonként
+MAX_FREE_PER_KEY = 3
+# Pillow tárolási mérete képpontonként (az RGB is 4 bájton tárolódik)
+_BYTES_PER_PIXEL = {"1": 1, "L": 1, "P": 1}
+
+
+def frame_nbytes(mode: str, size: tuple[int, int]) -> int:
+    """Approximate storage of a Pillow image of *mode* and *size*."""
+    return size[0] * size[1] * _BYTES_PER_PIXEL.get(mode, 4)
+
+
+class FramePool:
+    """Free lists of Pillow images keyed by ``(mode, size)`` and of raw buffers by length."""
+
+    def __init__(self, max_free_per_key: int = MAX_FREE_PER_KEY):
+        self.max_free_per_key = max(0, int(max_free_per_key))
+        self._lock = threading.Lock()
+        self._free_images: dict[tuple, list] = defaultdict(list)
+        self._free_buffers: dict[int, list[bytearray]] = defaultdict(list)
+        self.allocations = 0
+        self.reuses = 0
+        self.allocated_bytes = 0
+
+    def acquire(self, mode: str, size: tuple[int, int]) -> "Image.Image":
+        """Return an image of *mode* and *size* with undefined pixels and an empty ``info``."""
+        key = (mode, tuple(size))
+        with self._lock:
+            free = self._free_images.get(key)
+            img = free.pop() if free else None
+            if img is not None:
+                self.reuses += 1
+            else:
+                self.allocations += 1
+                self.allocated_bytes += frame_nbytes(mode, size)
+        if img is None:
+            from PIL import Image
+
+            img = Image.new(mode, key[1])
+            img._frame_pool = self
+        img.info = {}
+        img._frame_pool_checked_out = True
+        return img
+
+    def release(self, img: Optional["Image.Image"]) -> bool:
+        """Give *img* back; ``False`` when it is not a checked-out image of this pool."""
+        if img is None or getattr(img, "_frame_pool", None) is not self:
+            return False
+        if not getattr(img, "_frame_pool_checked_out", False):
+            return False
+        img._frame_pool_checked_out = False
+        with self._lock:
+            free = self._free_images[(img.mode, img.size)]
+            if len(free) < self.max_free_per_key:
+                free.append(img)
+        return True
+
+    def acquire_buffer(self, length: int) -> bytearray:
+        """Return a ``bytearray`` of *length* bytes (contents undefined)."""
+        with self._lock:
+            free = self._free_buffers.get(length)
+            if free:
+                self.reuses += 1
+                return free.pop()
+            self.allocations += 1
+            self.allocated_bytes += length
+        return bytearray(length)
+
+    def release_buffer(self, buffer: bytearray) -> None:
+        with self._lock:
+            free = self._free_buffers[len(buffer)]
+            if len(free) < self.max_free_per_key:
+                free.append(buffer)
+
+    def stats(self) -> dict:
+        with self._lock:
+            free_bytes = sum(
+                frame_nbytes(mode, size) * len(images) for (mode, size), images in self._free_images.items()
+            ) + sum(length * len(buffers) for length, buffers in self._free_buffers.items())
+            return {
+                "allocations": self.allocations,
+                "reuses": self.reuses,
+                "allocated_bytes": self.allocated_bytes,
+                "free_bytes": free_bytes,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._free_images.clear()
+            self._free_buffers.clear()
+
+
+def is_pooled(img) -> bool:
+    return getattr(img, "_frame_pool", None) is not None
+
+
+def decode_frame(
+    data,
+    size: tuple[int, int],
+    rawmode: str,
+    stride: int,
+    offset: int = 0,
+    *,
+    mode: str = "RGB",
+    pool: Optional[FramePool] = None,
+) -> "Image.Image":
+    """Decode a *size* rectangle of *data* into a pooled image.
+
+    *data* is any buffer (``bytes``, ``bytearray``, ctypes array, memoryview);
+    the rectangle starts *offset* bytes in and its rows are *stride* bytes
+    apart, so a crop of a larger frame is read in place.
+    """
+    img = (pool or get_frame_pool()).acquire(mode, size)
+    view = memoryview(data).cast("B")
+    img.frombytes(view[offset:] if offset else view, "raw", rawmode, stride, 1)
+    return img
+
+
+_pool: Optional[FramePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_frame_pool() -> FramePool:
+    """Return the pool shared by every capture backend."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = FramePool()
+        return _pool
+
+
+def release_frame(img) -> bool:
+    """Return *img* to its pool (no-op for images not taken from a pool)."""
+    pool = getattr(img, "_frame_pool", None)
+    return pool.release(img) if pool is not None else False
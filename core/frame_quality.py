@@ -0,0 +1,159 @@
+"""Sharpness and exposure scores for picking the best frame of a burst.
+
+A webcam frame is often blurred by motion or taken while the auto exposure
+is still moving. With ``camera.burst_frames`` > 1 the photo capture reads a
+short burst (see :meth:`core.camera_session.CameraSession.grab_best`), and
+only the frame with the best score is encoded and saved:
+
+* sharpness: variance of the Laplacian of the grayscale frame,
+* exposure: closeness of the mean level to :data:`EXPOSURE_TARGET`, minus
+  the fraction of clipped (black or white) pixels.
+
+Sharpness has no absolute scale, so it is normalised by the sharpest frame
+of the burst before the weighted sum. The work is a handful of vectorised
+OpenCV calls (colour conversion, a 16-bit Laplacian, one histogram), a few
+milliseconds per 1080p frame::
+
+    python -m core.frame_quality                    # synthetic 1080p frames
+    python -m core.frame_quality photo1.png ...     # your own frames
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+
+EXPOSURE_TARGET = 118.0
+# Ennél sötétebb / világosabb képpontok levágottnak számítanak
+CLIP_LOW = 5
+CLIP_HIGH = 250
+SHARPNESS_WEIGHT = 0.7
+EXPOSURE_WEIGHT = 0.3
+
+
+@dataclass
+class FrameScore:
+    """Quality measures of one frame; ``score`` is relative to its burst."""
+
+    sharpness: float
+    brightness: float
+    clipped: float
+    exposure: float
+    score: float = 0.0
+    seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "score": round(self.score, 4),
+            "sharpness": round(self.sharpness, 2),
+            "brightness": round(self.brightness, 2),
+            "clipped": round(self.clipped, 4),
+            "exposure": round(self.exposure, 4),
+        }
+
+
+def score_frame(frame) -> FrameScore:
+    """Measure the sharpness and exposure of a BGR (or grayscale) frame."""
+    import cv2
+    import numpy as np
+
+    started = time.perf_counter()
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    # 16 bites Laplace: 8 bites bemenetnél nem csordul túl, és gyorsabb a lebegőpontosnál
+    _mean, stddev = cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_16S))
+    sharpness = float(stddev[0][0]) ** 2
+
+    hist = cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel()
+    total = float(hist.sum()) or 1.0
+    brightness = float(np.dot(hist, np.arange(256, dtype=np.float32))) / total
+    clipped = float(hist[: CLIP_LOW + 1].sum() + hist[CLIP_HIGH:].sum()) / total
+    exposure = max(0.0, 1.0 - abs(brightness - EXPOSURE_TARGET) / EXPOSURE_TARGET - clipped)
+    return FrameScore(
+        sharpness=sharpness,
+        brightness=brightness,
+        clipped=clipped,
+        exposure=exposure,
+        seconds=time.perf_counter() - started,
+    )
+
+
+def rank_scores(scores: Sequence[FrameScore]) -> int:
+    """Fill in the relative ``score`` of every frame and return the index of the best."""
+    sharpest = max((score.sharpness for score in scores), default=0.0) or 1.0
+    for score in scores:
+        score.score = SHARPNESS_WEIGHT * score.sharpness / sharpest + EXPOSURE_WEIGHT * score.exposure
+    return max(range(len(scores)), key=lambda index: scores[index].score)
+
+
+def select_best(frames: Sequence) -> tuple[int, list[FrameScore]]:
+    """Score *frames* and return the index of the best one with all scores."""
+    if not frames:
+        raise ValueError("Üres sorozatból nem választható képkocka.")
+    scores = [score_frame(frame) for frame in frames]
+    return rank_scores(scores), scores
+
+
+def _synthetic_frames(size: tuple[int, int], count: int) -> list:
+    """Frames of one scene with growing blur and an exposure ramp."""
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(1234)
+    width, height = size
+    scene = rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+    scene = cv2.resize(scene, (width, height), interpolation=cv2.INTER_NEAREST)
+    frames = []
+    for index in range(count):
+        blur = 1 + 2 * (index % 4)
+        frame = cv2.GaussianBlur(scene, (blur, blur), 0)
+        frames.append(cv2.convertScaleAbs(frame, alpha=0.6 + 0.1 * index))
+    return frames
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Képkockák élesség- és expozíciópontozásának ideje.")
+    parser.add_argument("images", nargs="*", help="képfájlok (alapból szintetikus képkockák)")
+    parser.add_argument("--size", default="1920x1080", help="a szintetikus képkockák mérete")
+    parser.add_argument("--frames", type=int, default=8, help="szintetikus képkockák száma")
+    parser.add_argument("--repeat", type=int, default=5, help="ismétlések száma")
+    args = parser.parse_args(argv)
+
+    import cv2
+
+    if args.images:
+        frames = [cv2.imread(path) for path in args.images]
+        missing = [path for path, frame in zip(args.images, frames) if frame is None]
+        if missing:
+            print(f"Nem olvasható: {', '.join(missing)}", file=sys.stderr)
+            return 1
+    else:
+        width, height = (int(value) for value in args.size.lower().split("x"))
+        frames = _synthetic_frames((width, height), max(1, args.frames))
+
+    timings = []
+    best, scores = select_best(frames)
+    for _ in range(max(1, args.repeat)):
+        for frame in frames:
+            timings.append(score_frame(frame).seconds)
+    for index, score in enumerate(scores):
+        marker = "*" if index == best else " "
+        values = score.as_dict()
+        print(
+            f"{marker} {index:>2}  pont {values['score']:.3f}  élesség {values['sharpness']:>10.1f}  "
+            f"fényerő {values['brightness']:>6.1f}  levágott {values['clipped']:.3f}"
+        )
+    height, width = frames[0].shape[:2]
+    print(
+        f"Pontozás ({width}x{height}): medián {statistics.median(timings) * 1000:.2f} ms, "
+        f"max {max(timings) * 1000:.2f} ms / képkocka"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
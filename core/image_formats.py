@@ -0,0 +1,163 @@
+"""Output format settings for saved captures.
+
+An output format is a small dict stored in the config, for example
+``{"format": "png", "compress_level": 3}`` or
+``{"format": "jpeg", "quality": 85}``. The helpers here normalise these
+dicts and translate them into Pillow ``save`` arguments and OpenCV
+``imencode`` parameters.
+
+``"storage": "tiles"`` selects the content-addressed tile store
+(:mod:`core.tile_store`) instead of plain files; the encoder settings are
+then ignored and a ``.tiles.json`` manifest is written per capture.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+FORMAT_PNG = "png"
+FORMAT_WEBP_LOSSLESS = "webp_lossless"
+FORMAT_WEBP = "webp"
+FORMAT_JPEG = "jpeg"
+
+SUPPORTED_FORMATS = (FORMAT_PNG, FORMAT_WEBP_LOSSLESS, FORMAT_WEBP, FORMAT_JPEG)
+
+STORAGE_FILES = "files"
+STORAGE_TILES = "tiles"
+
+DEFAULT_OUTPUT_FORMAT = {"format": FORMAT_PNG, "compress_level": 6, "quality": 90}
+DEFAULT_TILE_SIZE = 64
+
+_EXTENSIONS = {
+    FORMAT_PNG: ".png",
+    FORMAT_WEBP_LOSSLESS: ".webp",
+    FORMAT_WEBP: ".webp",
+    FORMAT_JPEG: ".jpg",
+}
+
+# Presets offered in the UI: (label, format dict)
+OUTPUT_FORMAT_PRESETS = [
+    ("PNG", {"format": FORMAT_PNG, "compress_level": 6}),
+    ("PNG (gyors)", {"format": FORMAT_PNG, "compress_level": 1}),
+    ("WebP veszteségmentes", {"format": FORMAT_WEBP_LOSSLESS, "quality": 50}),
+    ("WebP", {"format": FORMAT_WEBP, "quality": 85}),
+    ("JPEG", {"format": FORMAT_JPEG, "quality": 90}),
+    ("Csempetár", {"format": FORMAT_PNG, "storage": STORAGE_TILES}),
+]
+
+
+def _tile_store_module():
+    # Késleltetett import: a konfiguráció betöltéséhez nem kell a Pillow.
+    try:
+        from . import tile_store
+    except ImportError:
+        import tile_store
+    return tile_store
+
+
+def _clamp(value, low: int, high: int, default: int) -> int:
+    try:
+        return max(low, min(high, int(value)))
+    except (TypeError, ValueError):
+        return default
+
+
+def normalize_output_format(value: Optional[dict]) -> dict:
+    """Return a complete, valid output format dict for *value*.
+
+    Unknown formats fall back to PNG; missing or out-of-range numbers fall
+    back to the defaults.
+    """
+    value = value if isinstance(value, dict) else {}
+    fmt = str(value.get("format", DEFAULT_OUTPUT_FORMAT["format"])).lower()
+    if fmt == "jpg":
+        fmt = FORMAT_JPEG
+    if fmt not in SUPPORTED_FORMATS:
+        fmt = DEFAULT_OUTPUT_FORMAT["format"]
+    normalized = {
+        "format": fmt,
+        "compress_level": _clamp(
+            value.get("compress_level"), 0, 9, DEFAULT_OUTPUT_FORMAT["compress_level"]
+        ),
+        "quality": _clamp(value.get("quality"), 0, 100, DEFAULT_OUTPUT_FORMAT["quality"]),
+    }
+    if value.get("storage") == STORAGE_TILES:
+        normalized["storage"] = STORAGE_TILES
+        normalized["tile_size"] = _clamp(value.get("tile_size"), 8, 1024, DEFAULT_TILE_SIZE)
+    return normalized
+
+
+def uses_tile_store(output_format: Optional[dict]) -> bool:
+    return normalize_output_format(output_format).get("storage") == STORAGE_TILES
+
+
+def file_extension(output_format: Optional[dict]) -> str:
+    """Return the file extension (with dot) for *output_format*."""
+    fmt = normalize_output_format(output_format)
+    if fmt.get("storage") == STORAGE_TILES:
+        return _tile_store_module().MANIFEST_SUFFIX
+    return _EXTENSIONS[fmt["format"]]
+
+
+def pillow_save_args(output_format: Optional[dict]) -> tuple[str, dict]:
+    """Return the Pillow format name and ``save`` keyword arguments."""
+    fmt = normalize_output_format(output_format)
+    if fmt["format"] == FORMAT_PNG:
+        return "PNG", {"compress_level": fmt["compress_level"]}
+    if fmt["format"] == FORMAT_WEBP_LOSSLESS:
+        # For lossless WebP the quality controls the compression effort.
+        return "WEBP", {"lossless": True, "quality": fmt["quality"], "method": 4}
+    if fmt["format"] == FORMAT_WEBP:
+        return "WEBP", {"quality": fmt["quality"], "method": 4}
+    return "JPEG", {"quality": fmt["quality"]}
+
+
+def prepare_for_format(img: Image.Image, output_format: Optional[dict]) -> Image.Image:
+    """Convert *img* to a mode the target encoder accepts."""
+    fmt = normalize_output_format(output_format)["format"]
+    if fmt == FORMAT_JPEG and img.mode not in ("RGB", "L"):
+        return img.convert("RGB")
+    return img
+
+
+def save_image(img: Image.Image, target, output_format: Optional[dict]) -> Optional[dict]:
+    """Encode *img* into *target* (path or binary file) using *output_format*.
+
+    With tile storage *target* must be the manifest path and the tile store
+    statistics are returned; otherwise the result is ``None``.
+    """
+    fmt = normalize_output_format(output_format)
+    if fmt.get("storage") == STORAGE_TILES:
+        store = _tile_store_module().TileStore.for_directory(os.path.dirname(os.path.abspath(target)), fmt["tile_size"])
+        return store.store(img, target)
+    format_name, kwargs = pillow_save_args(output_format)
+    prepare_for_format(img, output_format).save(target, format=format_name, **kwargs)
+    return None
+
+
+def encode_image(img: Image.Image, output_format: Optional[dict]) -> bytes:
+    """Encode *img* in memory and return the file contents (not for tile storage)."""
+    buffer = io.BytesIO()
+    save_image(img, buffer, output_format)
+    return buffer.getvalue()
+
+
+def cv2_encode_params(output_format: Optional[dict]) -> tuple[str, list[int]]:
+    """Return the extension and ``cv2.imencode`` parameters for *output_format*."""
+    import cv2
+
+    fmt = normalize_output_format(output_format)
+    if fmt["format"] == FORMAT_PNG:
+        return ".png", [cv2.IMWRITE_PNG_COMPRESSION, fmt["compress_level"]]
+    if fmt["format"] == FORMAT_WEBP_LOSSLESS:
+        # OpenCV switches WebP to lossless mode for quality values above 100.
+        return ".webp", [cv2.IMWRITE_WEBP_QUALITY, 101]
+    if fmt["format"] == FORMAT_WEBP:
+        return ".webp", [cv2.IMWRITE_WEBP_QUALITY, max(1, fmt["quality"])]
+    return ".jpg", [cv2.IMWRITE_JPEG_QUALITY, fmt["quality"]]
@@ -0,0 +1,270 @@
+"""Bounded background pipeline that encodes and writes captured frames.
+
+Encoding a large PNG can take hundreds of milliseconds. The capture
+functions hand the grabbed frame to :class:`ImageWriter` and return right
+away; a small pool of worker threads encodes and writes the files. The queue
+is bounded, so a burst of captures blocks the producer (backpressure)
+instead of piling up frames in memory.
+
+Every submitted frame yields a :class:`CaptureResult` through its future,
+so callers learn the saved path, timings and size without scanning the
+save folder. Frames taken from the :class:`~core.frame_pool.FramePool` are
+returned to it once written (or rejected).
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+try:
+    from .capture_naming import discard_reserved_path
+    from .frame_pool import release_frame
+    from .image_formats import encode_image, save_image, uses_tile_store
+except ImportError:
+    # Ha önállóan futtatjuk teszteléshez
+    from capture_naming import discard_reserved_path
+    from frame_pool import release_frame
+    from image_formats import encode_image, save_image, uses_tile_store
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE_SIZE = 8
+DEFAULT_SUBMIT_TIMEOUT = 30.0
+DEFAULT_SHUTDOWN_TIMEOUT = 30.0
+
+_STOP = object()
+
+
+@dataclass
+class CaptureResult:
+    """Outcome of one capture, delivered through the writer future.
+
+    ``path`` is ``None`` when nothing was written: either ``error`` is set or
+    the frame was a ``duplicate``. With tile storage ``encode_seconds``
+    covers the whole tile store update and ``write_seconds`` is zero.
+    ``stages`` holds the durations measured before the writer (e.g.
+    ``queue_wait``, ``grab``, ``settle``) and ``error_type`` the class name
+    of the failure. ``quality`` holds the score of the chosen frame when a
+    webcam burst was taken (see :mod:`core.frame_quality`), ``metrics``
+    other measurements of the capture (e.g. ``skipped_capture_bytes``).
+    """
+
+    path: Optional[str] = None
+    capture_time: Optional[datetime] = None
+    encode_seconds: float = 0.0
+    write_seconds: float = 0.0
+    bytes_written: int = 0
+    saved_at: Optional[datetime] = None
+    error: Optional[str] = None
+    duplicate: bool = False
+    stages: dict = field(default_factory=dict)
+    error_type: Optional[str] = None
+    quality: dict = field(default_factory=dict)
+    metrics: dict = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.path is not None
+
+
+def completed_future(result: CaptureResult) -> Future:
+    """Return a future already resolved to *result*."""
+    future: Future = Future()
+    future.set_result(result)
+    return future
+
+
+class ImageWriter:
+    """Queue plus worker pool that saves Pillow images in the background."""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, max_queue: int = DEFAULT_QUEUE_SIZE):
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._lock = threading.Lock()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"ImageWriter-{i}", daemon=True)
+            for i in range(max(1, int(workers)))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(
+        self,
+        img: Image.Image,
+        save_path: str,
+        *,
+        output_format: Optional[dict] = None,
+        callback: Optional[Callable[[Future], None]] = None,
+        timeout: Optional[float] = DEFAULT_SUBMIT_TIMEOUT,
+        capture_time: Optional[datetime] = None,
+        stages: Optional[dict] = None,
+        metrics: Optional[dict] = None,
+    ) -> Future:
+        """Queue *img* for saving to *save_path* in *output_format*.
+
+        Blocks while the queue is full, at most *timeout* seconds. The
+        returned future resolves to a :class:`CaptureResult`; failures are
+        reported in its ``error`` field rather than as an exception.
+        *callback* is attached with ``add_done_callback`` and runs on a
+        worker thread (or immediately when the frame is rejected). *save_path* is normally a file reserved with
+        :func:`core.capture_naming.reserve_capture_path`; it is removed again
+        when the frame cannot be written. *stages* and *metrics* are copied
+        into the result.
+        """
+        stages = dict(stages or {})
+        metrics = dict(metrics or {})
+        future: Future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+
+        # A sorba tétel a zár alatt történik: a shutdown() csak utána zárhat le,
+        # így egy kép sem kerülhet a leállító jelek mögé. A teli sor a
+        # munkaszálak haladásával ürül, ők nem várnak a zárra.
+        full = (f"A mentési sor megtelt: {save_path}", "QueueFull")
+        rejection = None
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if not self._lock.acquire(timeout=-1 if timeout is None else timeout):
+            rejection = full
+        else:
+            try:
+                if self._closed:
+                    rejection = ("Az ImageWriter már le lett állítva.", "WriterClosed")
+                else:
+                    remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                    self._queue.put(
+                        (img, save_path, output_format, capture_time, stages, metrics, future), timeout=remaining
+                    )
+            except queue.Full:
+                rejection = full
+            finally:
+                self._lock.release()
+        if rejection is None:
+            return future
+
+        # Az elutasítás (és a visszahívás) már a záron kívül fut
+        if rejection is full:
+            logger.error("A mentési sor megtelt, a kép eldobva: %s", save_path)
+        discard_reserved_path(save_path)
+        release_frame(img)
+        future.set_result(
+            CaptureResult(
+                capture_time=capture_time,
+                error=rejection[0],
+                stages=stages,
+                metrics=metrics,
+                error_type=rejection[1],
+            )
+        )
+        return future
+
+    def pending(self) -> int:
+        """Return the approximate number of frames waiting to be written."""
+        return self._queue.qsize()
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = DEFAULT_SHUTDOWN_TIMEOUT) -> None:
+        """Stop accepting frames and let the workers drain the queue."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+
+        logger.info("Képmentő sor leállítása (%d függő kép)...", self.pending())
+        for _ in self._threads:
+            self._queue.put((_STOP, None, None, None, None, None, None))
+        if wait:
+            for thread in self._threads:
+                thread.join(timeout)
+                if thread.is_alive():
+                    logger.warning("A(z) %s mentőszál nem állt le időben.", thread.name)
+
+    def _worker(self) -> None:
+        while True:
+            img, save_path, output_format, capture_time, stages, metrics, future = self._queue.get()
+            try:
+                if img is _STOP:
+                    return
+                try:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    result = self._write(img, save_path, output_format, capture_time, stages, metrics)
+                finally:
+                    release_frame(img)
+                future.set_result(result)
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def _write(
+        img,
+        save_path: str,
+        output_format: Optional[dict],
+        capture_time: Optional[datetime],
+        stages: dict,
+        metrics: dict,
+    ) -> CaptureResult:
+        result = CaptureResult(capture_time=capture_time, stages=stages, metrics=metrics)
+        start = time.perf_counter()
+        try:
+            if uses_tile_store(output_format):
+                stats = save_image(img, save_path, output_format)
+                result.encode_seconds = time.perf_counter() - start
+                result.bytes_written = stats["bytes_written"]
+            else:
+                data = encode_image(img, output_format)
+                encoded = time.perf_counter()
+                with open(save_path, "wb") as f:
+                    f.write(data)
+                result.encode_seconds = encoded - start
+                result.write_seconds = time.perf_counter() - encoded
+                result.bytes_written = len(data)
+        except Exception as exc:
+            logger.error("Nem sikerült elmenteni a képernyőképet ide: %s - %s", save_path, exc)
+            discard_reserved_path(save_path)
+            result.error = str(exc) or exc.__class__.__name__
+            result.error_type = exc.__class__.__name__
+            return result
+
+        result.path = save_path
+        result.saved_at = datetime.now()
+        logger.info(
+            "Képernyőkép sikeresen elmentve: %s (%.1f KiB, kódolás %.0f ms, írás %.0f ms)",
+            save_path,
+            result.bytes_written / 1024,
+            result.encode_seconds * 1000,
+            result.write_seconds * 1000,
+        )
+        return result
+
+
+_writer: Optional[ImageWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_image_writer() -> ImageWriter:
+    """Return the shared writer, creating it on first use."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ImageWriter()
+        return _writer
+
+
+def shutdown_image_writer(wait: bool = True, timeout: Optional[float] = DEFAULT_SHUTDOWN_TIMEOUT) -> None:
+    """Drain and stop the shared writer, if it was started."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.shutdown(wait=wait, timeout=timeout)
@@ -0,0 +1,152 @@
+"""Cold import-time budget check for the core modules.
+
+Each module is imported in a fresh interpreter (the median of several runs
+is used) and compared with its budget in milliseconds. The check also fails
+when a module eagerly loads one of :data:`LAZY_MODULES`, which must only be
+imported on first use. Exits with status 1 on any violation, so it can be
+run before a release or from CI::
+
+    python -m core.import_budget
+    python -m core.import_budget --runs 9 --scale 2.0      # slower machine
+    python -m core.import_budget --budgets budgets.json    # {"core.scheduler": 400, ...}
+
+For a violation the largest entries of ``python -X importtime`` are printed
+to show where the time went.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Optional
+
+
+DEFAULT_RUNS = 5
+# Hideg import felső korlátja modulonként (ms), egy átlagos fejlesztői gépen mérve
+IMPORT_BUDGETS_MS = {
+    "core.config_manager": 150,
+    "core.scheduler": 300,
+    "core.daemon": 300,
+    "core.run_journal": 100,
+    "core.screenshot_taker": 250,
+    "core.window_index": 100,
+}
+# Ezeket csak az első használatkor szabad betölteni (a mért modul kivételével)
+LAZY_MODULES = ("pyautogui", "cv2", "PySide6", "core.screenshot_taker", "core.discord_capture")
+TOP_IMPORTTIME_ENTRIES = 8
+
+_MEASURE_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000.0, "loaded": [m for m in {lazy!r} if m in sys.modules and m != {module!r}]}}))
+"""
+
+
+def _project_root() -> str:
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import(module: str, runs: int = DEFAULT_RUNS) -> tuple[float, list[str]]:
+    """Return the median cold import time of *module* (ms) and the lazy modules it loaded."""
+    snippet = _MEASURE_SNIPPET.format(module=module, lazy=tuple(LAZY_MODULES))
+    timings = []
+    loaded: set[str] = set()
+    for _ in range(max(1, runs)):
+        completed = subprocess.run(
+            [sys.executable, "-c", snippet],
+            cwd=_project_root(),
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            message = (completed.stderr.strip().splitlines() or ["ismeretlen hiba"])[-1]
+            raise RuntimeError(f"{module} importja sikertelen: {message}")
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        timings.append(result["ms"])
+        loaded.update(result["loaded"])
+    return statistics.median(timings), sorted(loaded)
+
+
+def top_imports(module: str, count: int = TOP_IMPORTTIME_ENTRIES) -> list[tuple[float, str]]:
+    """The slowest imports (cumulative ms) below *module*, from ``-X importtime``."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=_project_root(),
+        capture_output=True,
+        text=True,
+    )
+    entries = []
+    for line in completed.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not line.startswith("import time:"):
+            continue
+        try:
+            cumulative = int(parts[1]) / 1000.0
+        except ValueError:
+            continue
+        name = parts[2].strip()
+        if name != module:
+            entries.append((cumulative, name))
+    return sorted(entries, reverse=True)[:count]
+
+
+def check_budgets(budgets: dict, runs: int = DEFAULT_RUNS, scale: float = 1.0) -> list[dict]:
+    results = []
+    for module, budget_ms in budgets.items():
+        limit_ms = float(budget_ms) * scale
+        try:
+            median_ms, loaded = measure_import(module, runs)
+        except RuntimeError as exc:
+            results.append({"module": module, "median_ms": None, "budget_ms": round(limit_ms, 1), "lazy_loaded": [], "error": str(exc), "ok": False})
+            continue
+        results.append({
+            "module": module,
+            "median_ms": round(median_ms, 1),
+            "budget_ms": round(limit_ms, 1),
+            "lazy_loaded": loaded,
+            "error": None,
+            "ok": median_ms <= limit_ms and not loaded,
+        })
+    return results
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="A core modulok hideg importidejének ellenőrzése.")
+    parser.add_argument("--budgets", help="JSON fájl {modul: ms} korlátokkal (felülírja az alapértelmezetteket)")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="mérések száma modulonként (medián)")
+    parser.add_argument("--scale", type=float, default=1.0, help="szorzó a korlátokra lassabb gépekhez")
+    parser.add_argument("--json", action="store_true", help="JSON kimenet")
+    args = parser.parse_args(argv)
+
+    budgets = dict(IMPORT_BUDGETS_MS)
+    if args.budgets:
+        with open(args.budgets, "r", encoding="utf-8") as f:
+            budgets.update(json.load(f))
+
+    results = check_budgets(budgets, runs=args.runs, scale=args.scale)
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        for result in results:
+            if result["error"]:
+                print(f"HIBA {result['module']:<28} {result['error']}")
+                continue
+            status = "OK " if result["ok"] else "HIBA"
+            line = f"{status} {result['module']:<28} {result['median_ms']:>8.1f} ms (korlát: {result['budget_ms']:.0f} ms)"
+            if result["lazy_loaded"]:
+                line += f"  idő előtt betöltve: {', '.join(result['lazy_loaded'])}"
+            print(line)
+            if not result["ok"]:
+                for cumulative, name in top_imports(result["module"]):
+                    print(f"       {cumulative:>8.1f} ms  {name}")
+    return 0 if all(result["ok"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
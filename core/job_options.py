@@ -0,0 +1,150 @@
+"""Executor and per-job run policy settings for the capture scheduler.
+
+The global ``scheduler_settings`` config key selects the executor and the
+default run policy; every schedule rule may override the policy keys::
+
+    "scheduler_settings": {
+        "executor": "thread",       # "thread" (pool) or "debug" (scheduler thread)
+        "max_workers": 4,           # thread pool size
+        "max_instances": 1,         # concurrent runs of the same job
+        "coalesce": true,           # run a backlog of missed fire times only once
+        "misfire_grace_time": 60,   # seconds a late run may still start; null = always
+        "run_store": false,         # record runs in SQLite and catch up after downtime
+        "catch_up": "skip",         # fire times missed while asleep/closed: skip, once, all
+        "catch_up_limit": 5,        # at most this many catch-up runs with "all"
+        "run_journal": true         # append every run to the JSONL journal (core/run_journal.py)
+    }
+    {"kind": "interval", "every_seconds": 5, "max_instances": 2, "coalesce": false, ...}
+    {"kind": "daily", "time": "09:00", "days": ["H"], "catch_up": "once"}
+
+A process pool is not offered: the jobs are closures over the scheduler
+and Qt objects, which cannot be pickled to another process.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+
+EXECUTOR_THREAD = "thread"
+EXECUTOR_DEBUG = "debug"
+EXECUTOR_TYPES = (EXECUTOR_THREAD, EXECUTOR_DEBUG)
+
+DEFAULT_SCHEDULER_SETTINGS = {
+    "executor": EXECUTOR_THREAD,
+    "max_workers": 4,
+    "max_instances": 1,
+    "coalesce": True,
+    "misfire_grace_time": 60,
+    "run_store": False,
+    "catch_up": "skip",
+    "catch_up_limit": 5,
+    "run_journal": True,
+}
+
+JOB_OPTION_KEYS = ("executor", "max_instances", "coalesce", "misfire_grace_time")
+
+CATCH_UP_SKIP = "skip"
+CATCH_UP_ONCE = "once"
+CATCH_UP_ALL = "all"
+CATCH_UP_POLICIES = (CATCH_UP_SKIP, CATCH_UP_ONCE, CATCH_UP_ALL)
+CATCH_UP_KEYS = ("catch_up", "catch_up_limit")
+
+
+def _positive_int(value, default: int) -> int:
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        return default
+
+
+def _grace_time(value, default: Optional[int]) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        return default
+
+
+def normalize_scheduler_settings(value: Optional[dict]) -> dict:
+    """Return a complete, valid ``scheduler_settings`` dict."""
+    value = value if isinstance(value, dict) else {}
+    defaults = DEFAULT_SCHEDULER_SETTINGS
+    executor = value.get("executor", defaults["executor"])
+    catch_up = value.get("catch_up", defaults["catch_up"])
+    return {
+        "executor": executor if executor in EXECUTOR_TYPES else defaults["executor"],
+        "max_workers": _positive_int(value.get("max_workers"), defaults["max_workers"]),
+        "max_instances": _positive_int(value.get("max_instances"), defaults["max_instances"]),
+        "coalesce": bool(value.get("coalesce", defaults["coalesce"])),
+        "misfire_grace_time": _grace_time(
+            value.get("misfire_grace_time", defaults["misfire_grace_time"]),
+            defaults["misfire_grace_time"],
+        ),
+        "run_store": bool(value.get("run_store", defaults["run_store"])),
+        "catch_up": catch_up if catch_up in CATCH_UP_POLICIES else defaults["catch_up"],
+        "catch_up_limit": _positive_int(value.get("catch_up_limit"), defaults["catch_up_limit"]),
+        "run_journal": bool(value.get("run_journal", defaults["run_journal"])),
+    }
+
+
+def _new_executor(executor_type: str, max_workers: int):
+    # Késleltetett import: a konfiguráció betöltéséhez nem kell az APScheduler.
+    if executor_type == EXECUTOR_DEBUG:
+        from apscheduler.executors.debug import DebugExecutor
+
+        return DebugExecutor()
+    from apscheduler.executors.pool import ThreadPoolExecutor
+
+    return ThreadPoolExecutor(max_workers)
+
+
+def create_executors(scheduler_settings: Optional[dict]) -> dict:
+    """Return ``{alias: executor}``: the selected type as ``"default"``, the other under its name."""
+    settings = normalize_scheduler_settings(scheduler_settings)
+    executors = {"default": _new_executor(settings["executor"], settings["max_workers"])}
+    for executor_type in EXECUTOR_TYPES:
+        if executor_type != settings["executor"]:
+            executors[executor_type] = _new_executor(executor_type, settings["max_workers"])
+    return executors
+
+
+def executor_alias(scheduler_settings: Optional[dict], executor_type: str) -> str:
+    """Map an executor type to the alias it is registered under."""
+    if executor_type == normalize_scheduler_settings(scheduler_settings)["executor"]:
+        return "default"
+    return executor_type
+
+
+def resolve_job_options(scheduler_settings: Optional[dict], schedule_item: Optional[dict] = None) -> dict:
+    """Return the ``add_job`` keyword arguments for a schedule rule.
+
+    Keys present in *schedule_item* override the global settings.
+    """
+    settings = normalize_scheduler_settings(scheduler_settings)
+    if isinstance(schedule_item, dict):
+        overrides = {key: schedule_item[key] for key in JOB_OPTION_KEYS if key in schedule_item}
+        settings = normalize_scheduler_settings({**settings, **overrides})
+    return {
+        "executor": executor_alias(scheduler_settings, settings["executor"]),
+        "max_instances": settings["max_instances"],
+        "coalesce": settings["coalesce"],
+        "misfire_grace_time": settings["misfire_grace_time"],
+    }
+
+
+def resolve_catch_up(scheduler_settings: Optional[dict], schedule_item: Optional[dict] = None) -> tuple[str, int]:
+    """Return ``(policy, limit)`` for the fire times a rule missed while not running."""
+    settings = normalize_scheduler_settings(scheduler_settings)
+    if isinstance(schedule_item, dict):
+        overrides = {key: schedule_item[key] for key in CATCH_UP_KEYS if key in schedule_item}
+        settings = normalize_scheduler_settings({**settings, **overrides})
+    return settings["catch_up"], settings["catch_up_limit"]
+
+
+def catch_up_window(policy: str, limit: int) -> int:
+    """Number of most recent missed fire times a policy may run (at least 1 is tracked)."""
+    if policy == CATCH_UP_ALL:
+        return max(1, limit)
+    return 1
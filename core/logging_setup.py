@@ -0,0 +1,44 @@
+"""Shared logging configuration of the GUI and the headless daemon."""
+
+from __future__ import annotations
+
+import logging
+import os
+import sys
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+
+try:
+    from .app_paths import logs_dir
+except ImportError:
+    # Ha önállóan futtatjuk teszteléshez
+    from app_paths import logs_dir
+
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+LOG_MAX_BYTES = 10 * 1024 * 1024
+
+
+def setup_logging(
+    log_filename: str = "fotoapp.log",
+    level: int = logging.INFO,
+    log_directory: Optional[str] = None,
+    console: bool = True,
+) -> str:
+    """Configure the root logger with a rotating file (and stdout); return the log file path."""
+    log_directory = log_directory or logs_dir()
+    os.makedirs(log_directory, exist_ok=True)
+    log_file_path = os.path.join(log_directory, log_filename)
+
+    handlers: list[logging.Handler] = [
+        RotatingFileHandler(
+            log_file_path,
+            maxBytes=LOG_MAX_BYTES,
+            backupCount=0,
+            encoding="utf-8",
+        )
+    ]
+    if console:
+        handlers.append(logging.StreamHandler(sys.stdout))
+    logging.basicConfig(level=level, format=LOG_FORMAT, handlers=handlers)
+    return log_file_path
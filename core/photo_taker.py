@@ -1,30 +1,112 @@
 # core/photo_taker.py
 
 import logging
-import os
+import time
 from datetime import datetime
 
-import cv2
+try:
+    from .camera_session import CameraError, get_camera_session
+    from .capture_naming import discard_reserved_path, reserve_capture_path
+    from .image_formats import cv2_encode_params, file_extension, save_image, uses_tile_store
+    from .image_writer import CaptureResult, completed_future
+except ImportError:
+    # Ha önállóan futtatjuk teszteléshez
+    from camera_session import CameraError, get_camera_session
+    from capture_naming import discard_reserved_path, reserve_capture_path
+    from image_formats import cv2_encode_params, file_extension, save_image, uses_tile_store
+    from image_writer import CaptureResult, completed_future
 
 
 logger = logging.getLogger(__name__)
 
 
-def take_photo(save_directory, filename_prefix="Foto"):
-    """Készít egy fényképet az alapértelmezett webkamerával."""
-    cap = cv2.VideoCapture(0)
-    success, frame = cap.read()
-    cap.release()
-    if not success:
-        logger.error("Nem sikerült képet készíteni a webkameráról.")
+def take_photo(save_directory, filename_prefix="Foto", output_format=None, session=None, on_saved=None):
+    """Készít egy fényképet a webkamerával.
+
+    A képkockát a nyitva tartott :class:`~core.camera_session.CameraSession`
+    adja (alapból a közös, alapértelmezett kamerás munkamenet), így a kamera
+    nem nyílik meg minden fotónál újra. Ha a munkamenet sorozatot kér
+    (``burst_frames`` > 1), csak a legélesebb, legjobban exponált képkockát
+    kódoljuk és mentjük; a pontszáma az eredmény ``quality`` mezőjébe kerül.
+    Az ``output_format`` a
+    :mod:`core.image_formats` szerinti formátum (alapértelmezetten PNG). Az
+    ``on_saved`` egy kész future-ben megkapja a mentés
+    :class:`~core.image_writer.CaptureResult` eredményét.
+    """
+    # Az OpenCV betöltése lassú, csak az első fényképnél töltjük be.
+    import cv2
+
+    session = session or get_camera_session()
+    try:
+        frame, quality = session.grab_best()
+    except CameraError as exc:
+        logger.error("Nem sikerült képet készíteni a webkameráról: %s", exc)
+        _notify_saved(on_saved, CaptureResult(error=str(exc), stages=dict(session.last_stages), error_type="CameraError"))
+        return None
+
+    capture_time = datetime.now()
+    result = CaptureResult(capture_time=capture_time, stages=dict(session.last_stages), quality=quality or {})
+    if quality:
+        logger.info(
+            "Fotó: %d képkockából a(z) %d. választva (pontszám %.3f, élesség %.1f, fényerő %.1f).",
+            quality["burst_frames"],
+            quality["frame_index"] + 1,
+            quality["score"],
+            quality["sharpness"],
+            quality["brightness"],
+        )
+    if uses_tile_store(output_format):
+        from PIL import Image
+
+        extension = file_extension(output_format)
+    else:
+        extension, params = cv2_encode_params(output_format)
+    try:
+        save_path = reserve_capture_path(save_directory, filename_prefix, extension, capture_time)
+    except OSError as exc:
+        logger.error("Nem sikerült fájlnevet foglalni a fotónak (%s): %s", save_directory, exc)
+        result.error = str(exc)
+        result.error_type = exc.__class__.__name__
+        _notify_saved(on_saved, result)
         return None
 
-    os.makedirs(save_directory, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y_%m_%d_%H-%M")
-    filename = f"{filename_prefix}_{timestamp}.png"
-    save_path = os.path.join(save_directory, filename)
-    if cv2.imwrite(save_path, frame):
-        logger.info("Fotó elmentve: %s", save_path)
-        return save_path
-    logger.error("Nem sikerült elmenteni a fotót ide: %s", save_path)
-    return None
+    start = time.perf_counter()
+    try:
+        if uses_tile_store(output_format):
+            stats = save_image(Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)), save_path, output_format)
+            result.encode_seconds = time.perf_counter() - start
+            result.bytes_written = stats["bytes_written"]
+        else:
+            encoded_ok, buffer = cv2.imencode(extension, frame, params)
+            if not encoded_ok:
+                raise OSError(f"Az OpenCV nem tudta kódolni a képet ({extension}).")
+            encoded = time.perf_counter()
+            data = buffer.tobytes()
+            with open(save_path, "wb") as f:
+                f.write(data)
+            result.encode_seconds = encoded - start
+            result.write_seconds = time.perf_counter() - encoded
+            result.bytes_written = len(data)
+    except (OSError, cv2.error) as exc:
+        logger.error("Hiba a fotó kódolása vagy írása közben: %s", exc)
+        discard_reserved_path(save_path)
+        logger.error("Nem sikerült elmenteni a fotót ide: %s", save_path)
+        result.error = str(exc) or exc.__class__.__name__
+        result.error_type = exc.__class__.__name__
+        _notify_saved(on_saved, result)
+        return None
+
+    result.path = save_path
+    result.saved_at = datetime.now()
+    logger.info("Fotó elmentve: %s", save_path)
+    _notify_saved(on_saved, result)
+    return save_path
+
+
+def _notify_saved(on_saved, result):
+    if on_saved is None:
+        return
+    try:
+        on_saved(completed_future(result))
+    except Exception:
+        logger.exception("Hiba a fotó mentési visszahívásában.")
@@ -0,0 +1,277 @@
+"""Append-only journal of scheduled captures with latency statistics.
+
+Every scheduled run appends one JSON line to ``fotoapp_journal.jsonl``
+(next to the config; rotated like a log file into ``.1`` ... ``.N``)::
+
+    {"job_id": "capture_job_...", "schedule": "Kép: 08:30 (mon)", "kind": "discord",
+     "scheduled_at": "2024-01-29T08:30:00+01:00", "started_at": "...", "finished_at": "...",
+     "start_lag": 0.004, "duration": 11.8, "catch_up": false,
+     "stages": {"queue_wait": 0.0, "grab": 0.05, "settle": 10.0, "encode": 0.31, "write": 0.01},
+     "outcome": "ok", "path": "...", "bytes": 812345, "error": null}
+
+Webcam photos taken from a burst also carry the score of the chosen frame
+(``"quality": {"score": 0.93, "sharpness": 412.5, ..., "frame_index": 2}``),
+and captures may add other measurements under ``"metrics"`` (e.g. the
+``skipped_capture_bytes`` of the focus-only Discord activation).
+``start_lag`` is the delay between the scheduled fire time and the job
+actually starting, ``duration`` the time from the start until the file was
+written. :func:`latency_report` computes p50/p95/p99 of both per schedule
+(optionally per weekday) over a time range; the same report is available
+from the command line::
+
+    python -m core.run_journal --days 28 --by-weekday
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, Optional
+
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_FILENAME = "fotoapp_journal.jsonl"
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+PERCENTILES = (50, 95, 99)
+
+OUTCOME_OK = "ok"
+OUTCOME_DUPLICATE = "duplicate"
+OUTCOME_ERROR = "error"
+OUTCOME_NO_IMAGE = "no_image"
+
+WEEKDAY_NAMES = ("H", "K", "Sze", "Cs", "P", "Szo", "V")
+
+
+class RunJournal:
+    """Thread-safe appender for the rotated JSONL journal."""
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES, backup_count: int = DEFAULT_BACKUP_COUNT):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = max(1, backup_count)
+        self._lock = threading.Lock()
+
+    def append(self, entry: dict) -> None:
+        line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+        data = line.encode("utf-8")
+        with self._lock:
+            try:
+                if os.path.exists(self.path) and os.path.getsize(self.path) + len(data) > self.max_bytes:
+                    self._rotate()
+                with open(self.path, "ab") as f:
+                    f.write(data)
+            except OSError:
+                logger.exception("Nem sikerült a futásnaplóba írni: %s", self.path)
+
+    def _rotate(self) -> None:
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def files(self) -> list[str]:
+        """Journal files from the oldest to the newest."""
+        rotated = [f"{self.path}.{index}" for index in range(self.backup_count, 0, -1)]
+        return [path for path in rotated + [self.path] if os.path.exists(path)]
+
+    def entries(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Iterator[dict]:
+        """Yield the entries whose scheduled time falls into ``[since, until)``."""
+        for path in self.files():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                            scheduled = datetime.fromisoformat(entry["scheduled_at"])
+                        except (ValueError, KeyError, TypeError):
+                            continue
+                        if since is not None and _compare_key(scheduled) < _compare_key(since):
+                            continue
+                        if until is not None and _compare_key(scheduled) >= _compare_key(until):
+                            continue
+                        yield entry
+            except OSError:
+                logger.warning("A futásnapló nem olvasható: %s", path)
+
+    def latency_report(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        by_weekday: bool = False,
+    ) -> dict:
+        return latency_report(self.entries(since, until), by_weekday=by_weekday)
+
+
+def _compare_key(value: datetime) -> float:
+    # Naiv időpontokat helyi időnek tekintünk, így összevethetők a zónásakkal.
+    return value.timestamp()
+
+
+def build_entry(
+    *,
+    job_id: str,
+    schedule: str,
+    kind: str,
+    scheduled_at: datetime,
+    started_at: datetime,
+    finished_at: datetime,
+    result=None,
+    error_type: Optional[str] = None,
+    catch_up: bool = False,
+) -> dict:
+    """Build a journal entry from a run and its :class:`~core.image_writer.CaptureResult`."""
+    stages = {}
+    path = None
+    size = 0
+    quality = None
+    metrics = None
+    if result is None:
+        outcome = OUTCOME_ERROR if error_type else OUTCOME_NO_IMAGE
+    else:
+        stages = dict(result.stages)
+        metrics = result.metrics or None
+        if result.duplicate:
+            outcome = OUTCOME_DUPLICATE
+        elif result.error:
+            outcome = OUTCOME_ERROR
+            error_type = result.error_type or error_type or "Error"
+        else:
+            outcome = OUTCOME_OK
+            stages["encode"] = result.encode_seconds
+            stages["write"] = result.write_seconds
+            path = result.path
+            size = result.bytes_written
+            quality = result.quality or None
+    entry = {
+        "job_id": job_id,
+        "schedule": schedule,
+        "kind": kind,
+        "scheduled_at": scheduled_at.isoformat(timespec="milliseconds"),
+        "started_at": started_at.isoformat(timespec="milliseconds"),
+        "finished_at": finished_at.isoformat(timespec="milliseconds"),
+        "start_lag": round((started_at - scheduled_at).total_seconds(), 4),
+        "duration": round((finished_at - started_at).total_seconds(), 4),
+        "catch_up": catch_up,
+        "stages": {name: round(value, 4) for name, value in stages.items()},
+        "outcome": outcome,
+        "path": path,
+        "bytes": size,
+        "error": error_type,
+    }
+    if quality:
+        entry["quality"] = dict(quality)
+    if metrics:
+        entry["metrics"] = dict(metrics)
+    return entry
+
+
+def percentile(values: list[float], pct: float) -> Optional[float]:
+    """Linearly interpolated percentile of *values* (``None`` when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    if low == high:
+        return ordered[low]
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def latency_report(entries: Iterable[dict], by_weekday: bool = False) -> dict:
+    """Aggregate entries into ``{group: stats}`` per schedule (and weekday).
+
+    Start lag ignores catch-up runs, whose lag is the downtime itself;
+    duration only counts runs that wrote a file.
+    """
+    groups: dict = defaultdict(lambda: {"runs": 0, "errors": 0, "catch_up": 0, "lag": [], "duration": []})
+    for entry in entries:
+        key = entry.get("schedule") or entry.get("job_id", "?")
+        if by_weekday:
+            weekday = datetime.fromisoformat(entry["scheduled_at"]).weekday()
+            key = f"{key} [{WEEKDAY_NAMES[weekday]}]"
+        group = groups[key]
+        group["runs"] += 1
+        if entry.get("outcome") in (OUTCOME_ERROR, OUTCOME_NO_IMAGE):
+            group["errors"] += 1
+        if entry.get("catch_up"):
+            group["catch_up"] += 1
+        elif entry.get("start_lag") is not None:
+            group["lag"].append(float(entry["start_lag"]))
+        if entry.get("outcome") == OUTCOME_OK and entry.get("duration") is not None:
+            group["duration"].append(float(entry["duration"]))
+
+    report = {}
+    for key in sorted(groups):
+        group = groups[key]
+        report[key] = {
+            "runs": group["runs"],
+            "errors": group["errors"],
+            "catch_up": group["catch_up"],
+            "start_lag": {f"p{pct}": percentile(group["lag"], pct) for pct in PERCENTILES},
+            "duration": {f"p{pct}": percentile(group["duration"], pct) for pct in PERCENTILES},
+        }
+    return report
+
+
+def format_report(report: dict) -> str:
+    def _fmt(value):
+        return "-" if value is None else f"{value:.3f}"
+
+    header = f"{'Ütemezés':<44} {'futás':>6} {'hiba':>5}   késés p50/p95/p99 (s)        időtartam p50/p95/p99 (s)"
+    lines = [header, "-" * len(header)]
+    for key, stats in report.items():
+        lag = "/".join(_fmt(stats["start_lag"][f"p{pct}"]) for pct in PERCENTILES)
+        duration = "/".join(_fmt(stats["duration"][f"p{pct}"]) for pct in PERCENTILES)
+        lines.append(f"{key[:44]:<44} {stats['runs']:>6} {stats['errors']:>5}   {lag:<28} {duration}")
+    if not report:
+        lines.append("Nincs bejegyzés a megadott időszakban.")
+    return "\n".join(lines)
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def _default_journal_path() -> str:
+    try:
+        from .config_manager import ConfigManager
+    except ImportError:
+        from config_manager import ConfigManager
+    return ConfigManager().journal_path()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Ütemezett képkészítések késésének és időtartamának statisztikája.")
+    parser.add_argument("--journal", help="a futásnapló fájl (alapból a konfiguráció mellett)")
+    parser.add_argument("--since", type=_parse_time, help="kezdete (ISO, pl. 2024-01-01 vagy 2024-01-01T08:00)")
+    parser.add_argument("--until", type=_parse_time, help="vége (ISO, kizárólagos)")
+    parser.add_argument("--days", type=float, help="az utolsó N nap (a --since helyett)")
+    parser.add_argument("--by-weekday", action="store_true", help="bontás a hét napjai szerint")
+    parser.add_argument("--json", action="store_true", help="JSON kimenet")
+    args = parser.parse_args(argv)
+
+    since = args.since
+    if args.days is not None:
+        since = datetime.now() - timedelta(days=args.days)
+    journal = RunJournal(args.journal or _default_journal_path())
+    report = journal.latency_report(since, args.until, by_weekday=args.by_weekday)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
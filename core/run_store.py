@@ -0,0 +1,221 @@
+"""SQLite record of scheduled runs, used to catch up after downtime.
+
+The scheduler keeps its jobs in memory and rebuilds them from the config at
+start, so fire times that fall into a sleep, a restart or a crash would be
+lost silently. With ``scheduler_settings.run_store`` enabled every run is
+recorded here (one row per job and scheduled time), together with when each
+job's trigger was last (re)registered and a periodic heartbeat:
+
+* On startup and on resume (a heartbeat gap) the scheduler computes the fire
+  times missed since the last handled run and applies the rule's catch-up
+  policy (see :mod:`core.job_options`).
+* A scheduled time that already has a row is never run again, so restarts
+  do not duplicate work.
+
+APScheduler's own SQLAlchemy job store is not used: the jobs are closures
+over the scheduler and Qt objects and cannot be pickled.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Optional
+
+
+logger = logging.getLogger(__name__)
+
+RUN_STORE_FILENAME = "fotoapp_runs.sqlite3"
+
+OUTCOME_RUNNING = "running"
+OUTCOME_OK = "ok"
+OUTCOME_ERROR = "error"
+OUTCOME_OVERLAP = "overlap"
+OUTCOME_MISSED = "missed"
+OUTCOME_SKIPPED = "skipped"
+
+HEARTBEAT_INTERVAL_SECONDS = 30
+# Ekkora kimaradás a szívverésben alvásra / felfüggesztésre utal
+RESUME_GAP_SECONDS = 3 * HEARTBEAT_INTERVAL_SECONDS
+RETENTION_DAYS = 30
+# Egy pótlási számításnál legfeljebb ennyi kimaradt időpontot lépünk végig
+MAX_SCANNED_FIRE_TIMES = 100_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    trigger_key TEXT NOT NULL,
+    registered_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    job_id TEXT NOT NULL,
+    scheduled_at REAL NOT NULL,
+    outcome TEXT NOT NULL,
+    catch_up INTEGER NOT NULL DEFAULT 0,
+    started_at REAL,
+    finished_at REAL,
+    detail TEXT,
+    PRIMARY KEY (job_id, scheduled_at)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class RunStore:
+    """Thread-safe wrapper around the run database.
+
+    Times are stored as POSIX timestamps; the methods take and return
+    timezone-aware datetimes or plain floats as noted.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # --- Jobs ---
+
+    def register_job(self, job_id: str, trigger_key: str, now: Optional[float] = None) -> float:
+        """Record the job's trigger; a new or changed trigger restarts its history.
+
+        Returns the registration time. Fire times before it are never caught up.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT trigger_key, registered_at FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row is not None and row[0] == trigger_key:
+                return row[1]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, trigger_key, registered_at) VALUES (?, ?, ?)",
+                (job_id, trigger_key, now),
+            )
+            return now
+
+    def forget_job(self, job_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def catch_up_since(self, job_id: str) -> Optional[float]:
+        """Return the time after which fire times of *job_id* are unhandled.
+
+        That is the later of the job's registration and its last handled
+        (run, running or deliberately skipped) scheduled time; ``None`` for
+        an unknown job.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT registered_at FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            last = self._conn.execute(
+                "SELECT MAX(scheduled_at) FROM runs WHERE job_id = ? AND outcome != ?",
+                (job_id, OUTCOME_MISSED),
+            ).fetchone()[0]
+        return max(row[0], last) if last is not None else row[0]
+
+    # --- Runs ---
+
+    def record_run(
+        self,
+        job_id: str,
+        scheduled_time: datetime,
+        outcome: str,
+        *,
+        catch_up: bool = False,
+        detail: Optional[str] = None,
+    ) -> None:
+        """Insert or overwrite the row of one scheduled run."""
+        now = time.time()
+        finished = None if outcome == OUTCOME_RUNNING else now
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO runs (job_id, scheduled_at, outcome, catch_up, started_at, finished_at, detail) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, scheduled_time.timestamp(), outcome, int(catch_up), now, finished, detail),
+            )
+
+    def finish_run(self, job_id: str, scheduled_time: datetime, outcome: str, detail: Optional[str] = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET outcome = ?, finished_at = ?, detail = ? WHERE job_id = ? AND scheduled_at = ?",
+                (outcome, time.time(), detail, job_id, scheduled_time.timestamp()),
+            )
+
+    def has_run(self, job_id: str, scheduled_time: datetime) -> bool:
+        """True when the scheduled time was already started, run or skipped."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT outcome FROM runs WHERE job_id = ? AND scheduled_at = ?",
+                (job_id, scheduled_time.timestamp()),
+            ).fetchone()
+        return row is not None and row[0] != OUTCOME_MISSED
+
+    def prune(self, older_than_days: int = RETENTION_DAYS) -> int:
+        cutoff = time.time() - older_than_days * 86400
+        with self._lock:
+            return self._conn.execute("DELETE FROM runs WHERE scheduled_at < ?", (cutoff,)).rowcount
+
+    # --- Heartbeat and shutdown state ---
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def heartbeat(self, now: Optional[float] = None) -> Optional[float]:
+        """Store the current heartbeat and return the previous one."""
+        now = time.time() if now is None else now
+        with self._lock:
+            previous = self._get_meta("heartbeat")
+            self._set_meta("heartbeat", repr(now))
+        return float(previous) if previous is not None else None
+
+    def mark_running(self) -> tuple[Optional[bool], Optional[float]]:
+        """Mark the store as in use; return (previous shutdown was clean, last heartbeat)."""
+        with self._lock:
+            state = self._get_meta("state")
+            last_heartbeat = self._get_meta("heartbeat")
+            self._set_meta("state", "running")
+        clean = None if state is None else state == "stopped"
+        return clean, float(last_heartbeat) if last_heartbeat is not None else None
+
+    def mark_stopped(self) -> None:
+        with self._lock:
+            self._set_meta("state", "stopped")
+            self._set_meta("heartbeat", repr(time.time()))
+
+
+def missed_fire_times(trigger, since: datetime, until: datetime, keep: int) -> tuple[list[datetime], int]:
+    """Return the last *keep* fire times in ``(since, until)`` and their total count.
+
+    At most :data:`MAX_SCANNED_FIRE_TIMES` fire times are enumerated; the
+    count is capped accordingly.
+    """
+    recent: deque[datetime] = deque(maxlen=max(1, keep))
+    total = 0
+    first = since + timedelta(microseconds=1)
+    fire_time = trigger.get_next_fire_time(since, first)
+    while fire_time is not None and fire_time < until and total < MAX_SCANNED_FIRE_TIMES:
+        if fire_time > since:
+            recent.append(fire_time)
+            total += 1
+        fire_time = trigger.get_next_fire_time(fire_time, fire_time + timedelta(microseconds=1))
+    return list(recent), total
@@ -1,48 +1,517 @@
 # core/scheduler.py
 
+import json
 import logging
+import sqlite3
+import threading
+import time
+from collections import Counter
 from datetime import datetime, timedelta
 from pathlib import Path
 
 # APScheduler importok
+from apscheduler.events import (
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_MAX_INSTANCES,
+    EVENT_JOB_MISSED,
+    EVENT_JOB_SUBMITTED,
+)
 from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
 from apscheduler.jobstores.base import JobLookupError
 
 # Saját modulok importálása
 # Figyelem a relatív importra, ha csomagként használjuk
 try:
-    from .screenshot_taker import take_screenshot, take_discord_screenshot
+    from .camera_session import close_all_sessions as close_camera_sessions, get_camera_session
+    from .capture_arbiter import DEFAULT_FOREGROUND_TIMEOUT
+    from .capture_backends import configure_capture_backend, get_backend_selector
+    from .capture_naming import day_pattern, parse_capture_time
+    from .config_manager import ConfigManager
+    from .duplicate_filter import DuplicateFilter
+    from .job_options import (
+        CATCH_UP_SKIP,
+        catch_up_window,
+        create_executors,
+        normalize_scheduler_settings,
+        resolve_catch_up,
+        resolve_job_options,
+    )
+    from .run_journal import RunJournal, build_entry
+    from .run_store import (
+        HEARTBEAT_INTERVAL_SECONDS,
+        OUTCOME_ERROR,
+        OUTCOME_MISSED,
+        OUTCOME_OK,
+        OUTCOME_OVERLAP,
+        OUTCOME_RUNNING,
+        OUTCOME_SKIPPED,
+        RESUME_GAP_SECONDS,
+        RunStore,
+        missed_fire_times,
+    )
+    from .triggers import DAY_MAP, build_trigger
     # ConfigManager itt technikailag nem kell, azt a MainWindow példányosítja
     # és a beállításokat átadja a schedulernek, vagy a scheduler kap egy referenciát rá.
     # Egyszerűbb, ha a MainWindow tölti be a configot és adja át az adatokat.
     # De a rugalmasság kedvéért kaphat egy config_load_func-ot.
 except ImportError:
     # Ha önállóan futtatjuk teszteléshez
-    from screenshot_taker import take_screenshot, take_discord_screenshot
-
-# PySide6 importok a QRect-hez és a főszálon történő híváshoz
-from PySide6.QtCore import QCoreApplication, QRect, QTimer
+    from camera_session import close_all_sessions as close_camera_sessions, get_camera_session
+    from capture_arbiter import DEFAULT_FOREGROUND_TIMEOUT
+    from capture_backends import configure_capture_backend, get_backend_selector
+    from capture_naming import day_pattern, parse_capture_time
+    from config_manager import ConfigManager
+    from duplicate_filter import DuplicateFilter
+    from job_options import (
+        CATCH_UP_SKIP,
+        catch_up_window,
+        create_executors,
+        normalize_scheduler_settings,
+        resolve_catch_up,
+        resolve_job_options,
+    )
+    from run_journal import RunJournal, build_entry
+    from run_store import (
+        HEARTBEAT_INTERVAL_SECONDS,
+        OUTCOME_ERROR,
+        OUTCOME_MISSED,
+        OUTCOME_OK,
+        OUTCOME_OVERLAP,
+        OUTCOME_RUNNING,
+        OUTCOME_SKIPPED,
+        RESUME_GAP_SECONDS,
+        RunStore,
+        missed_fire_times,
+    )
+    from triggers import DAY_MAP, build_trigger
 
 logger = logging.getLogger(__name__)
 
+# Ennyivel tovább várhat egy Discord feladat a befejezésre a beállított késleltetésen túl
+DISCORD_JOB_TIMEOUT_MARGIN = 30.0
+# Összevont futások számolásakor legfeljebb ennyi kimaradt időpontot lépünk végig
+MAX_COUNTED_FIRE_TIMES = 10000
+# Belső feladatok a futásnaplóhoz (nem képkészítő feladatok)
+HEARTBEAT_JOB_ID = "run_store_heartbeat"
+CATCH_UP_CHECK_JOB_ID = "run_store_catch_up"
+CATCH_UP_JOB_PREFIX = "catch_up_"
+# Ébredés után ennyit várunk a pótlással, hogy az APScheduler előbb
+# feldolgozza a saját (türelmi időn belüli) késő futásait
+RESUME_CATCH_UP_DELAY = 5.0
+
+
+def _screenshot_taker():
+    """Import :mod:`core.screenshot_taker` on the first capture.
+
+    It pulls in Pillow's grabbers, ``pyautogui`` and the win32 modules,
+    which are not needed to start the scheduler.
+    """
+    try:
+        from . import screenshot_taker
+    except ImportError:
+        # Ha önállóan futtatjuk teszteléshez
+        import screenshot_taker
+    return screenshot_taker
+
+
+def _photo_taker():
+    """Import :mod:`core.photo_taker` (and with it OpenCV) on the first photo."""
+    try:
+        from . import photo_taker
+    except ImportError:
+        # Ha önállóan futtatjuk teszteléshez
+        import photo_taker
+    return photo_taker
+
+
+def _discord_capture():
+    """Import :mod:`core.discord_capture` on the first Discord capture."""
+    try:
+        from . import discord_capture
+    except ImportError:
+        # Ha önállóan futtatjuk teszteléshez
+        import discord_capture
+    return discord_capture
+
+
 class Scheduler:
     """Kezeli a képernyőképek időzített készítését."""
 
     # Napok magyar rövidítésének megfeleltetése az APScheduler CronTrigger formátumához (angol 3 betűs)
-    DAY_MAP = {
-        "H": "mon", "K": "tue", "Sze": "wed", "Cs": "thu",
-        "P": "fri", "Szo": "sat", "V": "sun"
-    }
+    DAY_MAP = DAY_MAP
+
+    def __init__(self, run_store_path=None, journal_path=None, call_later=None):
+        """Inicializálja az ütemezőt.
 
-    def __init__(self):
-        """Inicializálja az ütemezőt."""
+        Args:
+            call_later (callable, optional): ``call_later(késleltetés_mp, függvény)``
+                egy eseményciklus szálára (GUI: Qt főszál, démon:
+                :class:`core.dispatcher.ThreadDispatcher`). Ezen fut a nem
+                blokkoló Discord képkészítés; ha nincs megadva, a Discord
+                képkészítés blokkolva, a végrehajtó szálán fut.
+            run_store_path (str, optional): A futásnapló (SQLite) fájl helye; a
+                ``scheduler_settings.run_store`` kapcsolóval együtt engedélyezi
+                az elmaradt futások pótlását.
+            journal_path (str, optional): A futási előzmények (JSONL) helye; a
+                ``scheduler_settings.run_journal`` kapcsolja be.
+        """
         # BackgroundScheduler: külön szálon fut, nem blokkolja a fő szálat
         # daemon=True: a szál automatikusan leáll, ha a fő program kilép
         self.scheduler = BackgroundScheduler(daemon=True, timezone='Europe/Budapest')
         self.current_settings = None # Itt tároljuk az aktuális beállításokat
+        # A duplikátumszűrő feladatonként megjegyzi az utolsó mentett kép lenyomatát
+        self.duplicate_filter = DuplicateFilter()
+        # Feladat ID -> (trigger kulcs, művelet kulcs) az utolsó ütemezéskor;
+        # ez alapján dönti el a reload_jobs, mit kell ténylegesen módosítani.
+        self._job_keys = {}
+        # Végrehajtó beállítások (típus, szálszám) és a regisztrált végrehajtók
+        self._executor_config = None
+        self._executors = {}
+        # Futási statisztika feladatonként: elindított, összevont, átfedés miatt
+        # kihagyott és türelmi időn túl elmaradt futások száma
+        self._run_stats = {}
+        self._last_run_times = {}
+        self._stats_lock = threading.Lock()
+        # Futásnapló és feladatonkénti pótlási szabály (skip / once / all, limit)
+        self._run_store_path = run_store_path
+        self._run_store = None
+        self._catch_up_policies = {}
+        # Futási előzmények (késés, időtartam, eredmény) és a pótló futás
+        # tervezett időpontja az aktuális szálon
+        self._journal_path = journal_path
+        self._journal = None
+        self._run_context = threading.local()
+        self._call_later = call_later
+        self.scheduler.add_listener(
+            self._on_job_event,
+            EVENT_JOB_SUBMITTED | EVENT_JOB_MAX_INSTANCES | EVENT_JOB_MISSED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR,
+        )
         logger.info("Scheduler inicializálva (Timezone: Europe/Budapest).")
 
+    def _apply_executor_settings(self, scheduler_settings):
+        """Lecseréli a végrehajtókat, ha a típusuk vagy a szálszámuk megváltozott.
+
+        A régi szálkészlet a már futó feladatokat még befejezi, de újat nem kap.
+        """
+        settings = normalize_scheduler_settings(scheduler_settings)
+        config = (settings["executor"], settings["max_workers"])
+        if config == self._executor_config:
+            return
+        for alias, executor in create_executors(settings).items():
+            old_executor = self._executors.get(alias)
+            if old_executor is not None:
+                self.scheduler.remove_executor(alias, shutdown=False)
+                if self.scheduler.running:
+                    old_executor.shutdown(wait=False)
+            self.scheduler.add_executor(executor, alias)
+            self._executors[alias] = executor
+        self._executor_config = config
+        logger.info("Végrehajtó beállítva: %s, %d szál.", settings["executor"], settings["max_workers"])
+
+    def _count_skipped_fire_times(self, trigger, previous_run_time, next_run_time):
+        """Megszámolja a két futás közé eső, összevonás miatt kimaradt időpontokat."""
+        skipped = 0
+        fire_time = trigger.get_next_fire_time(previous_run_time, previous_run_time)
+        while fire_time is not None and fire_time < next_run_time and skipped < MAX_COUNTED_FIRE_TIMES:
+            skipped += 1
+            fire_time = trigger.get_next_fire_time(fire_time, fire_time)
+        return skipped
+
+    def _on_job_event(self, event):
+        """APScheduler eseményfigyelő: számolja az összevont és kihagyott futásokat."""
+        try:
+            job_id = event.job_id
+            if self._run_store is not None and job_id in self._job_keys:
+                self._record_run_event(event)
+            if event.code in (EVENT_JOB_EXECUTED, EVENT_JOB_ERROR):
+                return
+            coalesced = 0
+            if event.code in (EVENT_JOB_SUBMITTED, EVENT_JOB_MAX_INSTANCES):
+                run_times = event.scheduled_run_times
+                job = self.scheduler.get_job(job_id)
+                with self._stats_lock:
+                    previous = self._last_run_times.get(job_id)
+                    self._last_run_times[job_id] = run_times[-1]
+                if previous is not None and job is not None and job.coalesce and run_times:
+                    coalesced = self._count_skipped_fire_times(job.trigger, previous, run_times[0])
+
+            with self._stats_lock:
+                stats = self._run_stats.setdefault(job_id, Counter())
+                if event.code == EVENT_JOB_SUBMITTED:
+                    stats["submitted"] += 1
+                elif event.code == EVENT_JOB_MAX_INSTANCES:
+                    stats["skipped_overlap"] += 1
+                elif event.code == EVENT_JOB_MISSED:
+                    stats["missed"] += 1
+                stats["coalesced"] += coalesced
+                snapshot = dict(stats)
+
+            if coalesced:
+                logger.warning(
+                    "%d elmaradt futás összevonva (ID: %s). Összesen: %s",
+                    coalesced,
+                    job_id,
+                    snapshot,
+                )
+            if event.code == EVENT_JOB_MAX_INSTANCES:
+                logger.warning(
+                    "Futás kihagyva, mert az előző példány még fut (ID: %s). Összesen: %s",
+                    job_id,
+                    snapshot,
+                )
+            elif event.code == EVENT_JOB_MISSED:
+                logger.warning(
+                    "Futás elmaradt, a türelmi idő lejárt (ID: %s, tervezett: %s). Összesen: %s",
+                    job_id,
+                    event.scheduled_run_time,
+                    snapshot,
+                )
+        except Exception:
+            logger.exception("Hiba az ütemezési esemény feldolgozása közben.")
+
+    def _record_run_event(self, event):
+        """Rögzíti a futás állapotát a futásnaplóban."""
+        store = self._run_store
+        try:
+            if event.code == EVENT_JOB_SUBMITTED:
+                for run_time in event.scheduled_run_times:
+                    store.record_run(event.job_id, run_time, OUTCOME_RUNNING)
+            elif event.code == EVENT_JOB_MAX_INSTANCES:
+                for run_time in event.scheduled_run_times:
+                    store.record_run(event.job_id, run_time, OUTCOME_OVERLAP)
+            elif event.code == EVENT_JOB_MISSED:
+                store.record_run(event.job_id, event.scheduled_run_time, OUTCOME_MISSED)
+            elif event.code == EVENT_JOB_EXECUTED:
+                store.finish_run(event.job_id, event.scheduled_run_time, OUTCOME_OK)
+            elif event.code == EVENT_JOB_ERROR:
+                store.finish_run(event.job_id, event.scheduled_run_time, OUTCOME_ERROR, repr(event.exception))
+        except sqlite3.Error:
+            logger.exception("Nem sikerült a futást rögzíteni a futásnaplóban (ID: %s).", event.job_id)
+
+    def _configure_run_store(self, scheduler_settings):
+        """Megnyitja vagy lezárja a futásnaplót a beállítás szerint."""
+        enabled = bool(scheduler_settings.get("run_store")) and bool(self._run_store_path)
+        if enabled and self._run_store is None:
+            try:
+                self._run_store = RunStore(self._run_store_path)
+                pruned = self._run_store.prune()
+            except (sqlite3.Error, OSError):
+                logger.exception("A futásnapló nem nyitható meg: %s", self._run_store_path)
+                self._run_store = None
+                return
+            logger.info("Futásnapló megnyitva: %s (%d régi bejegyzés törölve).", self._run_store_path, pruned)
+            if self.scheduler.running:
+                self._start_run_store_session()
+        elif not enabled and self._run_store is not None:
+            for internal_job_id in (HEARTBEAT_JOB_ID, CATCH_UP_CHECK_JOB_ID):
+                try:
+                    self.scheduler.remove_job(internal_job_id)
+                except JobLookupError:
+                    pass
+            self._close_run_store()
+            logger.info("Futásnapló kikapcsolva.")
+
+    def _close_run_store(self):
+        store, self._run_store = self._run_store, None
+        if store is None:
+            return
+        try:
+            store.mark_stopped()
+            store.close()
+        except sqlite3.Error:
+            logger.exception("Hiba a futásnapló lezárásakor.")
+
+    def _start_run_store_session(self):
+        """Indításkor: jelzi az előző leállás módját, elindítja az életjelet és pótol."""
+        store = self._run_store
+        clean, last_heartbeat = store.mark_running()
+        if clean is False:
+            logger.warning(
+                "Az előző futás nem állt le szabályosan (utolsó életjel: %s).",
+                datetime.fromtimestamp(last_heartbeat).isoformat(timespec="seconds") if last_heartbeat else "ismeretlen",
+            )
+        store.heartbeat()
+        self.scheduler.add_job(
+            self._run_store_heartbeat,
+            "interval",
+            seconds=HEARTBEAT_INTERVAL_SECONDS,
+            id=HEARTBEAT_JOB_ID,
+            name="Futásnapló életjel",
+            replace_existing=True,
+            coalesce=True,
+            misfire_grace_time=None,
+        )
+        self._catch_up_missed_runs("indulás")
+
+    def _run_store_heartbeat(self):
+        """Életjel; a szokásosnál nagyobb kimaradás alvásra utal, ekkor pótol."""
+        store = self._run_store
+        if store is None:
+            return
+        now = time.time()
+        previous = store.heartbeat(now)
+        if previous is None or now - previous <= RESUME_GAP_SECONDS:
+            return
+        logger.warning("Ébredés észlelve: %.0f másodpercig nem érkezett életjel.", now - previous)
+        self.scheduler.add_job(
+            self._catch_up_missed_runs,
+            "date",
+            run_date=datetime.now(self.scheduler.timezone) + timedelta(seconds=RESUME_CATCH_UP_DELAY),
+            args=("ébredés",),
+            id=CATCH_UP_CHECK_JOB_ID,
+            name="Elmaradt futások pótlása",
+            replace_existing=True,
+            misfire_grace_time=None,
+        )
+
+    def _catch_up_missed_runs(self, reason):
+        """Kiszámolja az utolsó kezelt futás óta elmaradt időpontokat és a szabály szerint pótol."""
+        store = self._run_store
+        if store is None:
+            return
+        tz = self.scheduler.timezone
+        now = datetime.now(tz)
+        for job_id in list(self._job_keys):
+            job = self.scheduler.get_job(job_id)
+            try:
+                since = store.catch_up_since(job_id)
+            except sqlite3.Error:
+                logger.exception("A futásnapló nem olvasható (ID: %s).", job_id)
+                continue
+            if job is None or since is None:
+                continue
+            policy, limit = self._catch_up_policies.get(job_id, (CATCH_UP_SKIP, 1))
+            # A következő tervezett időponttól az APScheduler maga felel.
+            until = min(now, job.next_run_time) if job.next_run_time else now
+            since_time = datetime.fromtimestamp(since, tz)
+            recent, total = missed_fire_times(job.trigger, since_time, until, catch_up_window(policy, limit))
+            if not total:
+                continue
+            to_run = [] if policy == CATCH_UP_SKIP else [t for t in recent if not store.has_run(job_id, t)]
+            logger.warning(
+                "%s: %d elmaradt futás %s óta (ID: %s). Pótlás (%s): %d futtatva, %d kihagyva.",
+                reason.capitalize(),
+                total,
+                since_time.isoformat(timespec="seconds"),
+                job_id,
+                policy,
+                len(to_run),
+                total - len(to_run),
+            )
+            if not to_run:
+                # A legutóbbi időpontot kihagyottként rögzítjük, így legközelebb nem számoljuk újra.
+                if not store.has_run(job_id, recent[-1]):
+                    store.record_run(
+                        job_id, recent[-1], OUTCOME_SKIPPED, catch_up=True, detail=f"{total} elmaradt időpont"
+                    )
+                continue
+            self.scheduler.add_job(
+                self._run_catch_up,
+                args=(job_id, job.func, to_run),
+                id=f"{CATCH_UP_JOB_PREFIX}{job_id}",
+                name=f"Pótlás: {job.name}",
+                replace_existing=True,
+                executor=job.executor,
+                misfire_grace_time=None,
+            )
+
+    def _configure_journal(self, scheduler_settings):
+        enabled = bool(scheduler_settings.get("run_journal")) and bool(self._journal_path)
+        if enabled and self._journal is None:
+            self._journal = RunJournal(self._journal_path)
+            logger.info("Futási előzmények naplózása: %s", self._journal_path)
+        elif not enabled:
+            self._journal = None
+
+    def _scheduled_fire_time(self, job_id, now):
+        """A most induló futás tervezett időpontja.
+
+        Pótlásnál a pótolt időpont; különben a trigger legutóbbi, ``now``
+        előtti időpontja. A keresés a feladat előző beküldött időpontjától
+        indul (ezt a futás vagy az előző futás kapta), így futásonként csak
+        az azóta eltelt egy-két időpontot kell végigjárni. Az első futásnál a
+        türelmi időn belül keres.
+        """
+        override = getattr(self._run_context, "scheduled_time", None)
+        if override is not None:
+            return override
+        job = self.scheduler.get_job(job_id)
+        if job is None:
+            return now
+        with self._stats_lock:
+            anchor = self._last_run_times.get(job_id)
+        if anchor is None or anchor > now:
+            anchor = now - timedelta(seconds=job.misfire_grace_time or 3600)
+        latest = None
+        fire_time = job.trigger.get_next_fire_time(None, anchor)
+        for _ in range(MAX_COUNTED_FIRE_TIMES):
+            if fire_time is None or fire_time > now:
+                break
+            latest = fire_time
+            fire_time = job.trigger.get_next_fire_time(fire_time, fire_time)
+        return latest or now
+
+    def _begin_run(self, job_id, schedule_desc, kind):
+        """Egy futás adatai a futási előzményekhez."""
+        now = datetime.now(self.scheduler.timezone)
+        return {
+            "job_id": job_id,
+            "schedule": schedule_desc,
+            "kind": kind,
+            "scheduled_at": self._scheduled_fire_time(job_id, now),
+            "started_at": now,
+            "catch_up": getattr(self._run_context, "scheduled_time", None) is not None,
+            "error_type": None,
+        }
+
+    def _journal_run(self, run, result=None):
+        journal = self._journal
+        if journal is None or run is None:
+            return
+        try:
+            journal.append(
+                build_entry(
+                    job_id=run["job_id"],
+                    schedule=run["schedule"],
+                    kind=run["kind"],
+                    scheduled_at=run["scheduled_at"],
+                    started_at=run["started_at"],
+                    finished_at=datetime.now(self.scheduler.timezone),
+                    result=result,
+                    error_type=run["error_type"],
+                    catch_up=run["catch_up"],
+                )
+            )
+        except Exception:
+            logger.exception("Nem sikerült a futást az előzményekbe írni (ID: %s).", run.get("job_id"))
+
+    def _run_catch_up(self, job_id, job_callable, fire_times):
+        """Sorban lefuttatja az elmaradt időpontokat; a már rögzítetteket kihagyja."""
+        for fire_time in fire_times:
+            store = self._run_store
+            if store is None or job_id not in self._job_keys:
+                return
+            if store.has_run(job_id, fire_time):
+                continue
+            store.record_run(job_id, fire_time, OUTCOME_RUNNING, catch_up=True)
+            logger.info("Elmaradt futás pótlása (ID: %s, tervezett: %s).", job_id, fire_time.isoformat(timespec="seconds"))
+            self._run_context.scheduled_time = fire_time
+            try:
+                job_callable()
+            except Exception as e:
+                logger.exception("Hiba az elmaradt futás pótlásakor (ID: %s).", job_id)
+                store.finish_run(job_id, fire_time, OUTCOME_ERROR, repr(e))
+            else:
+                store.finish_run(job_id, fire_time, OUTCOME_OK)
+            finally:
+                self._run_context.scheduled_time = None
+
+    def get_run_stats(self):
+        """Visszaadja a feladatonkénti futási statisztikát (másolat)."""
+        with self._stats_lock:
+            return {job_id: dict(stats) for job_id, stats in self._run_stats.items()}
+
     def _run_discord_capture(
         self,
         save_path,
@@ -55,21 +524,52 @@ class Scheduler:
         hotkey_number,
         window_title,
         delay_after_hotkey,
+        wait_until_stable=False,
+        stable_frames=3,
+        stable_tolerance=1.5,
         completion_callback=None,
+        output_format=None,
+        duplicate_filter=None,
+        dedup_key=None,
+        timestamp_style=None,
     ):
-        """Delegate Discord capture to the Qt main thread using QTimer.
+        """Delegate Discord capture to the event loop thread via ``call_later``.
+
+        APScheduler futása külön szálon történik, ami nem rendelkezik
+        eseményciklussal. Ezért a konstruktorban kapott ``call_later``
+        eseményciklusába (GUI-ban a Qt főszál, a démonban a
+        :class:`core.dispatcher.ThreadDispatcher` szála) ütemezzük a
+        képkészítést.
 
-        APScheduler futása külön szálon történik, ami nem rendelkezik Qt
-        eseményciklussal. Ezért az egyidejűleg futó főszál Qt eseményciklusába
-        kell ütemeznünk a képkészítő függvény hívását, különben nem történik
-        semmi. A ``QCoreApplication`` példányának továbbításával a
-        ``singleShot`` garantáltan a főszálon fog lefutni.
+        Ott egy :class:`DiscordCaptureJob` állapotgép fut, amely minden
+        várakozást időzítővel ütemez, így az eseményciklus nem blokkolódik.
         """
 
-        app = QCoreApplication.instance()
-        def _execute_capture():
+        def _log_settle(img):
+            if img is not None and "settle_seconds" in img.info:
+                logger.info(
+                    "Discord képkészítés: várakozás a gyorsbillentyű után %.2f másodperc (felső korlát: %.1f, stabilitásfigyelés: %s, sorban állás: %.2f mp).",
+                    img.info["settle_seconds"],
+                    delay_after_hotkey,
+                    "be" if wait_until_stable else "ki",
+                    img.info.get("queue_wait_seconds", 0.0),
+                )
+
+        def _on_saved(future):
+            if completion_callback:
+                completion_callback(future)
+
+        def _on_finished(img):
+            try:
+                _log_settle(img)
+            finally:
+                # Sikeres képkészítésnél a mentés végét az _on_saved jelzi.
+                if img is None and completion_callback:
+                    completion_callback()
+
+        def _start_job():
             try:
-                take_discord_screenshot(
+                job = _discord_capture().DiscordCaptureJob(
                     save_path,
                     filename_prefix,
                     area,
@@ -80,26 +580,104 @@ class Scheduler:
                     hotkey_number,
                     window_title,
                     delay_after_hotkey,
+                    wait_until_stable,
+                    stable_frames,
+                    stable_tolerance,
+                    call_later=self._call_later,
+                    timestamp_style=timestamp_style,
+                    on_finished=_on_finished,
+                    on_saved=_on_saved,
+                    output_format=output_format,
+                    duplicate_filter=duplicate_filter,
+                    dedup_key=dedup_key,
                 )
+                job.start()
             except Exception:
-                logger.exception("Hiba a Discord képkészítés végrehajtása közben.")
-            finally:
+                logger.exception("Hiba a Discord képkészítés indítása közben.")
                 if completion_callback:
                     completion_callback()
 
-        if app is not None:
-            QTimer.singleShot(
-                0,
-                app,
-                _execute_capture,
+        def _execute_blocking():
+            img = None
+            try:
+                img = _screenshot_taker().take_discord_screenshot(
+                    save_path,
+                    filename_prefix,
+                    area,
+                    include_timestamp,
+                    timestamp_position,
+                    stay_foreground,
+                    use_hotkey,
+                    hotkey_number,
+                    window_title,
+                    delay_after_hotkey,
+                    wait_until_stable,
+                    stable_frames,
+                    stable_tolerance,
+                    timestamp_style=timestamp_style,
+                    on_saved=_on_saved,
+                    output_format=output_format,
+                    duplicate_filter=duplicate_filter,
+                    dedup_key=dedup_key,
+                )
+            except Exception:
+                logger.exception("Hiba a Discord képkészítés végrehajtása közben.")
+            finally:
+                _on_finished(img)
+
+        if self._call_later is not None:
+            self._call_later(0.0, _start_job)
+        else:
+            # Eseményciklus nélkül (pl. tesztkörnyezetben) blokkolva, a
+            # végrehajtó szálán fut
+            _execute_blocking()
+
+    def _handle_saved(self, future, save_path, filename_prefix, start_time, job_id, tolerance_seconds=120, run=None):
+        """A háttérmentés befejezésekor fut, a mentés eredménye alapján ellenőriz.
+
+        A :class:`CaptureResult` tartalmazza az útvonalat és a rögzítés idejét,
+        így a mappát csak akkor kell átnézni, ha nem érkezett eredmény. A
+        ``run`` adataiból és az eredményből bejegyzés készül a futási előzményekbe.
+        """
+        result = None
+        if future is not None and not future.cancelled() and future.exception() is None:
+            result = future.result()
+        self._journal_run(run, result)
+        if result is None:
+            self._verify_capture_completion(save_path, filename_prefix, start_time, tolerance_seconds)
+            return
+
+        if result.duplicate:
+            logger.info("A kép duplikátum volt, új fájl nem készült (ID: %s).", job_id)
+            return
+        if result.error:
+            logger.error("A kép mentése nem sikerült (ID: %s): %s", job_id, result.error)
+            return
+
+        delay = (result.capture_time - start_time).total_seconds() if result.capture_time else 0.0
+        if delay <= tolerance_seconds:
+            logger.info(
+                "Kép időben elkészült: %s (késés: %.1f másodperc, kódolás: %.0f ms, írás: %.0f ms, méret: %.1f KiB).",
+                result.path,
+                delay,
+                result.encode_seconds * 1000,
+                result.write_seconds * 1000,
+                result.bytes_written / 1024,
             )
         else:
-            # Ha valamiért nincs Qt alkalmazás, próbáljuk meg közvetlenül
-            # meghívni (pl. tesztkörnyezetben)
-            _execute_capture()
+            logger.warning(
+                "Kép elkészült, de a késés (%.1f másodperc) meghaladja a megengedett %d másodpercet: %s",
+                delay,
+                tolerance_seconds,
+                result.path,
+            )
 
     def _verify_capture_completion(self, save_path, filename_prefix, start_time, tolerance_seconds=120):
-        """Ellenőrzi, hogy a megadott mappában létrejött-e időben a fájl."""
+        """Ellenőrzi, hogy a megadott mappában létrejött-e időben a fájl.
+
+        Tartalék ellenőrzés arra az esetre, ha a képkészítés nem adott vissza
+        mentési eredményt.
+        """
         try:
             target_dir = Path(save_path)
             if not target_dir.exists():
@@ -114,16 +692,20 @@ class Scheduler:
                 tolerance_seconds,
             )
 
-            candidate_files = sorted(
-                target_dir.glob(f"{filename_prefix}_*.png"),
-                key=lambda path: path.stat().st_mtime,
-                reverse=True,
-            )
-
-            for candidate in candidate_files:
-                file_mtime = datetime.fromtimestamp(candidate.stat().st_mtime)
-                if file_mtime >= start_time - timedelta(seconds=tolerance_seconds):
-                    delay = (file_mtime - start_time).total_seconds()
+            # A fájlnév tartalmazza a rögzítés idejét, így elég az érintett
+            # napok fájljait nézni, és nem kell minden fájlt stat-olni.
+            days = {start_time.date(), datetime.now().date()}
+            candidates = []
+            for day in sorted(days):
+                for candidate in target_dir.glob(day_pattern(filename_prefix, day)):
+                    captured_at = parse_capture_time(candidate.name)
+                    if captured_at is None:
+                        captured_at = datetime.fromtimestamp(candidate.stat().st_mtime)
+                    candidates.append((captured_at, candidate))
+
+            for file_time, candidate in sorted(candidates, reverse=True):
+                if file_time >= start_time - timedelta(seconds=tolerance_seconds):
+                    delay = (file_time - start_time).total_seconds()
                     if delay < 0:
                         logger.warning(
                             "A legfrissebb kép (%s) időbélyege a várt indítás előtt van (%.1f másodperccel).",
@@ -156,20 +738,15 @@ class Scheduler:
     def _schedule_jobs(self):
         """
         Beállítja az időzítési feladatokat az aktuálisan tárolt beállítások alapján.
-        A meglévő feladatokat először eltávolítja.
+
+        A szabályok stabil ``id`` kulcsa alapján összeveti a kívánt és a már
+        ütemezett feladatokat: csak az új, megváltozott vagy törölt feladatokhoz
+        nyúl, így a változatlanok megtartják a következő futási idejüket.
         """
         if self.current_settings is None:
             logger.warning("Nincsenek beállítások betöltve, nem lehet feladatokat ütemezni.")
             return
 
-        # Összes korábbi feladat eltávolítása
-        try:
-            self.scheduler.remove_all_jobs()
-            logger.info("Minden korábbi időzítési feladat eltávolítva.")
-        except Exception as e:
-            logger.error(f"Hiba a korábbi feladatok eltávolítása közben: {e}")
-            # Folytatjuk az újak hozzáadásával
-
         schedules = self.current_settings.get("schedules", [])
         save_path = self.current_settings.get("save_path", ".")
         capture_type = self.current_settings.get("capture_type", "screenshot")
@@ -178,49 +755,75 @@ class Scheduler:
         target_window = self.current_settings.get("target_window", "")
         include_timestamp = self.current_settings.get("include_timestamp", True)
         timestamp_position = self.current_settings.get("timestamp_position", "top-left")
+        timestamp_style = self.current_settings.get("timestamp_style")
         discord_settings = self.current_settings.get("discord_settings", {})
+        camera_settings = self.current_settings.get("camera", {})
+        dedup_settings = self.current_settings.get("dedup", {})
+        scheduler_settings = normalize_scheduler_settings(self.current_settings.get("scheduler_settings"))
+        self._configure_run_store(scheduler_settings)
+        self._configure_journal(scheduler_settings)
+        self.duplicate_filter.configure_from_settings(dedup_settings)
+        duplicate_filter = self.duplicate_filter if dedup_settings.get("enabled") else None
 
         logger.info(
             f"Feladatok ütemezése {len(schedules)} szabály alapján. Mentési hely: {save_path}, Típus: {capture_type}, Mód: {mode}"
         )
 
+        # Minden feladatra ható globális beállítások; ha ezek változnak, minden
+        # feladat művelete módosul (a trigger viszont nem).
+        global_key = json.dumps(
+            {
+                "save_path": save_path,
+                "capture_type": capture_type,
+                "mode": mode,
+                "custom_area": custom_area_dict,
+                "target_window": target_window,
+                "include_timestamp": include_timestamp,
+                "timestamp_position": timestamp_position,
+                "timestamp_style": timestamp_style,
+                "discord_settings": discord_settings,
+                "camera": camera_settings,
+                "dedup_enabled": bool(dedup_settings.get("enabled")),
+                "output_format": self.current_settings.get("output_format"),
+                "scheduler_settings": scheduler_settings,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        desired_jobs = {}
+        self._apply_executor_settings(scheduler_settings)
+
         area_arg = None
         if mode == "custom" and custom_area_dict:
             try:
-                area_arg = QRect(custom_area_dict['x'], custom_area_dict['y'],
-                                 custom_area_dict['width'], custom_area_dict['height'])
-                if not area_arg.isValid():
+                area_arg = (int(custom_area_dict['x']), int(custom_area_dict['y']),
+                            int(custom_area_dict['width']), int(custom_area_dict['height']))
+                if area_arg[2] <= 0 or area_arg[3] <= 0:
                      logger.warning(f"Érvénytelen 'custom_area' a beállításokban: {custom_area_dict}, teljes képernyő lesz használva.")
                      area_arg = None # Visszaállunk None-ra, ha érvénytelen
-            except (KeyError, TypeError) as e:
+            except (KeyError, TypeError, ValueError) as e:
                 logger.error(f"Hiba a 'custom_area' feldolgozásakor: {e}. Teljes képernyő lesz használva.")
                 area_arg = None
 
+        configure_capture_backend(self.current_settings.get("capture_backend"))
+        if schedules and capture_type in ("screenshot", "discord"):
+            self._warm_up_capture_backend(area_arg)
+
         for i, schedule_item in enumerate(schedules):
             try:
-                time_str = schedule_item.get("time")
-                days_list = schedule_item.get("days", [])
-
-                if not time_str or not days_list:
-                    logger.warning(f"Hiányos ütemezési szabály kihagyva: {schedule_item}")
+                schedule_id = schedule_item.get("id") or f"index_{i}"
+                try:
+                    trigger, trigger_key, schedule_desc = build_trigger(schedule_item, self.scheduler.timezone)
+                except ValueError as e:
+                    logger.warning(f"Érvénytelen ütemezési szabály kihagyva: {schedule_item} - {e}")
                     continue
 
-                # Idő feldolgozása
-                hour, minute = map(int, time_str.split(':'))
-
-                # Napok feldolgozása APScheduler formátumra (pl. "mon,tue,wed")
-                mapped_days = [self.DAY_MAP[day] for day in days_list if day in self.DAY_MAP]
-                if not mapped_days:
-                     logger.warning(f"Nincsenek érvényes napok az ütemezési szabályban: {schedule_item}")
-                     continue
-                days_str = ",".join(mapped_days)
-
-                # Cron trigger létrehozása
-                trigger = CronTrigger(day_of_week=days_str, hour=hour, minute=minute)
-
-                # Feladat hozzáadása az ütemezőhöz
-                job_id = f"capture_job_{i}"
+                job_id = f"capture_job_{schedule_id}"
+                if job_id in desired_jobs:
+                    logger.warning("Ismétlődő ütemezési azonosító (%s), a szabály sorszámával különböztetjük meg.", schedule_id)
+                    job_id = f"{job_id}_{i}"
                 filename_prefix = "Kép"
+                output_format = ConfigManager.resolve_output_format(self.current_settings, schedule_item)
                 if capture_type == "discord":
                     if not discord_settings.get("window_title"):
                         logger.warning("Discord ablak nincs kiválasztva, a feladat kihagyva.")
@@ -231,6 +834,9 @@ class Scheduler:
                     use_hotkey_value = discord_settings.get("use_hotkey", False)
                     hotkey_number_value = discord_settings.get("hotkey_number", 1)
                     delay_value = discord_settings.get("delay_after_hotkey", 2.0)
+                    wait_until_stable_value = discord_settings.get("wait_until_stable", False)
+                    stable_frames_value = discord_settings.get("stable_frames", 3)
+                    stable_tolerance_value = discord_settings.get("stable_tolerance", 1.5)
 
                     def discord_job(
                         _save_path=save_path,
@@ -238,25 +844,35 @@ class Scheduler:
                         _area=area_arg,
                         _include_ts=include_timestamp,
                         _ts_position=timestamp_position,
+                        _ts_style=timestamp_style,
                         _stay_foreground=stay_foreground_value,
                         _use_hotkey=use_hotkey_value,
                         _hotkey_number=hotkey_number_value,
                         _window_title=window_title_value,
                         _delay=delay_value,
+                        _wait_until_stable=wait_until_stable_value,
+                        _stable_frames=stable_frames_value,
+                        _stable_tolerance=stable_tolerance_value,
+                        _output_format=output_format,
+                        _duplicate_filter=duplicate_filter,
                         _job_id=job_id,
-                        _time_str=time_str,
-                        _days_str=days_str,
+                        _schedule_desc=schedule_desc,
                     ):
                         start_time = datetime.now()
+                        run = self._begin_run(_job_id, _schedule_desc, "discord")
                         logger.info(
-                            "Ütemezett Discord feladat indul (ID: %s, idő: %s, napok: %s).",
+                            "Ütemezett Discord feladat indul (ID: %s, ütemezés: %s).",
                             _job_id,
-                            _time_str,
-                            _days_str,
+                            _schedule_desc,
                         )
 
-                        def _on_complete():
-                            self._verify_capture_completion(_save_path, _filename_prefix, start_time)
+                        done = threading.Event()
+
+                        def _on_complete(future=None):
+                            try:
+                                self._handle_saved(future, _save_path, _filename_prefix, start_time, _job_id, run=run)
+                            finally:
+                                done.set()
 
                         try:
                             self._run_discord_capture(
@@ -270,13 +886,63 @@ class Scheduler:
                                 _hotkey_number,
                                 _window_title,
                                 _delay,
+                                _wait_until_stable,
+                                _stable_frames,
+                                _stable_tolerance,
                                 completion_callback=_on_complete,
+                                output_format=_output_format,
+                                duplicate_filter=_duplicate_filter,
+                                dedup_key=_job_id,
+                                timestamp_style=_ts_style,
                             )
-                        except Exception:
+                        except Exception as e:
                             logger.exception("A Discord feladat végrehajtása kivételt dobott (ID: %s).", _job_id)
+                            run["error_type"] = e.__class__.__name__
                             _on_complete()
 
+                        # A képkészítés a Qt főszálon fut; megvárjuk a végét, hogy a
+                        # max_instances korlát az egész folyamatra vonatkozzon. Az
+                        # előtérre várakozás is beleszámít.
+                        if not done.wait(float(_delay) + DISCORD_JOB_TIMEOUT_MARGIN + DEFAULT_FOREGROUND_TIMEOUT):
+                            logger.warning("A Discord feladat nem fejeződött be időben (ID: %s).", _job_id)
+
                     job_callable = discord_job
+                elif capture_type == "photo":
+
+                    def photo_job(
+                        _save_path=save_path,
+                        _filename_prefix=filename_prefix,
+                        _output_format=output_format,
+                        _camera_settings=camera_settings,
+                        _job_id=job_id,
+                        _schedule_desc=schedule_desc,
+                    ):
+                        start_time = datetime.now()
+                        run = self._begin_run(_job_id, _schedule_desc, "photo")
+                        logger.info(
+                            "Ütemezett fotó feladat indul (ID: %s, ütemezés: %s).",
+                            _job_id,
+                            _schedule_desc,
+                        )
+
+                        def _on_saved(future):
+                            self._handle_saved(future, _save_path, _filename_prefix, start_time, _job_id, run=run)
+
+                        try:
+                            # A kamera a feladatok között nyitva marad (lásd core/camera_session.py).
+                            _photo_taker().take_photo(
+                                _save_path,
+                                _filename_prefix,
+                                _output_format,
+                                session=get_camera_session(_camera_settings),
+                                on_saved=_on_saved,
+                            )
+                        except Exception as e:
+                            logger.exception("A fotó készítése közben kivétel történt (ID: %s).", _job_id)
+                            run["error_type"] = e.__class__.__name__
+                            self._journal_run(run)
+
+                    job_callable = photo_job
                 else:
                     target_window_value = target_window
 
@@ -286,48 +952,76 @@ class Scheduler:
                         _area=area_arg,
                         _include_ts=include_timestamp,
                         _ts_position=timestamp_position,
+                        _ts_style=timestamp_style,
                         _target_window=target_window_value,
+                        _output_format=output_format,
+                        _duplicate_filter=duplicate_filter,
                         _job_id=job_id,
-                        _time_str=time_str,
-                        _days_str=days_str,
+                        _schedule_desc=schedule_desc,
+                        _capture_type=capture_type,
                     ):
                         start_time = datetime.now()
+                        run = self._begin_run(_job_id, _schedule_desc, _capture_type)
                         logger.info(
-                            "Ütemezett képernyőkép feladat indul (ID: %s, idő: %s, napok: %s).",
+                            "Ütemezett képernyőkép feladat indul (ID: %s, ütemezés: %s).",
                             _job_id,
-                            _time_str,
-                            _days_str,
+                            _schedule_desc,
                         )
+
+                        def _on_saved(future):
+                            self._handle_saved(future, _save_path, _filename_prefix, start_time, _job_id, run=run)
+
+                        img = None
                         try:
-                            take_screenshot(
+                            img = _screenshot_taker().take_screenshot(
                                 _save_path,
                                 _filename_prefix,
                                 _area,
                                 _include_ts,
                                 _ts_position,
                                 _target_window,
+                                timestamp_style=_ts_style,
+                                on_saved=_on_saved,
+                                output_format=_output_format,
+                                duplicate_filter=_duplicate_filter,
+                                dedup_key=_job_id,
                             )
-                        except Exception:
+                        except Exception as e:
                             logger.exception("A képernyőkép készítése közben kivétel történt (ID: %s).", _job_id)
+                            run["error_type"] = e.__class__.__name__
+                        else:
+                            if img is not None and "queue_wait_seconds" in img.info:
+                                logger.info(
+                                    "Előtérre várakozás a sorban: %.2f mp (ID: %s).",
+                                    img.info["queue_wait_seconds"],
+                                    _job_id,
+                                )
                         finally:
-                            self._verify_capture_completion(_save_path, _filename_prefix, start_time)
+                            # A mentés végén az _on_saved ellenőriz. Ha nem készült kép,
+                            # a hiba már ismert: nem kell a mappát átnézni.
+                            if img is None:
+                                self._journal_run(run)
+                                if run["error_type"] is None:
+                                    logger.error("Nem készült képernyőkép (ID: %s).", _job_id)
 
                     job_callable = screenshot_job
 
-                self.scheduler.add_job(
+                action_key = (global_key, json.dumps(schedule_item, sort_keys=True, default=str))
+                self._catch_up_policies[job_id] = resolve_catch_up(scheduler_settings, schedule_item)
+                desired_jobs[job_id] = (
+                    trigger_key,
+                    action_key,
+                    trigger,
                     job_callable,
-                    trigger=trigger,
-                    id=job_id,
-                    name=f"Kép at {time_str} on {days_str}",
-                    replace_existing=True,
-                )
-                logger.info(
-                    f"Feladat hozzáadva (ID: {job_id}): Idő={time_str}, Napok={days_str}, Típus={capture_type}"
+                    f"Kép: {schedule_desc}",
+                    resolve_job_options(scheduler_settings, schedule_item),
                 )
 
             except (ValueError, KeyError, Exception) as e:
                 logger.error(f"Hiba az ütemezési szabály feldolgozása közben: {schedule_item} - Hiba: {e}")
 
+        self._apply_job_changes(desired_jobs, capture_type)
+
         # Ütemezett feladatok kiírása (opcionális)
         try:
              self.scheduler.print_jobs()
@@ -335,6 +1029,88 @@ class Scheduler:
              logger.warning(f"Nem sikerült kiírni az ütemezett feladatokat: {e}")
 
 
+    def _warm_up_capture_backend(self, area):
+        """A képkészítő backend mikro-mérését a háttérben lefuttatja a feladatok régiójára.
+
+        Így nem az első ütemezett kép fizeti meg a mérés idejét; ugyanarra a
+        régióméretre a választás megmarad (lásd core/capture_backends.py).
+        """
+        region = None if area is None else (area[0], area[1], area[0] + area[2], area[1] + area[3])
+
+        def _run():
+            try:
+                get_backend_selector().warm_up([region])
+            except Exception:
+                logger.exception("Hiba a képkészítő backend kiválasztásakor.")
+
+        threading.Thread(target=_run, name="CaptureBackendBenchmark", daemon=True).start()
+
+    def _apply_job_changes(self, desired_jobs, capture_type):
+        """Összeveti a kívánt feladatokat az ütemezettekkel, és csak a különbséget alkalmazza."""
+        added = modified = rescheduled = removed = unchanged = 0
+
+        for job_id in list(self._job_keys):
+            if job_id in desired_jobs:
+                continue
+            try:
+                self.scheduler.remove_job(job_id)
+            except JobLookupError:
+                pass
+            self._job_keys.pop(job_id, None)
+            self._catch_up_policies.pop(job_id, None)
+            if self._run_store is not None:
+                self._run_store.forget_job(job_id)
+            self.duplicate_filter.forget(job_id)
+            with self._stats_lock:
+                self._last_run_times.pop(job_id, None)
+            removed += 1
+            logger.info("Feladat eltávolítva (ID: %s).", job_id)
+
+        for job_id, (trigger_key, action_key, trigger, job_callable, name, job_options) in desired_jobs.items():
+            previous = self._job_keys.get(job_id)
+            try:
+                if previous is None or self.scheduler.get_job(job_id) is None:
+                    self.scheduler.add_job(
+                        job_callable,
+                        trigger=trigger,
+                        id=job_id,
+                        name=name,
+                        replace_existing=True,
+                        **job_options,
+                    )
+                    added += 1
+                    logger.info(f"Feladat hozzáadva (ID: {job_id}): {name}, Típus={capture_type}, Beállítások={job_options}")
+                else:
+                    previous_trigger_key, previous_action_key = previous
+                    if previous_action_key == action_key and previous_trigger_key == trigger_key:
+                        unchanged += 1
+                        continue
+                    # A művelet cseréje megtartja a következő futási időt;
+                    # csak a trigger módosítása számolja újra.
+                    self.scheduler.modify_job(job_id, func=job_callable, name=name, **job_options)
+                    if previous_trigger_key != trigger_key:
+                        self.scheduler.reschedule_job(job_id, trigger=trigger)
+                        rescheduled += 1
+                        logger.info(f"Feladat átütemezve (ID: {job_id}): {name}")
+                    else:
+                        modified += 1
+                        logger.info(f"Feladat módosítva (ID: {job_id}): {name}")
+                self._job_keys[job_id] = (trigger_key, action_key)
+                if self._run_store is not None:
+                    # Új vagy módosult trigger előtti időpontokat nem pótolunk.
+                    self._run_store.register_job(job_id, json.dumps(trigger_key, default=str))
+            except Exception as e:
+                logger.error(f"Hiba a feladat ütemezése közben (ID: {job_id}): {e}")
+
+        logger.info(
+            "Feladatok egyeztetve: %d új, %d módosított, %d átütemezett, %d törölt, %d változatlan.",
+            added,
+            modified,
+            rescheduled,
+            removed,
+            unchanged,
+        )
+
     def start(self, settings):
         """
         Elindítja az ütemezőt a megadott beállításokkal.
@@ -357,17 +1133,35 @@ class Scheduler:
             logger.info("Ütemező sikeresen elindítva.")
         except Exception as e:
             logger.error(f"Hiba az ütemező indításakor: {e}")
+            return
+
+        if self._run_store is not None:
+            try:
+                self._start_run_store_session()
+            except sqlite3.Error:
+                logger.exception("Hiba a futásnapló indításakor.")
 
 
     def stop(self):
         """Leállítja az ütemezőt."""
         if self.scheduler.running:
             logger.info("Ütemező leállítása...")
+            # A futó Discord feladatokat az őket hajtó szálon kell
+            # megszakítani: a GUI a főszálról, a démon a diszpécser szálán hív.
+            if self._call_later is not None:
+                cancelled = _discord_capture().cancel_all()
+                if cancelled:
+                    logger.info("%d folyamatban lévő Discord képkészítés megszakítva.", cancelled)
             try:
                 self.scheduler.shutdown() # Graceful shutdown
                 logger.info("Ütemező sikeresen leállítva.")
             except Exception as e:
                 logger.error(f"Hiba az ütemező leállításakor: {e}")
+            # A futó feladatok befejeződtek, a kamera és a futásnapló lezárható.
+            closed_cameras = close_camera_sessions()
+            if closed_cameras:
+                logger.info("%d nyitva tartott kamera lezárva.", closed_cameras)
+            self._close_run_store()
         else:
             logger.info("Az ütemező nem futott, nincs mit leállítani.")
 
@@ -386,24 +1180,19 @@ class Scheduler:
 
         logger.info("Időzítési feladatok újratöltése...")
         self.current_settings = settings # Frissítjük a tárolt beállításokat
-        self._schedule_jobs() # Ez eltávolítja a régieket és hozzáadja az újakat
+        self._schedule_jobs() # Csak a megváltozott feladatokat módosítja
 
 
 # --- Tesztelési rész ---
 if __name__ == "__main__":
-    import time
     import os
-    from PySide6.QtCore import QStandardPaths # Csak a teszt mentési helyhez
+    from app_paths import user_folder # Csak a teszt mentési helyhez
 
     logger.info("\n--- Scheduler Teszt ---")
 
     # Hova mentsünk a tesztben?
     try:
-        pictures_location = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.PicturesLocation)
-        if not pictures_location:
-             pictures_location = os.path.join(os.path.expanduser("~"), "fotoapp_scheduler_tests")
-        else:
-             pictures_location = os.path.join(pictures_location, "FotoApp_Scheduler_Tests")
+        pictures_location = os.path.join(user_folder("pictures"), "FotoApp_Scheduler_Tests")
         logger.info(f"Teszt mentési hely: {pictures_location}")
     except Exception as e:
         logger.error(f"Hiba a teszt mentési hely meghatározásakor: {e}")
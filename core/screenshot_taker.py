@@ -3,86 +3,296 @@ from __future__ import annotations
 import logging
 import os
 import time
+from concurrent.futures import Future
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Callable, Optional
 import ctypes
 
-from PIL import Image, ImageDraw, ImageFont, ImageGrab
+from PIL import Image, ImageChops, ImageStat
 
 import platform
-import pyautogui
+
+try:
+    from .capture_backends import grab_screen
+    from .capture_arbiter import DEFAULT_FOREGROUND_TIMEOUT, PRIORITY_SCHEDULED, get_capture_arbiter
+    from .capture_naming import reserve_capture_path
+    from .duplicate_filter import MODE_RECORD, DuplicateFilter
+    from .frame_pool import decode_frame, get_frame_pool, release_frame
+    from .image_formats import file_extension
+    from .image_writer import CaptureResult, completed_future, get_image_writer
+    from .timestamp_overlay import stamp_timestamp
+    from .window_index import get_window_index
+except ImportError:
+    # Ha önállóan futtatjuk teszteléshez
+    from capture_backends import grab_screen
+    from capture_arbiter import DEFAULT_FOREGROUND_TIMEOUT, PRIORITY_SCHEDULED, get_capture_arbiter
+    from capture_naming import reserve_capture_path
+    from duplicate_filter import MODE_RECORD, DuplicateFilter
+    from frame_pool import decode_frame, get_frame_pool, release_frame
+    from image_formats import file_extension
+    from image_writer import CaptureResult, completed_future, get_image_writer
+    from timestamp_overlay import stamp_timestamp
+    from window_index import get_window_index
 
 if platform.system() == "Windows":
     import win32con
     import win32gui
     import win32ui
     import win32process
-    import win32api
 
 PW_RENDERFULLCONTENT = 0x00000002
 
+# Discord-specific pixel used to make sure the window really has focus.
+DISCORD_PROBE_POINT = (1913, 53)
+DISCORD_PROBE_COLOR = (50, 51, 57)
+DISCORD_PROBE_TOLERANCE = 5
+
+# img.info kulcsok -> a CaptureResult.stages szakaszai (másodpercben)
+CAPTURE_STAGE_KEYS = {
+    "queue_wait_seconds": "queue_wait",
+    "activate_seconds": "activate",
+    "grab_seconds": "grab",
+    "settle_seconds": "settle",
+}
+# img.info kulcsok -> a CaptureResult.metrics nem időtartam jellegű mérőszámai
+CAPTURE_METRIC_KEYS = {
+    "skipped_capture_bytes": "skipped_capture_bytes",
+}
+
 
 logger = logging.getLogger(__name__)
 
 
-def _capture_window(
-    title: str,
-    *,
-    restore_foreground: bool = True,
-    pre_action: Optional[callable] = None,
-    executable: Optional[str] = None,
-) -> Optional[Image.Image]:
-    """Capture a window matching *title* and optionally *executable*.
+def _find_window(title: str, executable: Optional[str] = None) -> Optional[int]:
+    """Return the handle of the first visible window matching *title*.
 
     Providing ``executable`` ensures that the window belongs to the given
-    process (e.g. ``discord.exe``), which helps avoid bringing the wrong
-    window to the foreground.
+    process (e.g. ``discord.exe``). The lookup goes through the shared
+    :class:`~core.window_index.WindowIndex`, which validates the handle.
     """
-    if platform.system() != "Windows":
+    return get_window_index().find(title, executable)
+
+
+def _probe_pixel_matches() -> bool:
+    """Check whether the Discord probe pixel has the expected colour."""
+    # A pyautogui betöltése lassú, ezért csak az első használatkor töltjük be.
+    import pyautogui
+
+    try:
+        pixel_color = pyautogui.pixel(*DISCORD_PROBE_POINT)
+    except Exception:
+        return False
+    if not pixel_color:
+        return False
+    return all(
+        abs(pixel_color[i] - DISCORD_PROBE_COLOR[i]) <= DISCORD_PROBE_TOLERANCE
+        for i in range(3)
+    )
+
+
+def _normalize_region(area: Optional[object]) -> Optional[tuple[int, int, int, int]]:
+    """Convert an ``(x, y, width, height)`` tuple or a ``QRect`` into a bbox tuple.
+
+    Rect objects are recognised by their ``x()``/``width()`` methods, so Qt
+    is never imported here.
+    """
+    if area is None:
+        return None
+    try:
+        if callable(getattr(area, "width", None)):
+            return (area.x(), area.y(), area.x() + area.width(), area.y() + area.height())
+        return (
+            int(area[0]),
+            int(area[1]),
+            int(area[0]) + int(area[2]),
+            int(area[1]) + int(area[3]),
+        )
+    except Exception:
         return None
 
-    hwnd = None
 
-    def _enum(hwnd_in, lparam):
-        nonlocal hwnd
-        if not win32gui.IsWindowVisible(hwnd_in):
-            return True
+def _save_image(
+    img: Image.Image,
+    save_directory: str,
+    filename_prefix: str,
+    on_saved: Optional[Callable[[Future], None]] = None,
+    output_format: Optional[dict] = None,
+    capture_time: Optional[datetime] = None,
+    stages: Optional[dict] = None,
+    metrics: Optional[dict] = None,
+) -> Future:
+    """Queue *img* for saving into *save_directory* and return the future.
+
+    The image is encoded and written by the shared :class:`ImageWriter`; the
+    future resolves to a :class:`CaptureResult`. ``on_saved`` is called with
+    that future from a writer thread. The file name is built from
+    ``capture_time`` (default: now) and reserved right away, see
+    :mod:`core.capture_naming`.
+    """
+    if capture_time is None:
+        capture_time = datetime.now()
+    save_path = reserve_capture_path(
+        save_directory, filename_prefix, file_extension(output_format), capture_time
+    )
+    return get_image_writer().submit(
+        img,
+        save_path,
+        output_format=output_format,
+        callback=on_saved,
+        capture_time=capture_time,
+        stages=stages,
+        metrics=metrics,
+    )
 
-        window_text = win32gui.GetWindowText(hwnd_in)
-        if title.lower() not in window_text.lower():
-            return True
 
-        if executable:
-            try:
-                _, pid = win32process.GetWindowThreadProcessId(hwnd_in)
-                proc_handle = win32api.OpenProcess(
-                    win32con.PROCESS_QUERY_INFORMATION | win32con.PROCESS_VM_READ,
-                    False,
-                    pid,
+def _capture_stages(img: Image.Image) -> dict:
+    """Collect the stage durations the capture recorded in ``img.info``."""
+    return {stage: img.info[key] for key, stage in CAPTURE_STAGE_KEYS.items() if key in img.info}
+
+
+def _capture_metrics(img: Image.Image) -> dict:
+    """Collect the other measurements the capture recorded in ``img.info``."""
+    return {metric: img.info[key] for key, metric in CAPTURE_METRIC_KEYS.items() if key in img.info}
+
+
+@dataclass
+class CapturedFrame:
+    """What the capture functions return: the frame's metadata without its pixels.
+
+    The grabbed image goes back to the frame pool once it is saved or
+    dropped, after which its pixels and ``info`` belong to the next capture.
+    Callers therefore get the size, the mode and a copy of ``info``.
+    """
+
+    size: tuple[int, int]
+    mode: str
+    info: dict
+
+    @classmethod
+    def of(cls, img: Image.Image) -> "CapturedFrame":
+        return cls(img.size, img.mode, dict(img.info))
+
+
+def _finalize_capture(
+    img: Image.Image,
+    save_directory: str,
+    filename_prefix: str,
+    *,
+    add_timestamp: bool = False,
+    timestamp_position: str = "top-left",
+    timestamp_style: Optional[dict] = None,
+    capture_time: Optional[datetime] = None,
+    on_saved: Optional[Callable[[Future], None]] = None,
+    output_format: Optional[dict] = None,
+    duplicate_filter: Optional[DuplicateFilter] = None,
+    dedup_key: Optional[str] = None,
+) -> Optional[CapturedFrame]:
+    """Run the common tail of every capture: dedup, timestamp and save.
+
+    The duplicate check runs before the timestamp is drawn, otherwise every
+    frame would differ. A duplicate is not written; ``on_saved`` then
+    receives a result with ``duplicate`` set and no path. The stamped text and the
+    filename both use ``capture_time`` (default: now), so they always agree.
+    *img* is handed over (to the writer or back to the pool); the returned
+    :class:`CapturedFrame` keeps its metadata. Returns ``None`` when the
+    frame could not be queued.
+    """
+    if capture_time is None:
+        capture_time = datetime.now()
+    stages = _capture_stages(img)
+    metrics = _capture_metrics(img)
+
+    if duplicate_filter is not None:
+        check = duplicate_filter.check(dedup_key or filename_prefix, img)
+        if check.is_duplicate:
+            if duplicate_filter.mode == MODE_RECORD:
+                duplicate_filter.record(save_directory, check)
+            img.info["duplicate"] = True
+            frame = CapturedFrame.of(img)
+            release_frame(img)
+            if on_saved:
+                on_saved(completed_future(CaptureResult(capture_time=capture_time, duplicate=True, stages=stages, metrics=metrics)))
+            return frame
+
+    if add_timestamp:
+        _add_timestamp(img, timestamp_position, capture_time, timestamp_style)
+
+    # A mentőszál a kódolás után visszaadja a képet a készletbe
+    frame = CapturedFrame.of(img)
+    try:
+        _save_image(img, save_directory, filename_prefix, on_saved, output_format, capture_time, stages, metrics)
+    except OSError as exc:
+        # Fájlnév foglalása sikertelen (pl. nem írható mappa)
+        logger.error("Nem sikerült a képnek fájlt létrehozni (%s): %s", save_directory, exc)
+        release_frame(img)
+        if on_saved:
+            on_saved(
+                completed_future(
+                    CaptureResult(
+                        capture_time=capture_time,
+                        error=str(exc),
+                        stages=stages,
+                        metrics=metrics,
+                        error_type=exc.__class__.__name__,
+                    )
                 )
-                exe_path = win32process.GetModuleFileNameEx(proc_handle, 0)
-                win32api.CloseHandle(proc_handle)
-                if os.path.basename(exe_path).lower() != executable.lower():
-                    return True
-            except Exception:
-                return True
+            )
+        return frame
+    except Exception as exc:
+        logger.error("Nem sikerült a képet a mentési sorba tenni (%s): %s", save_directory, exc)
+        release_frame(img)
+        return None
+    return frame
 
-        hwnd = hwnd_in
-        return False
 
-    win32gui.EnumWindows(_enum, None)
+@dataclass
+class WindowActivation:
+    """Result of :func:`activate_window`: the focused window and what it took."""
+
+    hwnd: int
+    seconds: float
+    window_size: tuple[int, int]
+
+    @property
+    def skipped_capture_bytes(self) -> int:
+        """Size of the 32-bit window bitmap a pixel capture would have allocated."""
+        return self.window_size[0] * self.window_size[1] * 4
+
+    @classmethod
+    def measure(cls, hwnd: int, started: float) -> "WindowActivation":
+        """Activation of *hwnd* that began at ``perf_counter()`` *started*, sized from its window rect."""
+        window_rect = win32gui.GetWindowRect(hwnd)
+        size = (max(0, window_rect[2] - window_rect[0]), max(0, window_rect[3] - window_rect[1]))
+        return cls(hwnd, time.perf_counter() - started, size)
+
+
+def activate_window(
+    title: str,
+    *,
+    executable: Optional[str] = None,
+    pre_action: Optional[Callable[[], None]] = None,
+) -> Optional[WindowActivation]:
+    """Bring the window matching *title* to the foreground without capturing it.
+
+    The window is restored if minimised, focused, confirmed by clicking the
+    probe pixel, and then *pre_action* (e.g. a hotkey) runs while it has the
+    focus. Returns ``None`` when any step fails (errors are logged). The
+    foreground is not restored; that is up to the caller.
+    """
+    if platform.system() != "Windows":
+        return None
+
+    started = time.perf_counter()
+    hwnd = _find_window(title, executable)
     if not hwnd:
         return None
 
-    original_foreground_hwnd = win32gui.GetForegroundWindow()
-    
     target_thread_id, _ = win32process.GetWindowThreadProcessId(hwnd)
     current_thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
-    
+
     user32 = ctypes.windll.user32
     user32.AttachThreadInput(current_thread_id, target_thread_id, True)
-
-    img = None
     try:
         # Only restore the window if it is minimized. Calling SW_RESTORE on a
         # fullscreen/ maximized window would shrink it to windowed mode, which
@@ -105,15 +315,12 @@ def _capture_window(
 
         # Ensure the window is truly active by clicking a known pixel
         start_time = time.time()
-        expected_color = (50, 51, 57)
         clicked = False
         while time.time() - start_time < 2:
-            try:
-                pixel_color = pyautogui.pixel(1913, 53)
-            except Exception:
-                pixel_color = None
-            if pixel_color and all(abs(pixel_color[i] - expected_color[i]) <= 5 for i in range(3)):
-                pyautogui.click(1913, 53)
+            if _probe_pixel_matches():
+                import pyautogui
+
+                pyautogui.click(*DISCORD_PROBE_POINT)
                 clicked = True
                 break
             time.sleep(0.1)
@@ -128,48 +335,100 @@ def _capture_window(
             logger.error("A '%s' ablak időközben elvesztette az előtér státuszát.", title)
             return None
 
-        window_rect = win32gui.GetWindowRect(hwnd)
-        width = window_rect[2] - window_rect[0]
-        height = window_rect[3] - window_rect[1]
+        return WindowActivation.measure(hwnd, started)
+    except Exception:
+        logger.exception("Hiba a '%s' ablak előtérbe hozása közben.", title)
+        return None
+    finally:
+        user32.AttachThreadInput(current_thread_id, target_thread_id, False)
 
-        if width <= 0 or height <= 0:
-            return None
 
-        hwnd_dc = win32gui.GetWindowDC(hwnd)
-        mfc_dc = win32ui.CreateDCFromHandle(hwnd_dc)
-        save_dc = mfc_dc.CreateCompatibleDC()
-        bitmap = win32ui.CreateBitmap()
-        bitmap.CreateCompatibleBitmap(mfc_dc, width, height)
-        save_dc.SelectObject(bitmap)
-        result = user32.PrintWindow(hwnd, save_dc.GetSafeHdc(), PW_RENDERFULLCONTENT)
+def _print_window(hwnd: int) -> Optional[Image.Image]:
+    """Render *hwnd* with ``PrintWindow`` and return its client area."""
+    window_rect = win32gui.GetWindowRect(hwnd)
+    width = window_rect[2] - window_rect[0]
+    height = window_rect[3] - window_rect[1]
 
-        bmpinfo = bitmap.GetInfo()
-        bmpstr = bitmap.GetBitmapBits(True)
-        img = Image.frombuffer("RGB", (bmpinfo["bmWidth"], bmpinfo["bmHeight"]), bmpstr, "raw", "BGRX", 0, 1)
+    if width <= 0 or height <= 0:
+        return None
 
+    hwnd_dc = win32gui.GetWindowDC(hwnd)
+    mfc_dc = win32ui.CreateDCFromHandle(hwnd_dc)
+    save_dc = mfc_dc.CreateCompatibleDC()
+    bitmap = win32ui.CreateBitmap()
+    bitmap.CreateCompatibleBitmap(mfc_dc, width, height)
+    save_dc.SelectObject(bitmap)
+    pool = get_frame_pool()
+    buffer = None
+    try:
+        result = ctypes.windll.user32.PrintWindow(hwnd, save_dc.GetSafeHdc(), PW_RENDERFULLCONTENT)
+        bmpinfo = bitmap.GetInfo()
+        stride = bmpinfo["bmWidthBytes"]
+        if result == 1:
+            # A képpontok a készlet újrahasznált pufferébe kerülnek, nem új bytes objektumba
+            buffer = pool.acquire_buffer(stride * bmpinfo["bmHeight"])
+            if not _get_bitmap_bits(bitmap.GetHandle(), buffer):
+                result = 0
+    finally:
         win32gui.DeleteObject(bitmap.GetHandle())
         save_dc.DeleteDC()
         mfc_dc.DeleteDC()
         win32gui.ReleaseDC(hwnd, hwnd_dc)
 
-        if result != 1:
-            return None
+    if result != 1:
+        if buffer is not None:
+            pool.release_buffer(buffer)
+        return None
+
+    client_rect = win32gui.GetClientRect(hwnd)
+    client_left, client_top = win32gui.ClientToScreen(hwnd, (client_rect[0], client_rect[1]))
+    client_right, client_bottom = win32gui.ClientToScreen(hwnd, (client_rect[2], client_rect[3]))
+
+    crop_left = max(0, client_left - window_rect[0])
+    crop_top = max(0, client_top - window_rect[1])
+    crop_right = min(bmpinfo["bmWidth"], client_right - window_rect[0])
+    crop_bottom = min(bmpinfo["bmHeight"], client_bottom - window_rect[1])
+
+    if not (crop_left < crop_right and crop_top < crop_bottom):
+        crop_left, crop_top, crop_right, crop_bottom = 0, 0, bmpinfo["bmWidth"], bmpinfo["bmHeight"]
+
+    # A kliensterületet közvetlenül a pufferből dekódoljuk (eltolás + sorhossz), külön vágás nélkül
+    try:
+        return decode_frame(
+            buffer,
+            (crop_right - crop_left, crop_bottom - crop_top),
+            "BGRX",
+            stride,
+            crop_top * stride + crop_left * 4,
+            pool=pool,
+        )
+    finally:
+        pool.release_buffer(buffer)
+
+
+def _capture_window(
+    title: str,
+    *,
+    restore_foreground: bool = True,
+    pre_action: Optional[Callable[[], None]] = None,
+    executable: Optional[str] = None,
+) -> Optional[Image.Image]:
+    """Capture a window matching *title* and optionally *executable*.
 
-        client_rect = win32gui.GetClientRect(hwnd)
-        client_left, client_top = win32gui.ClientToScreen(hwnd, (client_rect[0], client_rect[1]))
-        client_right, client_bottom = win32gui.ClientToScreen(hwnd, (client_rect[2], client_rect[3]))
-        
-        crop_left = client_left - window_rect[0]
-        crop_top = client_top - window_rect[1]
-        crop_right = client_right - window_rect[0]
-        crop_bottom = client_bottom - window_rect[1]
-
-        crop_box = (crop_left, crop_top, crop_right, crop_bottom)
-        
-        if crop_box[0] < crop_box[2] and crop_box[1] < crop_box[3]:
-            img = img.crop(crop_box)
-        
-        return img
+    Providing ``executable`` ensures that the window belongs to the given
+    process (e.g. ``discord.exe``), which helps avoid bringing the wrong
+    window to the foreground. The window is focused with
+    :func:`activate_window` and then rendered with ``PrintWindow``.
+    """
+    if platform.system() != "Windows":
+        return None
+
+    original_foreground_hwnd = win32gui.GetForegroundWindow()
+    try:
+        activation = activate_window(title, executable=executable, pre_action=pre_action)
+        if activation is None:
+            return None
+        return _print_window(activation.hwnd)
 
     except Exception:
         logger.exception("Hiba a '%s' ablak rögzítése közben.", title)
@@ -191,52 +450,67 @@ def _capture_window(
                     exc_info=True,
                 )
 
-        user32.AttachThreadInput(current_thread_id, target_thread_id, False)
+
+def _get_bitmap_bits(bitmap_handle: int, buffer: bytearray) -> int:
+    """Copy the bits of *bitmap_handle* into *buffer*; return the number of bytes copied."""
+    from ctypes import wintypes
+
+    gdi32 = ctypes.windll.gdi32
+    gdi32.GetBitmapBits.argtypes = [wintypes.HBITMAP, wintypes.LONG, ctypes.c_void_p]
+    gdi32.GetBitmapBits.restype = wintypes.LONG
+    target = (ctypes.c_char * len(buffer)).from_buffer(buffer)
+    return gdi32.GetBitmapBits(bitmap_handle, len(buffer), target)
 
 
 def _capture_screen(region: Optional[tuple[int, int, int, int]] = None) -> Image.Image:
-    return ImageGrab.grab(bbox=region)
+    """Grab *region* with the selected backend, see :mod:`core.capture_backends`."""
+    return grab_screen(region)
 
 
-def _press_ctrl_number(number: int) -> None:
-    if platform.system() != "Windows":
-        return
-    number = max(0, min(9, int(number)))
-    vk_code = ord(str(number))
-    # Press and release the combination with small delays to ensure the
-    # modifier is registered by the target application.
-    win32api.keybd_event(win32con.VK_LCONTROL, 0, 0, 0)
-    time.sleep(0.05)
-    win32api.keybd_event(vk_code, 0, 0, 0)
-    time.sleep(0.05)
-    win32api.keybd_event(vk_code, 0, win32con.KEYEVENTF_KEYUP, 0)
-    time.sleep(0.05)
-    win32api.keybd_event(win32con.VK_LCONTROL, 0, win32con.KEYEVENTF_KEYUP, 0)
-
-
-def _add_timestamp(img: Image.Image, position: str) -> None:
-    draw = ImageDraw.Draw(img)
-    timestamp_text = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    try:
-        font = ImageFont.truetype("arial.ttf", 14)
-    except Exception:
-        font = ImageFont.load_default()
+STABLE_PROBE_SIZE = (160, 90)
+STABLE_PROBE_INTERVAL = 0.05
+STABLE_MIN_WAIT = 0.3
+
+
+def _grab_probe(region: Optional[tuple[int, int, int, int]]) -> Image.Image:
+    """Return a small grayscale copy of *region* for cheap frame comparison."""
+    frame = _capture_screen(region)
     try:
-        bbox = draw.textbbox((0, 0), timestamp_text, font=font)
-        text_w = bbox[2] - bbox[0]
-        text_h = bbox[3] - bbox[1]
-    except AttributeError:
-        text_w, text_h = draw.textsize(timestamp_text, font=font)
-    margin = 10
-    x, y = margin, margin
-    if position == "top-right":
-        x = img.width - text_w - margin
-    elif position == "bottom-left":
-        y = img.height - text_h - margin
-    elif position == "bottom-right":
-        x = img.width - text_w - margin
-        y = img.height - text_h - margin
-    draw.text((x, y), timestamp_text, fill="white", font=font)
+        return frame.convert("L").resize(STABLE_PROBE_SIZE, Image.Resampling.BILINEAR)
+    finally:
+        release_frame(frame)
+
+
+class FrameStabilityTracker:
+    """Track consecutive low-resolution probes until the screen settles.
+
+    The region counts as settled once ``stable_frames`` consecutive probes
+    differ from their predecessor by at most ``tolerance`` (mean absolute
+    difference on the 0-255 grayscale).
+    """
+
+    def __init__(self, stable_frames: int = 3, tolerance: float = 1.5):
+        self.stable_frames = max(1, int(stable_frames))
+        self.tolerance = float(tolerance)
+        self._previous: Optional[Image.Image] = None
+        self._matches = 0
+
+    def update(self, probe: Image.Image) -> bool:
+        """Feed the next probe and return ``True`` once the region is stable."""
+        if self._previous is not None:
+            difference = ImageStat.Stat(ImageChops.difference(probe, self._previous)).mean[0]
+            self._matches = self._matches + 1 if difference <= self.tolerance else 0
+        self._previous = probe
+        return self._matches >= self.stable_frames
+
+
+def _add_timestamp(
+    img: Image.Image,
+    position: str,
+    capture_time: Optional[datetime] = None,
+    style: Optional[dict] = None,
+) -> None:
+    stamp_timestamp(img, capture_time or datetime.now(), position, style)
 
 
 def take_screenshot(
@@ -247,51 +521,86 @@ def take_screenshot(
     timestamp_position: str = "top-left",
     window_title: str = "",
     capture_type: str = "screenshot",
-) -> Optional[Image.Image]:
+    timestamp_style: Optional[dict] = None,
+    on_saved: Optional[Callable[[Future], None]] = None,
+    output_format: Optional[dict] = None,
+    duplicate_filter: Optional[DuplicateFilter] = None,
+    dedup_key: Optional[str] = None,
+    priority: int = PRIORITY_SCHEDULED,
+    foreground_ticket=None,
+) -> Optional[CapturedFrame]:
+    """Capture the screen, a region or a program window and queue it for saving.
+
+    Returns once the frame is grabbed; encoding and writing happen in the
+    background. The returned :class:`CapturedFrame` carries the frame's
+    ``info`` (timings, ``duplicate``), not its pixels. ``on_saved`` receives the writer future, which resolves to a
+    :class:`CaptureResult` (path, timings, size or error); it is only called
+    when an image is returned. ``output_format``
+    selects the encoder (see :mod:`core.image_formats`); PNG by default.
+    ``timestamp_style`` sets the font, size and colours of the stamp (see
+    :mod:`core.timestamp_overlay`).
+    With ``duplicate_filter`` near-identical frames of the same
+    ``dedup_key`` are not saved; their result has ``duplicate`` set and the
+    returned frame has ``info["duplicate"]`` set.
+
+    Program captures need the foreground and wait for their turn at the
+    :class:`~core.capture_arbiter.CaptureArbiter` with ``priority``; the
+    time spent waiting is stored in ``info["queue_wait_seconds"]``. A caller
+    that already holds the slot passes its ``foreground_ticket`` (and
+    releases it itself). Screen and region grabs do not wait.
+    """
     if window_title and capture_type != "program":
         capture_type = "program"
 
-    region = None
-    if capture_type == "screenshot" and area is not None:
-        try:
-            from PySide6.QtCore import QRect
-            if isinstance(area, QRect):
-                region = (area.x(), area.y(), area.x() + area.width(), area.y() + area.height())
-            else:
-                region = (int(area[0]), int(area[1]), int(area[0]) + int(area[2]), int(area[1]) + int(area[3]))
-        except Exception:
-            pass
+    region = _normalize_region(area) if capture_type == "screenshot" else None
 
     img = None
     if capture_type == "program":
-        img = _capture_window(window_title)
+        ticket = foreground_ticket
+        if ticket is None:
+            ticket = get_capture_arbiter().acquire(
+                f"program:{window_title}", priority, DEFAULT_FOREGROUND_TIMEOUT
+            )
+            if ticket is None:
+                logger.error("A '%s' ablak képkészítése nem kapott sorra, kihagyva.", window_title)
+                return None
+        grab_start = time.perf_counter()
+        try:
+            img = _capture_window(window_title)
+        finally:
+            if foreground_ticket is None:
+                ticket.release()
+        grab_seconds = time.perf_counter() - grab_start
         if img is None:
             logger.error(
                 "A '%s' ablak nem található, vagy a fókusz-kikényszerítés ellenére sem sikerült képet készíteni.",
                 window_title,
             )
+        else:
+            img.info["queue_wait_seconds"] = ticket.wait_seconds
     else:
+        grab_start = time.perf_counter()
         img = _capture_screen(region)
+        grab_seconds = time.perf_counter() - grab_start
+    capture_time = datetime.now()
 
     if img is None:
         return None
-
-    if add_timestamp:
-        _add_timestamp(img, timestamp_position)
-
-    os.makedirs(save_directory, exist_ok=True)
-    timestamp_for_filename = datetime.now().strftime("%Y_%m_%d_%H-%M-%S")
-    filename = f"{filename_prefix}_{timestamp_for_filename}.png"
-    save_path = os.path.join(save_directory, filename)
-
-    try:
-        img.save(save_path)
-        logger.info("Képernyőkép sikeresen elmentve: %s", save_path)
-    except Exception as exc:
-        logger.error("Nem sikerült elmenteni a képernyőképet ide: %s - %s", save_path, exc)
-        return None
-
-    return img
+    img.info["grab_seconds"] = grab_seconds
+
+    return _finalize_capture(
+        img,
+        save_directory,
+        filename_prefix,
+        add_timestamp=add_timestamp,
+        timestamp_position=timestamp_position,
+        timestamp_style=timestamp_style,
+        capture_time=capture_time,
+        on_saved=on_saved,
+        output_format=output_format,
+        duplicate_filter=duplicate_filter,
+        dedup_key=dedup_key,
+    )
 
 
 def take_discord_screenshot(
@@ -305,86 +614,68 @@ def take_discord_screenshot(
     hotkey_number: int = 1,
     window_title: str = "Discord",
     delay_after_hotkey: float = 10.0,
-) -> Optional[Image.Image]:
-    """Take a Discord screenshot using the two-step capture process."""
-
-    # Determine capture region from *area*
-    region = None
-    if area is not None:
-        try:
-            from PySide6.QtCore import QRect
-            if isinstance(area, QRect):
-                region = (area.x(), area.y(), area.x() + area.width(), area.y() + area.height())
-            else:
-                region = (
-                    int(area[0]),
-                    int(area[1]),
-                    int(area[0]) + int(area[2]),
-                    int(area[1]) + int(area[3]),
-                )
-        except Exception:
-            region = None
-
-    # Save the current foreground window to restore later
-    original_hwnd = None
-    if platform.system() == "Windows":
-        try:
-            original_hwnd = win32gui.GetForegroundWindow()
-        except Exception:
-            original_hwnd = None
-
-    # Pre-action for Discord hotkey
-    pre_action = None
-    if use_hotkey:
-        def pre_action():
-            _press_ctrl_number(hotkey_number)
-
-    final_img: Optional[Image.Image] = None
+    wait_until_stable: bool = False,
+    stable_frames: int = 3,
+    stable_tolerance: float = 1.5,
+    timestamp_style: Optional[dict] = None,
+    on_saved: Optional[Callable[[Future], None]] = None,
+    output_format: Optional[dict] = None,
+    duplicate_filter: Optional[DuplicateFilter] = None,
+    dedup_key: Optional[str] = None,
+    priority: int = PRIORITY_SCHEDULED,
+) -> Optional[CapturedFrame]:
+    """Take a Discord screenshot using the two-step capture process; blocks until done.
+
+    Like :func:`take_screenshot`, the image is saved in the background,
+    ``on_saved`` receives the writer future and ``duplicate_filter``
+    suppresses unchanged frames.
+
+    The steps are those of :class:`core.discord_capture.DiscordCaptureJob`,
+    driven on a private :class:`core.dispatcher.ThreadDispatcher` while the
+    calling thread waits, so the blocking and the event-driven capture share
+    one implementation. The foreground queue is given up after
+    ``DEFAULT_FOREGROUND_TIMEOUT`` seconds. See the job for the measurements
+    stored in the returned frame's ``info``.
+    """
+    try:
+        from .discord_capture import DiscordCaptureJob
+        from .dispatcher import ThreadDispatcher
+    except ImportError:
+        from discord_capture import DiscordCaptureJob
+        from dispatcher import ThreadDispatcher
+
+    finished: Future = Future()
+    dispatcher = ThreadDispatcher(name="DiscordCapture").start()
     try:
-        # Bring Discord to foreground and execute the hotkey
-        img = _capture_window(
-            window_title or "Discord",
-            restore_foreground=False,
-            pre_action=pre_action,
-            executable="discord.exe",
+        job = DiscordCaptureJob(
+            save_directory,
+            filename_prefix,
+            area,
+            add_timestamp,
+            timestamp_position,
+            stay_foreground,
+            use_hotkey,
+            hotkey_number,
+            window_title,
+            delay_after_hotkey,
+            wait_until_stable,
+            stable_frames,
+            stable_tolerance,
+            call_later=dispatcher.call_later,
+            timestamp_style=timestamp_style,
+            on_finished=finished.set_result,
+            on_saved=on_saved,
+            output_format=output_format,
+            duplicate_filter=duplicate_filter,
+            dedup_key=dedup_key,
+            priority=priority,
+            queue_timeout=DEFAULT_FOREGROUND_TIMEOUT,
         )
-        if img is None:
-            return None
-
-        # Allow Discord UI to update after the hotkey press
-        time.sleep(delay_after_hotkey)
-
-        # Capture the desired screen region (or full screen)
-        final_img = _capture_screen(region)
-        if final_img is None:
-            return None
-
-        if add_timestamp:
-            _add_timestamp(final_img, timestamp_position)
-
-        os.makedirs(save_directory, exist_ok=True)
-        timestamp_for_filename = datetime.now().strftime("%Y_%m_%d_%H-%M-%S")
-        filename = f"{filename_prefix}_{timestamp_for_filename}.png"
-        save_path = os.path.join(save_directory, filename)
-        try:
-            final_img.save(save_path)
-            logger.info("Képernyőkép sikeresen elmentve: %s", save_path)
-        except Exception as exc:
-            logger.error("Nem sikerült elmenteni a képernyőképet ide: %s - %s", save_path, exc)
-            return None
-
-        return final_img
+        dispatcher.run_sync(job.start)
+        # Minden lépésnek van felső korlátja, a job mindig befejeződik
+        return finished.result()
     finally:
-        if (
-            not stay_foreground
-            and platform.system() == "Windows"
-            and original_hwnd
-            and win32gui.IsWindow(original_hwnd)
-        ):
-            try:
-                win32gui.SetForegroundWindow(original_hwnd)
-            except Exception:
-                logger.warning("Az eredeti ablakot nem sikerült visszaállítani az előtérbe.")
+        dispatcher.stop()
 
 
 if __name__ == "__main__":
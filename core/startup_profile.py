@@ -0,0 +1,140 @@
+"""Startup timing breakdown for ``main.py --profile-startup``.
+
+While active, every ``import`` statement is timed through a wrapper around
+:func:`builtins.__import__`. The *self* time of each import (its own module
+code, without the nested imports) is attributed to the top-level package
+that was loaded, so ``PySide6`` or ``apscheduler`` show up as one line each.
+Startup phases are marked with :func:`mark`; :func:`finish` removes the
+hook and returns the printable report::
+
+    python main.py --profile-startup
+    python main.py --start-hidden --profile-startup
+
+When profiling is not active :func:`mark` and :func:`finish` do nothing, so
+the call sites can stay in place.
+"""
+
+from __future__ import annotations
+
+import builtins
+import threading
+import time
+from collections import defaultdict
+from typing import Optional
+
+
+PROFILE_FLAG = "--profile-startup"
+TOP_IMPORTS = 15
+
+
+class StartupProfiler:
+    """Collects phase durations and per-package import times."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last_mark = self.started
+        self._last_import_total = 0.0
+        self.phases: list[tuple[str, float, float]] = []
+        self.import_seconds: dict[str, float] = defaultdict(float)
+        self.import_counts: dict[str, int] = defaultdict(int)
+        self._local = threading.local()
+        self._original_import = None
+
+    # --- Import hook ---
+
+    def install(self) -> "StartupProfiler":
+        if self._original_import is None:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._import
+        return self
+
+    def uninstall(self) -> None:
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            package = _top_level_package(name, globals, level)
+            self.import_seconds[package] += elapsed - nested
+            self.import_counts[package] += 1
+
+    @property
+    def import_total(self) -> float:
+        return sum(self.import_seconds.values())
+
+    # --- Phases ---
+
+    def mark(self, name: str) -> None:
+        """Close the phase that ran since the previous mark and call it *name*."""
+        now = time.perf_counter()
+        import_total = self.import_total
+        self.phases.append((name, now - self._last_mark, import_total - self._last_import_total))
+        self._last_mark = now
+        self._last_import_total = import_total
+
+    def report(self, top: int = TOP_IMPORTS) -> str:
+        total = self._last_mark - self.started
+        lines = [f"Indítási profil: {total:.3f} s a main.py indulásától"]
+        lines.append(f"  {'Szakasz':<40} {'idő (s)':>9} {'ebből import':>13}")
+        for name, seconds, import_seconds in self.phases:
+            lines.append(f"  {name:<40} {seconds:>9.3f} {import_seconds:>13.3f}")
+        lines.append(f"Importok saját ideje csomagonként (összesen {self.import_total:.3f} s):")
+        ranked = sorted(self.import_seconds.items(), key=lambda item: item[1], reverse=True)
+        for package, seconds in ranked[:top]:
+            lines.append(f"  {package:<40} {seconds:>9.3f} {self.import_counts[package]:>9} import")
+        if len(ranked) > top:
+            rest = sum(seconds for _package, seconds in ranked[top:])
+            lines.append(f"  {f'további {len(ranked) - top} csomag':<40} {rest:>9.3f}")
+        return "\n".join(lines)
+
+
+def _top_level_package(name: str, globals, level: int) -> str:
+    if level and globals:
+        package = globals.get("__package__") or globals.get("__name__", "").rpartition(".")[0]
+        if package:
+            return package.partition(".")[0]
+    return name.partition(".")[0] or "?"
+
+
+_profiler: Optional[StartupProfiler] = None
+
+
+def start() -> StartupProfiler:
+    """Start profiling (idempotent); call it before the heavy imports."""
+    global _profiler
+    if _profiler is None:
+        _profiler = StartupProfiler().install()
+    return _profiler
+
+
+def active() -> bool:
+    return _profiler is not None
+
+
+def mark(name: str) -> None:
+    if _profiler is not None:
+        _profiler.mark(name)
+
+
+def finish(final_phase: Optional[str] = None) -> Optional[str]:
+    """Stop profiling and return the report (``None`` when not profiling)."""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is None:
+        return None
+    if final_phase:
+        profiler.mark(final_phase)
+    profiler.uninstall()
+    return profiler.report()
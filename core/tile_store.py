@@ -0,0 +1,359 @@
+"""Content-addressed tile store for incremental screenshot storage.
+
+Consecutive captures of the same window usually differ in a few small
+regions. Instead of writing every frame as a full image, the frame is cut
+into fixed-size tiles; each tile is hashed and only tiles that are not yet
+in the store are written. Every capture gets a small JSON manifest listing
+its tile hashes in row-major order (a run of equal tiles is written as
+``[hash, count]``), from which the image can be rebuilt on demand.
+
+The new tiles of a capture are packed below each other into one PNG, so
+they get PNG's row filtering and a single file instead of one small file
+per tile. An append-only index maps every tile hash to its pack and slot.
+
+Layout inside the save folder::
+
+    .fotoapp_tiles/packs/Kép_....png   new tiles of one capture, one slot each
+    .fotoapp_tiles/index               "hash pack slot" lines
+    .fotoapp_tiles/objects/ab/ab12...  zlib-compressed raw tiles (version 1 stores)
+    Kép_2024_01_01_10-00-00.tiles.json manifest of one capture
+
+Command line::
+
+    python -m core.tile_store export MANIFEST [-o kep.png]
+    python -m core.tile_store stats MAPPA
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+import zlib
+from datetime import datetime
+from typing import Optional
+
+from PIL import Image
+
+try:
+    from .image_formats import FORMAT_PNG, encode_image
+except ImportError:
+    # Ha önállóan futtatjuk teszteléshez
+    from image_formats import FORMAT_PNG, encode_image
+
+
+logger = logging.getLogger(__name__)
+
+STORE_DIRNAME = ".fotoapp_tiles"
+MANIFEST_SUFFIX = ".tiles.json"
+DEFAULT_TILE_SIZE = 64
+MANIFEST_VERSION = 2
+INDEX_FILENAME = "index"
+# A csomagok PNG tömörítése; megegyezik a sima PNG mentés alapértékével
+PACK_COMPRESS_LEVEL = 6
+
+
+class TileStore:
+    """Stores frames as deduplicated tiles below *root*."""
+
+    def __init__(self, root: str, tile_size: int = DEFAULT_TILE_SIZE):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.packs_dir = os.path.join(root, "packs")
+        self.index_path = os.path.join(root, INDEX_FILENAME)
+        self.tile_size = max(8, int(tile_size))
+        self._index: Optional[dict[str, tuple[str, int]]] = None
+        self._index_size = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_directory(cls, save_directory: str, tile_size: int = DEFAULT_TILE_SIZE) -> "TileStore":
+        """Return the shared store that belongs to *save_directory* and *tile_size*.
+
+        Stores of different tile sizes share the packs and the index on disk,
+        but a store's ``tile_size`` never changes once it is created.
+        """
+        root = os.path.join(os.path.abspath(save_directory), STORE_DIRNAME)
+        key = (root, max(8, int(tile_size)))
+        with _stores_lock:
+            store = _stores.get(key)
+            if store is None:
+                store = _stores[key] = cls(*key)
+            return store
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _read_index_locked(self) -> dict[str, tuple[str, int]]:
+        """Return the index, reading lines appended since the last call (e.g. by another process)."""
+        if self._index is None:
+            self._index = {}
+            self._index_size = 0
+        try:
+            with open(self.index_path, "rb") as f:
+                f.seek(self._index_size)
+                chunk = f.read()
+        except FileNotFoundError:
+            return self._index
+        # Csak a teljes sorokat dolgozzuk fel, a félig kiírt utolsót legközelebb
+        complete = chunk[: chunk.rfind(b"\n") + 1]
+        self._index_size += len(complete)
+        for line in complete.decode("utf-8").splitlines():
+            # A csomag neve (a kép neve) szóközt is tartalmazhat
+            digest, _, rest = line.partition(" ")
+            pack_name, _, slot = rest.rpartition(" ")
+            if pack_name and slot.isdigit():
+                self._index.setdefault(digest, (pack_name, int(slot)))
+        return self._index
+
+    def _locate(self, digest: str, refresh: bool = False) -> Optional[tuple[str, int]]:
+        with self._lock:
+            if self._index is None or (refresh and digest not in self._index):
+                self._read_index_locked()
+            return self._index.get(digest)
+
+    def _tile_digest(self, mode: str, box: tuple[int, int, int, int], data: bytes) -> str:
+        # A méret is a kulcs része: a csomagból a csempe méretével vágunk ki
+        header = f"{mode} {box[2] - box[0]}x{box[3] - box[1]} ".encode("ascii")
+        return hashlib.blake2b(header + data, digest_size=16).hexdigest()
+
+    def _write_pack(self, img: Image.Image, name: str, tiles: list[tuple[str, tuple[int, int, int, int]]]) -> int:
+        """Write *tiles* of *img* below each other into pack *name* and index them."""
+        size = self.tile_size
+        pack = Image.new(img.mode, (size, size * len(tiles)))
+        for slot, (_digest, box) in enumerate(tiles):
+            pack.paste(img.crop(box), (0, slot * size))
+        os.makedirs(self.packs_dir, exist_ok=True)
+        path = os.path.join(self.packs_dir, name)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        pack.save(tmp_path, format="PNG", compress_level=PACK_COMPRESS_LEVEL)
+        os.replace(tmp_path, path)
+        written = os.path.getsize(path)
+
+        lines = "".join(f"{digest} {name} {slot}\n" for slot, (digest, _box) in enumerate(tiles))
+        encoded = lines.encode("utf-8")
+        with self._lock:
+            with open(self.index_path, "ab") as f:
+                f.write(encoded)
+            self._read_index_locked()
+        return written + len(encoded)
+
+    def _iter_tiles(self, img: Image.Image):
+        """Yield ``(box, raw_bytes)`` for every tile in row-major order."""
+        width, height = img.size
+        bpp = len(img.getbands())
+        raw = memoryview(img.tobytes())
+        stride = width * bpp
+        size = self.tile_size
+        for top in range(0, height, size):
+            bottom = min(top + size, height)
+            for left in range(0, width, size):
+                right = min(left + size, width)
+                data = b"".join(
+                    raw[row * stride + left * bpp: row * stride + right * bpp]
+                    for row in range(top, bottom)
+                )
+                yield (left, top, right, bottom), data
+
+    def store(self, img: Image.Image, manifest_path: str) -> dict:
+        """Store *img* and write its manifest to *manifest_path*.
+
+        Returns statistics: total tiles, newly written tiles and bytes written.
+        """
+        if img.mode not in ("RGB", "RGBA", "L"):
+            img = img.convert("RGB")
+
+        digests = []
+        new_tiles: list[tuple[str, tuple[int, int, int, int]]] = []
+        pending = set()
+        for box, data in self._iter_tiles(img):
+            digest = self._tile_digest(img.mode, box, data)
+            digests.append(digest)
+            if digest not in pending and self._locate(digest) is None:
+                pending.add(digest)
+                new_tiles.append((digest, box))
+
+        manifest_name = os.path.basename(manifest_path)
+        bytes_written = 0
+        if new_tiles:
+            pack_name = manifest_name[: -len(MANIFEST_SUFFIX)] if is_manifest(manifest_name) else manifest_name
+            bytes_written += self._write_pack(img, f"{pack_name}.png", new_tiles)
+
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "created": datetime.now().isoformat(timespec="milliseconds"),
+            "width": img.width,
+            "height": img.height,
+            "mode": img.mode,
+            "tile_size": self.tile_size,
+            "store": os.path.relpath(self.root, os.path.dirname(os.path.abspath(manifest_path))),
+            "tiles": _encode_runs(digests),
+        }
+        encoded = json.dumps(manifest, separators=(",", ":")).encode("utf-8")
+        with open(manifest_path, "wb") as f:
+            f.write(encoded)
+        bytes_written += len(encoded)
+
+        stats = {"tiles": len(digests), "new_tiles": len(new_tiles), "bytes_written": bytes_written}
+        logger.info(
+            "Csempetár: %d/%d új csempe, %.1f KiB írva (%s).",
+            len(new_tiles),
+            len(digests),
+            bytes_written / 1024,
+            manifest_path,
+        )
+        return stats
+
+    def load(self, manifest: dict) -> Image.Image:
+        """Rebuild the image described by *manifest*."""
+        mode = manifest["mode"]
+        width, height = manifest["width"], manifest["height"]
+        size = manifest["tile_size"]
+        img = Image.new(mode, (width, height))
+        digests = _decode_runs(manifest["tiles"])
+        packs: dict[str, Image.Image] = {}
+        for top in range(0, height, size):
+            for left in range(0, width, size):
+                digest = next(digests)
+                tile_w = min(size, width - left)
+                tile_h = min(size, height - top)
+                if manifest.get("version", 1) < 2:
+                    # 1-es verziójú tár: külön fájlban tömörített nyers pixelek
+                    with open(self._object_path(digest), "rb") as f:
+                        data = zlib.decompress(f.read())
+                    img.paste(Image.frombytes(mode, (tile_w, tile_h), data), (left, top))
+                    continue
+                location = self._locate(digest, refresh=True)
+                if location is None:
+                    raise FileNotFoundError(f"A csempe nincs a tár indexében: {digest}")
+                pack_name, slot = location
+                pack = packs.get(pack_name)
+                if pack is None:
+                    with Image.open(os.path.join(self.packs_dir, pack_name)) as opened:
+                        pack = packs[pack_name] = opened.convert(mode)
+                pack_size = pack.width
+                img.paste(pack.crop((0, slot * pack_size, tile_w, slot * pack_size + tile_h)), (left, top))
+        return img
+
+
+def _encode_runs(digests: list[str]) -> list:
+    """Collapse runs of equal digests into ``[digest, count]`` entries."""
+    runs: list = []
+    for digest in digests:
+        last = runs[-1] if runs else None
+        if isinstance(last, list) and last[0] == digest:
+            last[1] += 1
+        elif last == digest:
+            runs[-1] = [digest, 2]
+        else:
+            runs.append(digest)
+    return runs
+
+
+def _decode_runs(entries: list):
+    """Yield the digests of a manifest's tile list (plain digests or runs)."""
+    for entry in entries:
+        if isinstance(entry, str):
+            yield entry
+        else:
+            digest, count = entry
+            for _ in range(count):
+                yield digest
+
+
+_stores: dict[tuple[str, int], TileStore] = {}
+_stores_lock = threading.Lock()
+
+
+def is_manifest(path: str) -> bool:
+    return path.endswith(MANIFEST_SUFFIX)
+
+
+def load_capture(manifest_path: str) -> Image.Image:
+    """Reconstruct the capture stored under *manifest_path*."""
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    root = os.path.join(os.path.dirname(os.path.abspath(manifest_path)), manifest.get("store", STORE_DIRNAME))
+    return TileStore(os.path.normpath(root), manifest["tile_size"]).load(manifest)
+
+
+def export_capture(manifest_path: str, output_path: Optional[str] = None) -> str:
+    """Write the capture under *manifest_path* as a normal PNG and return its path."""
+    if output_path is None:
+        output_path = manifest_path[: -len(MANIFEST_SUFFIX)] + ".png"
+    load_capture(manifest_path).save(output_path, format="PNG")
+    return output_path
+
+
+def directory_stats(save_directory: str) -> dict:
+    """Compare the stored size with the plain PNG save path and with raw frames.
+
+    ``png_bytes`` is what the captures take when saved as ordinary PNG files
+    with the default settings; every capture is rebuilt and re-encoded to
+    measure it, so this reads the whole store.
+    """
+    manifests = [name for name in os.listdir(save_directory) if is_manifest(name)]
+    raw_bytes = 0
+    png_bytes = 0
+    manifest_bytes = 0
+    for name in manifests:
+        path = os.path.join(save_directory, name)
+        manifest_bytes += os.path.getsize(path)
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        raw_bytes += manifest["width"] * manifest["height"] * Image.getmodebands(manifest["mode"])
+        png_bytes += len(encode_image(load_capture(path), {"format": FORMAT_PNG}))
+    store_dir = os.path.join(save_directory, STORE_DIRNAME)
+    object_bytes = 0
+    object_count = 0
+    for dirpath, _dirnames, filenames in os.walk(os.path.join(store_dir, "objects")):
+        for filename in filenames:
+            object_bytes += os.path.getsize(os.path.join(dirpath, filename))
+            object_count += 1
+    store = TileStore(store_dir)
+    with store._lock:
+        object_count += len(store._read_index_locked())
+    for dirpath, _dirnames, filenames in os.walk(store.packs_dir):
+        for filename in filenames:
+            object_bytes += os.path.getsize(os.path.join(dirpath, filename))
+    if os.path.exists(store.index_path):
+        object_bytes += os.path.getsize(store.index_path)
+    return {
+        "captures": len(manifests),
+        "objects": object_count,
+        "stored_bytes": object_bytes + manifest_bytes,
+        "png_bytes": png_bytes,
+        "raw_bytes": raw_bytes,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="FOTOapp csempetár eszközök")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_cmd = commands.add_parser("export", help="Manifest visszaalakítása PNG képpé")
+    export_cmd.add_argument("manifest")
+    export_cmd.add_argument("-o", "--output", help="Kimeneti PNG útvonala")
+    stats_cmd = commands.add_parser("stats", help="Tárhelystatisztika egy mentési mappáról")
+    stats_cmd.add_argument("directory")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        print(export_capture(args.manifest, args.output))
+    else:
+        stats = directory_stats(args.directory)
+        stored = stats["stored_bytes"]
+        png_ratio = stats["png_bytes"] / stored if stored else 0.0
+        raw_ratio = stats["raw_bytes"] / stored if stored else 0.0
+        print(
+            f"Képek: {stats['captures']}, csempék: {stats['objects']}, "
+            f"tárolt: {stored / 1048576:.2f} MiB, "
+            f"sima PNG-ként: {stats['png_bytes'] / 1048576:.2f} MiB ({png_ratio:.2f}x), "
+            f"nyers megfelelő: {stats['raw_bytes'] / 1048576:.2f} MiB ({raw_ratio:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
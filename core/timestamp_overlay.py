@@ -0,0 +1,203 @@
+"""Cached renderer for the timestamp overlay drawn on captures.
+
+Fonts are loaded once per (font, size) pair, and the glyphs of digits and
+separators are pre-rendered as alpha masks. Stamping a frame only touches
+the small rectangle that the text (and its optional background box)
+covers; the rest of the frame is never read or rewritten.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+
+# A Pillow csak az első renderelésnél töltődik be: a konfiguráció
+# betöltéséhez elég a DEFAULT_TIMESTAMP_STYLE.
+if TYPE_CHECKING:
+    from PIL import Image, ImageFont
+
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+PRERENDERED_GLYPHS = "0123456789-:. "
+FALLBACK_FONTS = (
+    "arial.ttf",
+    "DejaVuSans.ttf",
+    "LiberationSans-Regular.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+    "/Library/Fonts/Arial.ttf",
+)
+
+DEFAULT_TIMESTAMP_STYLE = {
+    "font": "arial.ttf",
+    "size": 14,
+    "color": "#FFFFFF",
+    # Háttérdoboz színe (pl. "#000000A0"), None esetén nincs doboz
+    "background": None,
+}
+
+MARGIN = 10
+BOX_PADDING = 3
+
+
+@lru_cache(maxsize=16)
+def load_font(font_name: str, size: int) -> ImageFont.ImageFont:
+    """Load *font_name* at *size*, trying common fallbacks before the default font."""
+    from PIL import ImageFont
+
+    for candidate in (font_name, *FALLBACK_FONTS):
+        if not candidate:
+            continue
+        try:
+            font = ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+        if candidate != font_name:
+            logger.warning("A(z) '%s' betűtípus nem érhető el, helyette: %s", font_name, candidate)
+        return font
+    logger.warning(
+        "Egyik TrueType betűtípus sem érhető el (%s), a Pillow alapértelmezett betűtípusa lesz használva.",
+        font_name,
+    )
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Régebbi Pillow: a beépített bitmap betűtípus mérete nem állítható
+        return ImageFont.load_default()
+
+
+def _parse_color(value, default: tuple[int, ...]) -> tuple[int, ...]:
+    from PIL import ImageColor
+
+    if not value:
+        return default
+    try:
+        return ImageColor.getrgb(value) if isinstance(value, str) else tuple(value)
+    except (ValueError, TypeError):
+        logger.warning("Érvénytelen szín a dátum beállításban: %r", value)
+        return default
+
+
+class TimestampRenderer:
+    """Renders timestamp strings from pre-rendered glyph masks."""
+
+    def __init__(
+        self,
+        font: str = DEFAULT_TIMESTAMP_STYLE["font"],
+        size: int = DEFAULT_TIMESTAMP_STYLE["size"],
+        color=DEFAULT_TIMESTAMP_STYLE["color"],
+        background=DEFAULT_TIMESTAMP_STYLE["background"],
+    ):
+        self.font = load_font(font, max(4, int(size)))
+        self.color = _parse_color(color, (255, 255, 255))[:3]
+        background_rgba = _parse_color(background, ()) if background else ()
+        if background_rgba and len(background_rgba) == 3:
+            background_rgba = (*background_rgba, 255)
+        self.background = background_rgba or None
+
+        try:
+            ascent, descent = self.font.getmetrics()
+        except AttributeError:
+            ascent, descent = 11, 0
+        self.line_height = ascent + descent
+        self._glyphs: dict[str, Image.Image] = {}
+        self._lock = threading.Lock()
+        for char in PRERENDERED_GLYPHS:
+            self._glyph(char)
+
+    def _glyph(self, char: str) -> Image.Image:
+        glyph = self._glyphs.get(char)
+        if glyph is not None:
+            return glyph
+        from PIL import Image, ImageDraw
+
+        try:
+            advance = self.font.getlength(char)
+        except AttributeError:
+            advance = self.font.getsize(char)[0]
+        mask = Image.new("L", (max(1, math.ceil(advance)), self.line_height), 0)
+        ImageDraw.Draw(mask).text((0, 0), char, font=self.font, fill=255)
+        with self._lock:
+            self._glyphs[char] = mask
+        return mask
+
+    def render_mask(self, text: str) -> Image.Image:
+        """Return an ``L`` mask of *text* assembled from cached glyphs."""
+        from PIL import Image
+
+        glyphs = [self._glyph(char) for char in text]
+        mask = Image.new("L", (max(1, sum(g.width for g in glyphs)), self.line_height), 0)
+        x = 0
+        for glyph in glyphs:
+            mask.paste(glyph, (x, 0))
+            x += glyph.width
+        return mask
+
+    def stamp(self, img: Image.Image, text: str, position: str = "top-left") -> None:
+        """Draw *text* onto *img* in place, touching only the text region."""
+        mask = self.render_mask(text)
+        text_w, text_h = mask.size
+        x, y = MARGIN, MARGIN
+        if position in ("top-right", "bottom-right"):
+            x = img.width - text_w - MARGIN
+        if position in ("bottom-left", "bottom-right"):
+            y = img.height - text_h - MARGIN
+        x = max(0, x)
+        y = max(0, y)
+
+        if self.background:
+            from PIL import Image
+
+            box = (
+                max(0, x - BOX_PADDING),
+                max(0, y - BOX_PADDING),
+                min(img.width, x + text_w + BOX_PADDING),
+                min(img.height, y + text_h + BOX_PADDING),
+            )
+            region = img.crop(box)
+            overlay = Image.new(region.mode, region.size, self._fill_for(region.mode, self.background[:3]))
+            img.paste(Image.blend(region, overlay, self.background[3] / 255.0), box[:2])
+
+        img.paste(self._fill_for(img.mode, self.color), (x, y, x + text_w, y + text_h), mask)
+
+    @staticmethod
+    def _fill_for(mode: str, rgb: tuple[int, ...]):
+        if mode == "RGBA":
+            return (*rgb[:3], 255)
+        if mode in ("L", "1"):
+            return int(0.299 * rgb[0] + 0.587 * rgb[1] + 0.114 * rgb[2])
+        return tuple(rgb[:3])
+
+
+@lru_cache(maxsize=8)
+def _cached_renderer(font: str, size: int, color, background) -> TimestampRenderer:
+    return TimestampRenderer(font, size, color, background)
+
+
+def get_renderer(style: Optional[dict] = None) -> TimestampRenderer:
+    """Return a shared renderer for *style* (see ``DEFAULT_TIMESTAMP_STYLE``)."""
+    merged = {**DEFAULT_TIMESTAMP_STYLE, **(style or {})}
+    color = merged["color"]
+    background = merged["background"]
+    return _cached_renderer(
+        str(merged["font"] or ""),
+        int(merged["size"] or DEFAULT_TIMESTAMP_STYLE["size"]),
+        tuple(color) if isinstance(color, list) else color,
+        tuple(background) if isinstance(background, list) else background,
+    )
+
+
+def stamp_timestamp(
+    img: Image.Image,
+    capture_time: datetime,
+    position: str = "top-left",
+    style: Optional[dict] = None,
+) -> None:
+    """Stamp *capture_time* onto *img* using the cached renderer for *style*."""
+    get_renderer(style).stamp(img, capture_time.strftime(TIMESTAMP_FORMAT), position)
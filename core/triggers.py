@@ -0,0 +1,199 @@
+"""Schedule rule parsing and the wall-clock anchored interval trigger.
+
+A schedule rule in the config is one of::
+
+    {"kind": "daily", "time": "08:30", "days": ["H", "K"]}          # default
+    {"kind": "interval", "every_seconds": 15, "days": ["H", "K"],
+     "window": {"start": "08:00", "end": "18:00"}}
+    {"kind": "cron", "cron": "*/10 * 8-17 * * mon-fri"}
+
+Rules without ``kind`` are daily rules (the original format). Cron
+expressions have six fields (second minute hour day month day_of_week); the
+classic five-field form is accepted as well and fires at second 0.
+
+Interval fire times are multiples of the interval counted from the start of
+the active window on the local wall clock (local midnight without a
+window), e.g. every 15 s from 08:00 fires at 08:00:00, 08:00:15, ... So
+they never drift and do not depend on when the scheduler was started or
+reloaded. A window whose end is not after its start wraps past midnight:
+22:00-06:00 runs from 22:00 on the selected day until 06:00 the next day.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, time, timedelta
+from typing import Optional
+
+from apscheduler.triggers.base import BaseTrigger
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.util import astimezone, localize
+
+
+KIND_DAILY = "daily"
+KIND_INTERVAL = "interval"
+KIND_CRON = "cron"
+SCHEDULE_KINDS = (KIND_DAILY, KIND_INTERVAL, KIND_CRON)
+
+# Magyar napnevek -> APScheduler (angol 3 betűs) napnevek és hét napjai (hétfő = 0)
+DAY_MAP = {
+    "H": "mon", "K": "tue", "Sze": "wed", "Cs": "thu",
+    "P": "fri", "Szo": "sat", "V": "sun"
+}
+DAY_INDEX = {day: index for index, day in enumerate(DAY_MAP)}
+
+MIN_INTERVAL_SECONDS = 1
+_MICROSECONDS = 1_000_000
+
+
+def _parse_hhmm(value: str) -> time:
+    hour, minute = map(int, str(value).split(":"))
+    return time(hour, minute)
+
+
+class WindowedIntervalTrigger(BaseTrigger):
+    """Fires every ``interval_seconds`` on a grid anchored to the window start.
+
+    ``window_start``/``window_end`` limit firing to a daily time window
+    (end exclusive; ``None`` means the whole day) and ``weekdays`` (0 =
+    Monday) limits it to certain days. An end at or before the start wraps
+    into the next day; ``weekdays`` applies to the day the window starts.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: int,
+        *,
+        window_start: Optional[time] = None,
+        window_end: Optional[time] = None,
+        weekdays: Optional[set[int]] = None,
+        timezone=None,
+    ):
+        self.interval_seconds = max(MIN_INTERVAL_SECONDS, int(interval_seconds))
+        self.window_start = window_start
+        self.window_end = window_end
+        self.weekdays = set(weekdays) if weekdays else set(range(7))
+        self.timezone = astimezone(timezone) if timezone is not None else None
+
+    def _window_bounds(self, day: datetime) -> tuple[datetime, datetime]:
+        start = datetime.combine(day.date(), self.window_start or time(0, 0))
+        if self.window_end is None:
+            end = datetime.combine(day.date() + timedelta(days=1), time(0, 0))
+        elif self.window_end <= (self.window_start or time(0, 0)):
+            # Éjfélen átnyúló ablak: a vége a következő napra esik
+            end = datetime.combine(day.date() + timedelta(days=1), self.window_end)
+        else:
+            end = datetime.combine(day.date(), self.window_end)
+        return start, end
+
+    def get_next_fire_time(self, previous_fire_time, now):
+        tz = self.timezone or now.tzinfo
+        base = previous_fire_time + timedelta(microseconds=1) if previous_fire_time else now
+        # A rácsot helyi (falióra szerinti) időben számoljuk, így a nyári
+        # időszámítás váltása sem tolja el a tüzelési pontokat.
+        local = base.astimezone(tz).replace(tzinfo=None)
+        step = self.interval_seconds * _MICROSECONDS
+
+        # Az előző nap éjfélen átnyúló ablaka még tarthat
+        day = datetime.combine(local.date() - timedelta(days=1), time(0, 0))
+        for _ in range(9):
+            if day.weekday() in self.weekdays:
+                window_start, window_end = self._window_bounds(day)
+                offset = max(0, (local - window_start) // timedelta(microseconds=1))
+                candidate = window_start + timedelta(microseconds=-(-offset // step) * step)
+                if candidate < window_end:
+                    return localize(candidate, tz)
+            day += timedelta(days=1)
+        return None
+
+    def __str__(self):
+        window = ""
+        if self.window_start or self.window_end:
+            start = (self.window_start or time(0, 0)).strftime("%H:%M")
+            end = self.window_end.strftime("%H:%M") if self.window_end else "24:00"
+            window = f", window='{start}-{end}'"
+        return f"interval[{self.interval_seconds}s{window}]"
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__} (interval_seconds={self.interval_seconds}, "
+            f"window_start={self.window_start}, window_end={self.window_end}, "
+            f"weekdays={sorted(self.weekdays)}, timezone='{self.timezone}')>"
+        )
+
+
+def cron_trigger_from_expression(expression: str, timezone=None) -> CronTrigger:
+    """Build a :class:`CronTrigger` from a five- or six-field cron expression."""
+    fields = str(expression).split()
+    if len(fields) == 5:
+        fields.insert(0, "0")
+    if len(fields) != 6:
+        raise ValueError(f"A cron kifejezésnek 5 vagy 6 mezőből kell állnia: {expression!r}")
+    second, minute, hour, day, month, day_of_week = fields
+    return CronTrigger(
+        second=second,
+        minute=minute,
+        hour=hour,
+        day=day,
+        month=month,
+        day_of_week=day_of_week,
+        timezone=timezone,
+    )
+
+
+def schedule_kind(schedule_item: dict) -> str:
+    kind = schedule_item.get("kind") or KIND_DAILY
+    if kind not in SCHEDULE_KINDS:
+        raise ValueError(f"Ismeretlen ütemezéstípus: {kind}")
+    return kind
+
+
+def build_trigger(schedule_item: dict, timezone=None) -> tuple[BaseTrigger, tuple, str]:
+    """Return ``(trigger, trigger_key, description)`` for a schedule rule.
+
+    ``trigger_key`` is a hashable value that changes exactly when the
+    trigger would fire at different times. Raises ``ValueError`` for an
+    incomplete or invalid rule.
+    """
+    kind = schedule_kind(schedule_item)
+
+    if kind == KIND_CRON:
+        expression = " ".join(str(schedule_item.get("cron", "")).split())
+        if not expression:
+            raise ValueError("Hiányzó cron kifejezés.")
+        return cron_trigger_from_expression(expression, timezone), (kind, expression), f"cron '{expression}'"
+
+    days_list = schedule_item.get("days", [])
+    mapped_days = [DAY_MAP[day] for day in days_list if day in DAY_MAP]
+
+    if kind == KIND_INTERVAL:
+        every = int(schedule_item.get("every_seconds") or 0)
+        if every < MIN_INTERVAL_SECONDS:
+            raise ValueError(f"Érvénytelen intervallum: {schedule_item.get('every_seconds')!r}")
+        window = schedule_item.get("window") or {}
+        window_start = _parse_hhmm(window["start"]) if window.get("start") else None
+        window_end = _parse_hhmm(window["end"]) if window.get("end") else None
+        weekdays = {DAY_INDEX[day] for day in days_list if day in DAY_INDEX}
+        trigger = WindowedIntervalTrigger(
+            every,
+            window_start=window_start,
+            window_end=window_end,
+            weekdays=weekdays,
+            timezone=timezone,
+        )
+        key = (kind, every, str(window_start), str(window_end), tuple(sorted(weekdays)))
+        description = f"{every} mp-enként"
+        if window_start or window_end:
+            description += f" {window.get('start', '00:00')}-{window.get('end', '24:00')}"
+        if mapped_days:
+            description += f" ({','.join(mapped_days)})"
+        return trigger, key, description
+
+    time_str = schedule_item.get("time")
+    if not time_str or not days_list:
+        raise ValueError("Hiányos ütemezési szabály (idő vagy napok hiányoznak).")
+    hour, minute = map(int, time_str.split(":"))
+    if not mapped_days:
+        raise ValueError("Nincsenek érvényes napok az ütemezési szabályban.")
+    days_str = ",".join(mapped_days)
+    trigger = CronTrigger(day_of_week=days_str, hour=hour, minute=minute, timezone=timezone)
+    return trigger, (KIND_DAILY, days_str, hour, minute), f"{time_str} ({days_str})"
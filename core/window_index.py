@@ -0,0 +1,716 @@
+"""Cached lookup of top-level windows by title and executable.
+
+Window and Discord captures used to enumerate every top-level window with
+``EnumWindows`` on each capture and lowercase every title. For the Discord
+path they also opened each matching process (``OpenProcess`` +
+``GetModuleFileNameEx``) to check its executable. :class:`WindowIndex`
+keeps a map from window handle to :class:`WindowInfo` (title, lowercased
+title, PID, executable) instead:
+
+* the executable of a window is resolved once, the first time a lookup
+  filters on it, and kept for the lifetime of the handle,
+* on Windows a ``SetWinEventHook`` thread marks created, destroyed, shown,
+  hidden and renamed windows dirty, and the next lookup re-reads only
+  those. Without event hooks the handles are re-enumerated at most every
+  :data:`SYNC_INTERVAL` seconds, and only the new windows are described,
+* a hit is validated before use (``IsWindow``, visibility, the current
+  title and the owning process, as handles are reused), and a miss forces
+  one full resync, so the cache never returns a dead or renamed window.
+
+Like the previous ``EnumWindows`` scan, a lookup returns the topmost
+matching window. The z-order is the one of the last enumeration, updated
+by foreground changes (``EVENT_SYSTEM_FOREGROUND``) when event hooks run.
+
+The platform calls sit behind :class:`WindowTable`. :class:`FakeWindowTable`
+implements it in memory for tests and measurements off Windows. The index
+is shared by the capture code and the window selector of the GUI::
+
+    python -m core.window_index                  # windows of this desktop
+    python -m core.window_index --fake 300       # lookup cost on a fake table
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import platform
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# Eseménykezelő nélkül legfeljebb ilyen gyakran soroljuk fel újra az ablakokat (mp)
+SYNC_INTERVAL = 2.0
+# Eseménykezelővel csak biztonsági teljes újraszinkronizálás
+EVENT_SYNC_INTERVAL = 60.0
+HOOK_START_TIMEOUT = 2.0
+
+EVENT_SYSTEM_FOREGROUND = 0x0003
+EVENT_OBJECT_CREATE = 0x8000
+EVENT_OBJECT_DESTROY = 0x8001
+EVENT_OBJECT_HIDE = 0x8003
+EVENT_OBJECT_NAMECHANGE = 0x800C
+# A helyzet- és fókuszváltozásokra (0x8004-0x800B) nincs szükség, azok nagyon gyakoriak
+_HOOK_RANGES = (
+    (EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND),
+    (EVENT_OBJECT_CREATE, EVENT_OBJECT_HIDE),
+    (EVENT_OBJECT_NAMECHANGE, EVENT_OBJECT_NAMECHANGE),
+)
+WINEVENT_OUTOFCONTEXT = 0x0000
+OBJID_WINDOW = 0
+CHILDID_SELF = 0
+GA_ROOT = 2
+WM_QUIT = 0x0012
+
+
+@dataclass
+class WindowInfo:
+    """Cached data of one top-level window.
+
+    ``executable`` is ``None`` until a lookup needs it and ``""`` when it
+    could not be determined.
+    """
+
+    hwnd: int
+    title: str
+    pid: int
+    visible: bool = True
+    executable: Optional[str] = None
+    title_lower: str = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.title_lower = self.title.lower()
+
+    def set_title(self, title: str) -> None:
+        if title != self.title:
+            self.title = title
+            self.title_lower = title.lower()
+
+
+class WindowTable:
+    """Access to the top-level windows of the desktop, as used by :class:`WindowIndex`."""
+
+    name = "none"
+
+    def handles(self) -> list[int]:
+        """Handles of all top-level windows, topmost first."""
+        raise NotImplementedError
+
+    def is_window(self, hwnd: int) -> bool:
+        raise NotImplementedError
+
+    def title(self, hwnd: int) -> str:
+        raise NotImplementedError
+
+    def is_visible(self, hwnd: int) -> bool:
+        raise NotImplementedError
+
+    def process_id(self, hwnd: int) -> int:
+        raise NotImplementedError
+
+    def executable(self, pid: int) -> str:
+        """Full path of the executable of process *pid*; raises ``OSError`` when unknown."""
+        raise NotImplementedError
+
+    def watch(self, callback: Callable[[int, bool], None]) -> bool:
+        """Call *callback* with the handle of each changed top-level window.
+
+        The second argument is ``True`` when the window came to the
+        foreground (and so to the top of the z-order). Returns ``False`` when change events are not available; the index
+        then falls back to periodic re-enumeration.
+        """
+        return False
+
+    def close(self) -> None:
+        pass
+
+
+class Win32WindowTable(WindowTable):
+    """pywin32 access; change events come from ``SetWinEventHook`` on a message-loop thread."""
+
+    name = "win32"
+
+    def __init__(self):
+        import win32api
+        import win32con
+        import win32gui
+        import win32process
+
+        self._win32api = win32api
+        self._win32con = win32con
+        self._win32gui = win32gui
+        self._win32process = win32process
+        self._hook_thread: Optional[threading.Thread] = None
+        self._hook_thread_id = 0
+        self._hooked = False
+
+    def handles(self) -> list[int]:
+        found: list[int] = []
+
+        def _collect(hwnd, acc):
+            acc.append(hwnd)
+            return True
+
+        self._win32gui.EnumWindows(_collect, found)
+        return found
+
+    def is_window(self, hwnd: int) -> bool:
+        return bool(self._win32gui.IsWindow(hwnd))
+
+    def title(self, hwnd: int) -> str:
+        return self._win32gui.GetWindowText(hwnd)
+
+    def is_visible(self, hwnd: int) -> bool:
+        return bool(self._win32gui.IsWindowVisible(hwnd))
+
+    def process_id(self, hwnd: int) -> int:
+        _, pid = self._win32process.GetWindowThreadProcessId(hwnd)
+        return pid
+
+    def executable(self, pid: int) -> str:
+        win32con = self._win32con
+        try:
+            proc_handle = self._win32api.OpenProcess(
+                win32con.PROCESS_QUERY_INFORMATION | win32con.PROCESS_VM_READ,
+                False,
+                pid,
+            )
+        except Exception as exc:
+            raise OSError(f"A(z) {pid} folyamat nem nyitható meg: {exc}") from exc
+        try:
+            return self._win32process.GetModuleFileNameEx(proc_handle, 0)
+        except Exception as exc:
+            raise OSError(f"A(z) {pid} folyamat programja nem kérdezhető le: {exc}") from exc
+        finally:
+            self._win32api.CloseHandle(proc_handle)
+
+    def watch(self, callback: Callable[[int, bool], None]) -> bool:
+        if self._hook_thread is None:
+            ready = threading.Event()
+            self._hook_thread = threading.Thread(
+                target=self._run_hooks,
+                args=(callback, ready),
+                name="WindowEventHook",
+                daemon=True,
+            )
+            self._hook_thread.start()
+            ready.wait(HOOK_START_TIMEOUT)
+        return self._hooked
+
+    def _run_hooks(self, callback: Callable[[int, bool], None], ready: threading.Event) -> None:
+        # Az OUTOFCONTEXT eseményeket a beregisztráló szál üzenetsora kézbesíti,
+        # ezért saját szál és üzenethurok kell (a démonban nincs Qt eseményhurok).
+        import ctypes
+        from ctypes import wintypes
+
+        user32 = ctypes.WinDLL("user32")
+        kernel32 = ctypes.WinDLL("kernel32")
+        win_event_proc = ctypes.WINFUNCTYPE(
+            None,
+            wintypes.HANDLE,
+            wintypes.DWORD,
+            wintypes.HWND,
+            wintypes.LONG,
+            wintypes.LONG,
+            wintypes.DWORD,
+            wintypes.DWORD,
+        )
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        user32.SetWinEventHook.argtypes = [
+            wintypes.DWORD,
+            wintypes.DWORD,
+            wintypes.HMODULE,
+            win_event_proc,
+            wintypes.DWORD,
+            wintypes.DWORD,
+            wintypes.DWORD,
+        ]
+        user32.UnhookWinEvent.argtypes = [wintypes.HANDLE]
+        user32.GetAncestor.restype = wintypes.HWND
+        user32.GetAncestor.argtypes = [wintypes.HWND, wintypes.UINT]
+
+        def _on_event(_hook, event, hwnd, id_object, id_child, _thread_id, _time):
+            try:
+                if not hwnd or id_object != OBJID_WINDOW or id_child != CHILDID_SELF:
+                    return
+                # Gyermekablakok eseményei nem érdekesek; a megszűnt ablaknak már nincs őse.
+                if event != EVENT_OBJECT_DESTROY and user32.GetAncestor(hwnd, GA_ROOT) != hwnd:
+                    return
+                callback(int(hwnd), event == EVENT_SYSTEM_FOREGROUND)
+            except Exception:
+                pass
+
+        proc = win_event_proc(_on_event)
+        hooks = [
+            user32.SetWinEventHook(low, high, None, proc, 0, 0, WINEVENT_OUTOFCONTEXT)
+            for low, high in _HOOK_RANGES
+        ]
+        self._hook_thread_id = kernel32.GetCurrentThreadId()
+        self._hooked = all(hooks)
+        ready.set()
+        try:
+            if not self._hooked:
+                logger.warning("Az ablakesemények figyelése nem indult el, időszakos frissítés lesz.")
+                return
+            msg = wintypes.MSG()
+            while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+        finally:
+            self._hooked = False
+            for hook in hooks:
+                if hook:
+                    user32.UnhookWinEvent(hook)
+
+    def close(self) -> None:
+        if self._hook_thread is not None and self._hook_thread_id:
+            import ctypes
+
+            ctypes.windll.user32.PostThreadMessageW(self._hook_thread_id, WM_QUIT, 0, 0)
+            self._hook_thread.join(HOOK_START_TIMEOUT)
+        self._hook_thread = None
+        self._hook_thread_id = 0
+
+
+class FakeWindowTable(WindowTable):
+    """In-memory window table for tests; ``calls`` counts the platform calls a real table would make."""
+
+    name = "fake"
+
+    def __init__(self, events: bool = False):
+        self.events = events
+        self.calls: Counter = Counter()
+        self._windows: dict[int, dict] = {}
+        self._executables: dict[int, str] = {}
+        self._next_hwnd = 0x10010
+        self._next_pid = 1000
+        self._callback: Optional[Callable[[int, bool], None]] = None
+
+    def add_window(
+        self,
+        title: str,
+        *,
+        executable: str = "app.exe",
+        pid: Optional[int] = None,
+        visible: bool = True,
+        hwnd: Optional[int] = None,
+    ) -> int:
+        """Open a window on top of the others and return its handle.
+
+        Passing the *hwnd* of a closed window reuses the handle, as Windows does.
+        """
+        if pid is None:
+            pid = self._next_pid
+            self._next_pid += 4
+        self._executables.setdefault(pid, f"C:\\Program Files\\Fake\\{executable}")
+        if hwnd is None:
+            hwnd = self._next_hwnd
+            self._next_hwnd += 2
+        self._windows = {hwnd: {"title": title, "pid": pid, "visible": visible}, **self._windows}
+        self._notify(hwnd)
+        return hwnd
+
+    def set_title(self, hwnd: int, title: str) -> None:
+        self._windows[hwnd]["title"] = title
+        self._notify(hwnd)
+
+    def set_visible(self, hwnd: int, visible: bool) -> None:
+        self._windows[hwnd]["visible"] = visible
+        self._notify(hwnd)
+
+    def close_window(self, hwnd: int) -> None:
+        self._windows.pop(hwnd, None)
+        self._notify(hwnd)
+
+    def raise_window(self, hwnd: int) -> None:
+        """Bring *hwnd* to the foreground (top of the z-order)."""
+        self._windows = {hwnd: self._windows.pop(hwnd), **self._windows}
+        self._notify(hwnd, raised=True)
+
+    def _notify(self, hwnd: int, raised: bool = False) -> None:
+        if self.events and self._callback is not None:
+            self._callback(hwnd, raised)
+
+    def handles(self) -> list[int]:
+        self.calls["handles"] += 1
+        return list(self._windows)
+
+    def is_window(self, hwnd: int) -> bool:
+        self.calls["is_window"] += 1
+        return hwnd in self._windows
+
+    def title(self, hwnd: int) -> str:
+        self.calls["title"] += 1
+        window = self._windows.get(hwnd)
+        return window["title"] if window else ""
+
+    def is_visible(self, hwnd: int) -> bool:
+        self.calls["is_visible"] += 1
+        window = self._windows.get(hwnd)
+        return bool(window and window["visible"])
+
+    def process_id(self, hwnd: int) -> int:
+        self.calls["process_id"] += 1
+        window = self._windows.get(hwnd)
+        if window is None:
+            raise OSError(f"Érvénytelen ablak: {hwnd:#x}")
+        return window["pid"]
+
+    def executable(self, pid: int) -> str:
+        self.calls["executable"] += 1
+        try:
+            return self._executables[pid]
+        except KeyError:
+            raise OSError(f"Ismeretlen folyamat: {pid}") from None
+
+    def watch(self, callback: Callable[[int, bool], None]) -> bool:
+        if not self.events:
+            return False
+        self._callback = callback
+        return True
+
+
+class WindowIndex:
+    """Handle -> :class:`WindowInfo` cache over a :class:`WindowTable`."""
+
+    def __init__(self, table: Optional[WindowTable] = None, sync_interval: float = SYNC_INTERVAL):
+        self.sync_interval = sync_interval
+        self._lock = threading.RLock()
+        self._dirty_lock = threading.Lock()
+        self._table: Optional[WindowTable] = None
+        self._reset(table)
+
+    def _reset(self, table: Optional[WindowTable]) -> None:
+        self._table = table
+        self._windows: dict[int, WindowInfo] = {}
+        self._dirty: set[int] = set()
+        # Előtérbe került ablakok, a z-sorrend elejére kerülnek
+        self._raised: list[int] = []
+        self._synced_at: Optional[float] = None
+        self._watching = False
+        self._events = False
+        self.counters: Counter = Counter()
+
+    @property
+    def available(self) -> bool:
+        return self._table is not None
+
+    @property
+    def uses_events(self) -> bool:
+        return self._events
+
+    def set_table(self, table: Optional[WindowTable]) -> None:
+        """Switch to *table* (e.g. a :class:`FakeWindowTable`) and drop the cache."""
+        with self._lock:
+            old = self._table
+            self._reset(table)
+        if old is not None and old is not table:
+            old.close()
+
+    def find(self, title: str, executable: Optional[str] = None) -> Optional[int]:
+        """Return the handle of the topmost visible window whose title contains *title*.
+
+        Providing ``executable`` ensures that the window belongs to the given
+        program (e.g. ``discord.exe``). The handle is validated before it is
+        returned.
+        """
+        if self._table is None:
+            return None
+        needle = title.lower()
+        with self._lock:
+            synced = self._update()
+            hwnd = self._match(needle, executable)
+            if hwnd is None and not synced:
+                # Lehet, hogy az ablak még nem került be: egy teljes újraolvasás.
+                self._sync_all()
+                hwnd = self._match(needle, executable)
+            self.counters["hits" if hwnd is not None else "misses"] += 1
+            return hwnd
+
+    def windows(self, visible_only: bool = True) -> list[WindowInfo]:
+        """Snapshot of the cached windows that have a title, topmost first where known."""
+        if self._table is None:
+            return []
+        with self._lock:
+            self._update()
+            return [
+                WindowInfo(info.hwnd, info.title, info.pid, info.visible, info.executable)
+                for info in self._windows.values()
+                if info.title.strip() and (info.visible or not visible_only)
+            ]
+
+    def refresh(self) -> None:
+        """Re-read every window now."""
+        if self._table is None:
+            return
+        with self._lock:
+            self._start_watching()
+            self._sync_all()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "table": self._table.name if self._table is not None else None,
+                "events": self._events,
+                "windows": len(self._windows),
+                **self.counters,
+            }
+
+    def close(self) -> None:
+        self.set_table(None)
+
+    # --- Belső lépések (a zár alatt) ---
+
+    def _mark_dirty(self, hwnd: int, raised: bool = False) -> None:
+        with self._dirty_lock:
+            self._dirty.add(hwnd)
+            if raised:
+                self._raised.append(hwnd)
+
+    def _start_watching(self) -> None:
+        if self._watching:
+            return
+        self._watching = True
+        try:
+            self._events = self._table.watch(self._mark_dirty)
+        except Exception:
+            logger.exception("Az ablakesemények figyelése nem indítható.")
+            self._events = False
+        logger.debug(
+            "Ablakindex: %s tábla, %s.",
+            self._table.name,
+            "eseményfigyeléssel" if self._events else f"legfeljebb {self.sync_interval:g} mp-enkénti újraolvasással",
+        )
+
+    def _update(self) -> bool:
+        """Bring the cache up to date; ``True`` when every window was re-read."""
+        self._start_watching()
+        interval = EVENT_SYNC_INTERVAL if self._events else self.sync_interval
+        if self._synced_at is None or time.monotonic() - self._synced_at >= interval:
+            self._sync_all()
+            return True
+        self._apply_dirty()
+        return False
+
+    def _sync_all(self) -> None:
+        table = self._table
+        # A felsorolás közben érkező események piszkosak maradnak.
+        with self._dirty_lock:
+            self._dirty.clear()
+            self._raised.clear()
+        old = self._windows
+        windows: dict[int, WindowInfo] = {}
+        for hwnd in table.handles():
+            info = old.get(hwnd)
+            if info is not None:
+                if not self._refresh_info(info):
+                    continue
+            else:
+                info = self._describe(hwnd)
+                if info is None:
+                    continue
+            windows[hwnd] = info
+        self._windows = windows
+        self._synced_at = time.monotonic()
+        self.counters["full_syncs"] += 1
+
+    def _apply_dirty(self) -> None:
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+            raised, self._raised = self._raised, []
+        for hwnd in dirty:
+            info = self._windows.get(hwnd)
+            if info is not None:
+                if not self._table.is_window(hwnd) or not self._refresh_info(info):
+                    del self._windows[hwnd]
+            elif self._table.is_window(hwnd):
+                info = self._describe(hwnd)
+                if info is not None:
+                    # Az új ablak általában legfelül van
+                    self._windows = {hwnd: info, **self._windows}
+        # A legutóbb előtérbe került kerül legfelülre
+        for hwnd in raised:
+            info = self._windows.get(hwnd)
+            if info is not None:
+                self._windows = {hwnd: info, **{key: value for key, value in self._windows.items() if key != hwnd}}
+        if dirty:
+            self.counters["event_updates"] += len(dirty)
+
+    def _describe(self, hwnd: int) -> Optional[WindowInfo]:
+        table = self._table
+        try:
+            info = WindowInfo(hwnd, table.title(hwnd), table.process_id(hwnd), table.is_visible(hwnd))
+        except Exception:
+            # Az ablak közben bezárult
+            return None
+        self.counters["described"] += 1
+        return info
+
+    def _refresh_info(self, info: WindowInfo) -> bool:
+        try:
+            pid = self._table.process_id(info.hwnd)
+            info.set_title(self._table.title(info.hwnd))
+            info.visible = self._table.is_visible(info.hwnd)
+        except Exception:
+            return False
+        if pid != info.pid:
+            # A bezárt ablak azonosítóját egy másik folyamat ablaka kapta meg
+            info.pid = pid
+            info.executable = None
+            self.counters["reused_handles"] += 1
+        return True
+
+    def _match(self, needle: str, executable: Optional[str]) -> Optional[int]:
+        for info in list(self._windows.values()):
+            if not info.visible or needle not in info.title_lower:
+                continue
+            if not self._validate(info, needle):
+                continue
+            # A program ellenőrzése az érvényesítés után: az újrahasznált azonosító új programot jelent
+            if executable and not self._executable_matches(info, executable):
+                continue
+            return info.hwnd
+        return None
+
+    def _executable_matches(self, info: WindowInfo, executable: str) -> bool:
+        if info.executable is None:
+            try:
+                info.executable = self._table.executable(info.pid)
+            except Exception as exc:
+                logger.debug("A(z) %#x ablak programja nem állapítható meg: %s", info.hwnd, exc)
+                info.executable = ""
+            self.counters["executables_resolved"] += 1
+        return os.path.basename(info.executable.replace("\\", "/")).lower() == executable.lower()
+
+    def _validate(self, info: WindowInfo, needle: str) -> bool:
+        """Check a cached hit against the live window before it is handed out."""
+        if not self._table.is_window(info.hwnd) or not self._refresh_info(info):
+            self._windows.pop(info.hwnd, None)
+            self.counters["stale"] += 1
+            return False
+        if not info.visible or needle not in info.title_lower:
+            self.counters["stale"] += 1
+            return False
+        return True
+
+
+def default_window_table() -> Optional[WindowTable]:
+    """The table of the current platform, or ``None`` where windows cannot be listed."""
+    if platform.system() != "Windows":
+        return None
+    try:
+        return Win32WindowTable()
+    except ImportError as exc:
+        logger.warning("Az ablakok nem listázhatók (hiányzó pywin32): %s", exc)
+        return None
+
+
+_index: Optional[WindowIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_window_index() -> WindowIndex:
+    """Return the index shared by the capture code and the GUI."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = WindowIndex(default_window_table())
+        return _index
+
+
+def set_window_table(table: Optional[WindowTable]) -> None:
+    """Point the shared index at *table* (tests use a :class:`FakeWindowTable`)."""
+    get_window_index().set_table(table)
+
+
+def close_window_index() -> None:
+    """Stop the event hook of the shared index, if it was started."""
+    global _index
+    with _index_lock:
+        index, _index = _index, None
+    if index is not None:
+        index.close()
+
+
+def _scan(table: WindowTable, needle: str, executable: Optional[str]) -> Optional[int]:
+    """The previous per-capture lookup: enumerate, describe and open processes every time."""
+    for hwnd in table.handles():
+        if not table.is_visible(hwnd) or needle not in table.title(hwnd).lower():
+            continue
+        if executable:
+            try:
+                path = table.executable(table.process_id(hwnd))
+            except Exception:
+                continue
+            if os.path.basename(path.replace("\\", "/")).lower() != executable.lower():
+                continue
+        return hwnd
+    return None
+
+
+def _fake_desktop(count: int, events: bool) -> FakeWindowTable:
+    table = FakeWindowTable(events=events)
+    table.add_window("Discord - #general", executable="Discord.exe")
+    for number in range(max(0, count - 1)):
+        table.add_window(f"Dokumentum {number} - Szerkesztő", executable=f"app{number % 20}.exe")
+    return table
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Ablakkeresés ideje az ablakindexszel és anélkül.")
+    parser.add_argument("--find", default="Discord", help="keresett címrészlet")
+    parser.add_argument("--exe", default="discord.exe", help="program szűrő (üres: nincs)")
+    parser.add_argument("--lookups", type=int, default=200, help="keresések száma")
+    parser.add_argument("--fake", type=int, metavar="N", help="N ablakos hamis asztal a valódi helyett")
+    parser.add_argument("--events", action="store_true", help="a hamis asztal eseményeket is küld")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.fake:
+        table: Optional[WindowTable] = _fake_desktop(args.fake, args.events)
+    else:
+        table = default_window_table()
+        if table is None:
+            print("Ezen a rendszeren nincsenek listázható ablakok; próbáld a --fake N kapcsolót.", file=sys.stderr)
+            return 1
+    needle = args.find.lower()
+    executable = args.exe or None
+    lookups = max(1, args.lookups)
+
+    calls_before = Counter(getattr(table, "calls", {}))
+    start = time.perf_counter()
+    for _ in range(lookups):
+        scanned = _scan(table, needle, executable)
+    scan_seconds = (time.perf_counter() - start) / lookups
+    scan_calls = Counter(getattr(table, "calls", {})) - calls_before
+
+    index = WindowIndex(table)
+    calls_before = Counter(getattr(table, "calls", {}))
+    start = time.perf_counter()
+    for _ in range(lookups):
+        found = index.find(args.find, executable)
+    index_seconds = (time.perf_counter() - start) / lookups
+    index_calls = Counter(getattr(table, "calls", {})) - calls_before
+
+    windows = index.windows()
+    print(f"{len(windows)} látható ablak ({table.name} tábla), találat: {found if found is None else hex(found)}")
+    if scanned != found:
+        print(f"Eltérő találat a teljes felsorolással: {scanned}", file=sys.stderr)
+    print(f"Teljes felsorolás keresésenként: {scan_seconds * 1e6:10.1f} µs")
+    print(f"Ablakindex keresésenként:        {index_seconds * 1e6:10.1f} µs")
+    if scan_calls or index_calls:
+        for name in sorted(set(scan_calls) | set(index_calls)):
+            print(f"  {name:<12} {scan_calls[name] / lookups:10.1f} -> {index_calls[name] / lookups:8.2f} hívás / keresés")
+    print(f"Index: {index.stats()}")
+    index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
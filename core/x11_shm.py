@@ -0,0 +1,349 @@
+"""X11 MIT-SHM screen grabs for Linux.
+
+``ImageGrab.grab`` sends a full ``GetImage`` request for every frame and
+copies the reply into a new Pillow image. :class:`XShmBackend` instead
+attaches one shared-memory segment per region size (``XShmCreateImage`` +
+``shmget``/``shmat`` + ``XShmAttach``) on the first grab and reuses it: the
+X server writes the pixels straight into the segment with ``XShmGetImage``,
+and the pixels are decoded from the segment in a single pass into a frame
+of the shared :class:`~core.frame_pool.FramePool`, without an intermediate
+``bytes`` object or a newly allocated image.
+
+The segment is overwritten by the next grab of the same size while the
+image writer may still be encoding the previous frame, so the frame handed
+on is always the decoded RGB image, never a view into the segment.
+
+Only ``ctypes`` is used (``libX11``, ``libXext`` and ``libc``); the backend
+is unavailable when there is no ``DISPLAY``, the server lacks MIT-SHM (e.g.
+a remote display), or the visual is not 24/32-bit TrueColor. It is
+registered in :mod:`core.capture_backends` as ``xshm`` and can be tried
+without a monitor under Xvfb::
+
+    xvfb-run -s "-screen 0 1920x1080x24" python -m core.capture_backends --region 0,0,1920,1080
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional
+
+try:
+    from .frame_pool import decode_frame
+except ImportError:
+    # Ha önállóan futtatjuk teszteléshez
+    from frame_pool import decode_frame
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+logger = logging.getLogger(__name__)
+
+# Ennyi különböző régióméret szegmensét tartjuk csatolva (LRU)
+MAX_SEGMENTS = 4
+
+_Z_PIXMAP = 2
+_ALL_PLANES = (1 << (8 * ctypes.sizeof(ctypes.c_ulong))) - 1
+_IPC_PRIVATE = 0
+_IPC_CREAT = 0o1000
+_IPC_RMID = 0
+
+
+class _XImageFuncs(ctypes.Structure):
+    _fields_ = [(name, ctypes.c_void_p) for name in (
+        "create_image", "destroy_image", "get_pixel", "put_pixel", "sub_image", "add_pixel",
+    )]
+
+
+class _XImage(ctypes.Structure):
+    _fields_ = [
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("xoffset", ctypes.c_int),
+        ("format", ctypes.c_int),
+        ("data", ctypes.c_void_p),
+        ("byte_order", ctypes.c_int),
+        ("bitmap_unit", ctypes.c_int),
+        ("bitmap_bit_order", ctypes.c_int),
+        ("bitmap_pad", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("bytes_per_line", ctypes.c_int),
+        ("bits_per_pixel", ctypes.c_int),
+        ("red_mask", ctypes.c_ulong),
+        ("green_mask", ctypes.c_ulong),
+        ("blue_mask", ctypes.c_ulong),
+        ("obdata", ctypes.c_void_p),
+        ("f", _XImageFuncs),
+    ]
+
+
+class _XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", ctypes.c_ulong),
+        ("shmid", ctypes.c_int),
+        ("shmaddr", ctypes.c_void_p),
+        ("readOnly", ctypes.c_int),
+    ]
+
+
+class _XErrorEvent(ctypes.Structure):
+    _fields_ = [
+        ("type", ctypes.c_int),
+        ("display", ctypes.c_void_p),
+        ("resourceid", ctypes.c_ulong),
+        ("serial", ctypes.c_ulong),
+        ("error_code", ctypes.c_ubyte),
+        ("request_code", ctypes.c_ubyte),
+        ("minor_code", ctypes.c_ubyte),
+    ]
+
+
+_XErrorHandler = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.POINTER(_XErrorEvent))
+_DestroyImage = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.POINTER(_XImage))
+
+
+class XShmError(RuntimeError):
+    """The shared-memory grab is not possible on this display."""
+
+
+class _Libraries:
+    """The ctypes bindings, loaded once on the first use."""
+
+    def __init__(self):
+        paths = {name: ctypes.util.find_library(name) for name in ("X11", "Xext", "c")}
+        missing = [name for name, path in paths.items() if not path]
+        if missing:
+            raise XShmError(f"Hiányzó könyvtár: {', '.join(missing)}")
+        self.x11 = ctypes.CDLL(paths["X11"])
+        self.xext = ctypes.CDLL(paths["Xext"])
+        self.libc = ctypes.CDLL(paths["c"], use_errno=True)
+
+        x11, xext, libc = self.x11, self.xext, self.libc
+        x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        x11.XOpenDisplay.restype = ctypes.c_void_p
+        x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        x11.XDefaultScreen.argtypes = [ctypes.c_void_p]
+        x11.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        x11.XDefaultRootWindow.restype = ctypes.c_ulong
+        x11.XDefaultVisual.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XDefaultVisual.restype = ctypes.c_void_p
+        x11.XDefaultDepth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XDisplayWidth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XDisplayHeight.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XSetErrorHandler.argtypes = [_XErrorHandler]
+        x11.XSetErrorHandler.restype = ctypes.c_void_p
+
+        xext.XShmQueryExtension.argtypes = [ctypes.c_void_p]
+        xext.XShmCreateImage.argtypes = [
+            ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_void_p,
+            ctypes.POINTER(_XShmSegmentInfo), ctypes.c_uint, ctypes.c_uint,
+        ]
+        xext.XShmCreateImage.restype = ctypes.POINTER(_XImage)
+        xext.XShmAttach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        xext.XShmDetach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        xext.XShmGetImage.argtypes = [
+            ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(_XImage), ctypes.c_int, ctypes.c_int, ctypes.c_ulong,
+        ]
+
+        libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+        libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+        libc.shmat.restype = ctypes.c_void_p
+        libc.shmdt.argtypes = [ctypes.c_void_p]
+        libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+
+        # Az Xlib alapértelmezett hibakezelője kilépteti a folyamatot; a
+        # hibákat inkább feljegyezzük, és a hívó kivételt kap.
+        self.last_error: Optional[int] = None
+        self._error_handler = _XErrorHandler(self._on_error)
+        x11.XSetErrorHandler(self._error_handler)
+
+    def _on_error(self, _display, event) -> int:
+        self.last_error = event.contents.error_code
+        return 0
+
+    def take_error(self) -> Optional[int]:
+        error, self.last_error = self.last_error, None
+        return error
+
+
+_libraries: Optional[_Libraries] = None
+_libraries_lock = threading.Lock()
+
+
+def _load_libraries() -> _Libraries:
+    global _libraries
+    with _libraries_lock:
+        if _libraries is None:
+            _libraries = _Libraries()
+        return _libraries
+
+
+class _Segment:
+    """One ``XShmCreateImage`` image with its attached shared-memory segment."""
+
+    def __init__(self, libs: _Libraries, display, visual, depth: int, size: tuple[int, int]):
+        self._libs = libs
+        self._display = display
+        self.size = size
+        self.info = _XShmSegmentInfo()
+        self.image = libs.xext.XShmCreateImage(display, visual, depth, _Z_PIXMAP, None, ctypes.byref(self.info), size[0], size[1])
+        if not self.image:
+            raise XShmError("Az XShmCreateImage nem sikerült.")
+        ximage = self.image.contents
+        if ximage.bits_per_pixel != 32:
+            self._destroy_image()
+            raise XShmError(f"Nem támogatott képpontformátum: {ximage.bits_per_pixel} bit/képpont.")
+        self.bytes_per_line = ximage.bytes_per_line
+        self.length = ximage.bytes_per_line * ximage.height
+        # Kis endián BGRX a szokásos TrueColor elrendezés
+        self.rawmode = "BGRX" if ximage.red_mask == 0xFF0000 and ximage.blue_mask == 0xFF else "RGBX"
+
+        self.info.shmid = libs.libc.shmget(_IPC_PRIVATE, self.length, _IPC_CREAT | 0o600)
+        if self.info.shmid < 0:
+            self._destroy_image()
+            raise XShmError(f"shmget sikertelen: {os.strerror(ctypes.get_errno())}")
+        address = libs.libc.shmat(self.info.shmid, None, 0)
+        if address in (None, ctypes.c_void_p(-1).value):
+            libs.libc.shmctl(self.info.shmid, _IPC_RMID, None)
+            self._destroy_image()
+            raise XShmError(f"shmat sikertelen: {os.strerror(ctypes.get_errno())}")
+        self.info.shmaddr = address
+        self.info.readOnly = 0
+        ximage.data = address
+
+        libs.take_error()
+        attached = libs.xext.XShmAttach(display, ctypes.byref(self.info))
+        libs.x11.XSync(display, 0)
+        # Csatolás után törlésre jelöljük: a szegmens az utolsó leválasztással szűnik meg,
+        # így egy összeomlás sem hagy hátra árva szegmenst.
+        libs.libc.shmctl(self.info.shmid, _IPC_RMID, None)
+        error = libs.take_error()
+        if not attached or error is not None:
+            self._attached = False
+            self.close()
+            raise XShmError(f"Az XShmAttach nem sikerült (X hiba: {error}); távoli kijelzőn nincs osztott memória.")
+        self._attached = True
+
+    def grab(self, root, left: int, top: int) -> "Image.Image":
+        libs = self._libs
+        libs.take_error()
+        ok = libs.xext.XShmGetImage(self._display, root, self.image, left, top, _ALL_PLANES)
+        error = libs.take_error()
+        if not ok or error is not None:
+            raise XShmError(f"Az XShmGetImage nem sikerült (X hiba: {error}).")
+        data = (ctypes.c_char * self.length).from_address(self.info.shmaddr)
+        # Egyetlen dekódolás a szegmensből a készlet RGB képébe, köztes bytes másolat nélkül
+        return decode_frame(data, self.size, self.rawmode, self.bytes_per_line)
+
+    def close(self) -> None:
+        libs = self._libs
+        if getattr(self, "_attached", False):
+            libs.xext.XShmDetach(self._display, ctypes.byref(self.info))
+            libs.x11.XSync(self._display, 0)
+            self._attached = False
+        if self.info.shmaddr:
+            libs.libc.shmdt(self.info.shmaddr)
+            self.info.shmaddr = None
+        self._destroy_image()
+
+    def _destroy_image(self) -> None:
+        if not self.image:
+            return
+        ximage = self.image.contents
+        # Az adat az osztott szegmensé, az XDestroyImage ne szabadítsa fel
+        ximage.data = None
+        _DestroyImage(ximage.f.destroy_image)(self.image)
+        self.image = None
+
+
+class XShmBackend:
+    """Screen grabs through reused MIT-SHM segments (see the module docstring)."""
+
+    name = "xshm"
+
+    def __init__(self, display_name: Optional[str] = None):
+        self.display_name = display_name
+        self._lock = threading.Lock()
+        self._display = None
+        self._segments: "OrderedDict[tuple[int, int], _Segment]" = OrderedDict()
+        self._unavailable: Optional[str] = None
+
+    def available(self) -> bool:
+        if not sys.platform.startswith("linux") or not (self.display_name or os.environ.get("DISPLAY")):
+            return False
+        with self._lock:
+            try:
+                self._connect()
+            except XShmError as exc:
+                if self._unavailable is None:
+                    logger.info("Az X11 osztott memóriás képkészítés nem elérhető: %s", exc)
+                self._unavailable = str(exc)
+                return False
+        return True
+
+    def grab(self, region) -> "Image.Image":
+        with self._lock:
+            self._connect()
+            libs = _libraries
+            if region is None:
+                left, top = 0, 0
+                size = (self._screen_width, self._screen_height)
+            else:
+                left, top = region[0], region[1]
+                size = (region[2] - region[0], region[3] - region[1])
+            if (
+                size[0] <= 0 or size[1] <= 0 or left < 0 or top < 0
+                or left + size[0] > self._screen_width or top + size[1] > self._screen_height
+            ):
+                raise XShmError(f"A régió kilóg a képernyőről: {region}")
+            segment = self._segments.get(size)
+            if segment is None:
+                segment = _Segment(libs, self._display, self._visual, self._depth, size)
+                self._segments[size] = segment
+                if len(self._segments) > MAX_SEGMENTS:
+                    _size, oldest = self._segments.popitem(last=False)
+                    oldest.close()
+            else:
+                self._segments.move_to_end(size)
+            return segment.grab(self._root, left, top)
+
+    def close(self) -> None:
+        with self._lock:
+            for segment in self._segments.values():
+                segment.close()
+            self._segments.clear()
+            if self._display is not None:
+                _libraries.x11.XCloseDisplay(self._display)
+                self._display = None
+
+    def _connect(self) -> None:
+        if self._display is not None:
+            return
+        if self._unavailable is not None:
+            raise XShmError(self._unavailable)
+        libs = _load_libraries()
+        name = self.display_name.encode() if self.display_name else None
+        display = libs.x11.XOpenDisplay(name)
+        if not display:
+            raise XShmError("Nem sikerült kapcsolódni az X kijelzőhöz.")
+        if not libs.xext.XShmQueryExtension(display):
+            libs.x11.XCloseDisplay(display)
+            raise XShmError("Az X kiszolgáló nem támogatja a MIT-SHM kiterjesztést.")
+        screen = libs.x11.XDefaultScreen(display)
+        depth = libs.x11.XDefaultDepth(display, screen)
+        if depth not in (24, 32):
+            libs.x11.XCloseDisplay(display)
+            raise XShmError(f"Nem támogatott színmélység: {depth}.")
+        self._display = display
+        self._root = libs.x11.XDefaultRootWindow(display)
+        self._visual = libs.x11.XDefaultVisual(display, screen)
+        self._depth = depth
+        self._screen_width = libs.x11.XDisplayWidth(display, screen)
+        self._screen_height = libs.x11.XDisplayHeight(display, screen)
@@ -4,6 +4,7 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
     QCheckBox,
     QSpinBox,
+    QDoubleSpinBox,
     QLabel,
     QPushButton
 )
@@ -44,6 +45,24 @@ class DiscordSettingsDialog(QDialog):
         hotkey_layout.addStretch()
         layout.addLayout(hotkey_layout)
 
+        delay_layout = QHBoxLayout()
+        delay_layout.addWidget(QLabel("Várakozás a gyorsbillentyű után (mp):"))
+        self.delay_spin = QDoubleSpinBox()
+        self.delay_spin.setRange(0.0, 60.0)
+        self.delay_spin.setSingleStep(0.5)
+        self.delay_spin.setValue(float(settings.get("delay_after_hotkey", 2.0)))
+        delay_layout.addWidget(self.delay_spin)
+        delay_layout.addStretch()
+        layout.addLayout(delay_layout)
+
+        self.wait_until_stable_cb = QCheckBox(
+            "Várakozás, amíg a kép stabil (a fenti érték csak felső korlát)"
+        )
+        self.wait_until_stable_cb.setChecked(settings.get("wait_until_stable", False))
+        layout.addWidget(self.wait_until_stable_cb)
+        self._stable_frames = settings.get("stable_frames", 3)
+        self._stable_tolerance = settings.get("stable_tolerance", 1.5)
+
         button_layout = QHBoxLayout()
         button_layout.addStretch()
         self.ok_button = QPushButton("OK")
@@ -66,4 +85,8 @@ class DiscordSettingsDialog(QDialog):
             "use_hotkey": self.use_hotkey_cb.isChecked(),
             "hotkey_number": self.hotkey_spin.value(),
             "window_title": self.window_selector.get_selected_title(),
+            "delay_after_hotkey": self.delay_spin.value(),
+            "wait_until_stable": self.wait_until_stable_cb.isChecked(),
+            "stable_frames": self._stable_frames,
+            "stable_tolerance": self._stable_tolerance,
         }
@@ -4,6 +4,8 @@ import sys
 import os
 import traceback
 import logging
+import threading
+import time
 
 # Ensure the core package is importable when running this file directly
 _current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -12,7 +14,7 @@ if _parent_dir not in sys.path:
     sys.path.insert(0, _parent_dir)
 
 try:
-    from PySide6.QtCore import Slot, QRect, Qt, QCoreApplication, QStandardPaths, QRectF
+    from PySide6.QtCore import Slot, Signal, QRect, Qt, QCoreApplication, QStandardPaths, QRectF
     from PySide6.QtWidgets import (
         QMainWindow,
         QWidget,
@@ -46,10 +48,12 @@ try:
     from core.config_manager import ConfigManager
     from core.scheduler import Scheduler
     from core import autostart_manager
-    from core.screenshot_taker import (
-        take_screenshot,
-        take_discord_screenshot,
-    )
+    from .qt_dispatch import qt_call_later
+    from core.capture_arbiter import PRIORITY_MANUAL, get_capture_arbiter
+    from core.image_writer import shutdown_image_writer
+    from core.window_index import close_window_index
+    from core.camera_session import get_camera_session
+    from core import startup_profile
     # from PySide6.QtGui import QPainter, QPen, QBrush, QColor, QScreen, QPainterPath, QFont # Már importálva
 
 except ImportError as e:
@@ -82,7 +86,11 @@ except NameError:
 class MainWindow(QMainWindow):
     BASE_WINDOW_TITLE = "FOTO-Apparátus"
 
-    def __init__(self, parent=None, start_hidden=False, server_name=None):
+    # A háttérben futó mentés eredménye (útvonal, hibaüzenet) a főszálra továbbítva
+    test_picture_saved = Signal(str, str)
+
+    def __init__(self, parent=None, start_hidden=False, server_name=None, startup_started=None):
+        init_started = time.perf_counter()
         super().__init__(parent)
         logger.info(f"MainWindow inicializálása... Start hidden: {start_hidden}, Server name: {server_name}")
         logger.debug(f"Keresett egyedi ikon útvonal: {ICON_PATH}")
@@ -110,7 +118,11 @@ class MainWindow(QMainWindow):
         self._current_width = base_width
 
         self.config_manager = ConfigManager()
-        self.scheduler = Scheduler()
+        self.scheduler = Scheduler(
+            run_store_path=self.config_manager.run_store_path(),
+            journal_path=self.config_manager.journal_path(),
+            call_later=qt_call_later,
+        )
         self.settings = {}
         self.is_dirty = False
         self.selection_overlay = None
@@ -123,6 +135,49 @@ class MainWindow(QMainWindow):
         )
         self.settings["discord_settings"] = self.discord_settings
 
+        # Rejtett indításnál (automatikus indítás bejelentkezéskor) csak a tálca
+        # ikon, a helyi szerver és az ütemező indul; a felület az ablak első
+        # megjelenítésekor épül fel.
+        self._ui_built = False
+        if start_hidden:
+            logger.info("Rejtett indítás: a főablak felülete az első megjelenítéskor készül el.")
+        else:
+            self._build_ui()
+
+        self._create_tray_icon()
+
+        if server_name:
+            self._start_local_server(server_name)
+
+        startup_profile.mark("főablak, tálca ikon, helyi szerver")
+        try:
+             self.scheduler.start(self.settings)
+             logger.info(
+                 "Az ütemező fut, %.3f másodperccel az indítás után (rejtett indítás: %s).",
+                 time.perf_counter() - (startup_started if startup_started is not None else init_started),
+                 "igen" if start_hidden else "nem",
+             )
+             startup_profile.mark("ütemező indítása")
+        except Exception as e:
+             logger.exception("Hiba a scheduler indításakor:")
+             QMessageBox.critical(self, "Scheduler Hiba", f"Nem sikerült elindítani az időzítőt:\n{e}")
+        
+        if start_hidden and self.tray_icon.isVisible():
+            logger.info("Alkalmazás rejtve indul, üzenet a tálcán.")
+            self.tray_icon.showMessage(
+                "FOTO-Apparátus Indult", "Az alkalmazás a háttérben fut.",
+                QSystemTrayIcon.MessageIcon.Information, 3000
+            )
+        
+        self.statusBar().showMessage("Alkalmazás betöltve.", 3000)
+        logger.info("MainWindow inicializálása befejeződött.")
+
+    def _build_ui(self):
+        """Build the widget tree on first use (see ``start_hidden``)."""
+        if self._ui_built:
+            return
+        self._ui_built = True
+        build_started = time.perf_counter()
         central_widget = QWidget(self)
         self.setCentralWidget(central_widget)
         # Apply a Discord-like dark theme while keeping functionality intact
@@ -190,27 +245,13 @@ class MainWindow(QMainWindow):
         self._setup_ui()
         self._connect_signals()
         self._update_ui_from_settings()
-        
-        self._create_tray_icon()
-
-        if server_name:
-            self._start_local_server(server_name)
+        logger.info("Főablak felülete felépítve %.3f másodperc alatt.", time.perf_counter() - build_started)
 
-        try:
-             self.scheduler.start(self.settings)
-        except Exception as e:
-             logger.exception("Hiba a scheduler indításakor:")
-             QMessageBox.critical(self, "Scheduler Hiba", f"Nem sikerült elindítani az időzítőt:\n{e}")
-        
-        if start_hidden and self.tray_icon.isVisible():
-            logger.info("Alkalmazás rejtve indul, üzenet a tálcán.")
-            self.tray_icon.showMessage(
-                "FOTO-Apparátus Indult", "Az alkalmazás a háttérben fut.",
-                QSystemTrayIcon.MessageIcon.Information, 3000
-            )
-        
-        self.statusBar().showMessage("Alkalmazás betöltve.", 3000)
-        logger.info("MainWindow inicializálása befejeződött.")
+    def setVisible(self, visible):
+        # A show(), showNormal() stb. mind ide fut be.
+        if visible:
+            self._build_ui()
+        super().setVisible(visible)
 
     def _start_local_server(self, server_name):
         self.local_server = QLocalServer(self)
@@ -311,6 +352,8 @@ class MainWindow(QMainWindow):
             logger.info("Helyi szerver leállítása kilépéskor..."); self.local_server.close()
         if self.scheduler and self.scheduler.scheduler.running:
             logger.debug("Scheduler leállítása..."); self.scheduler.stop()
+        logger.debug("Képmentő sor kiürítése..."); shutdown_image_writer(wait=True)
+        close_window_index()
         if self.tray_icon: logger.debug("Tálca ikon elrejtése..."); self.tray_icon.hide()
         logger.info("QApplication.quit() hívása."); QApplication.instance().quit()
         
@@ -328,8 +371,10 @@ class MainWindow(QMainWindow):
         capture_layout = QVBoxLayout(self.capture_group)
         self.radio_capture_screenshot = QRadioButton("Képernyőkép")
         self.radio_capture_program = QRadioButton("Programkép")
+        self.radio_capture_photo = QRadioButton("Webkamera fotó")
         capture_layout.addWidget(self.radio_capture_screenshot)
         capture_layout.addWidget(self.radio_capture_program)
+        capture_layout.addWidget(self.radio_capture_photo)
         discord_row_widget = QWidget()
         discord_row_layout = QHBoxLayout(discord_row_widget)
         discord_row_layout.setContentsMargins(0, 0, 0, 0)
@@ -343,6 +388,7 @@ class MainWindow(QMainWindow):
         self.capture_mode_group.setExclusive(True)
         self.capture_mode_group.addButton(self.radio_capture_screenshot)
         self.capture_mode_group.addButton(self.radio_capture_program)
+        self.capture_mode_group.addButton(self.radio_capture_photo)
         self.capture_mode_group.addButton(self.radio_capture_discord)
         self.radio_capture_screenshot.setChecked(True)
         self.btn_discord_settings.setEnabled(False)
@@ -394,9 +440,11 @@ class MainWindow(QMainWindow):
         self.size_widget.select_area_requested.connect(self._start_area_selection)
         self.radio_capture_screenshot.toggled.connect(self._handle_capture_type_change)
         self.radio_capture_program.toggled.connect(self._handle_capture_type_change)
+        self.radio_capture_photo.toggled.connect(self._handle_capture_type_change)
         self.radio_capture_discord.toggled.connect(self._handle_capture_type_change)
         self.btn_discord_settings.clicked.connect(self._open_discord_settings)
         self.test_button.clicked.connect(self._take_test_picture)
+        self.test_picture_saved.connect(self._handle_test_picture_saved)
         if hasattr(self, 'window_selector'):
             self.window_selector.selection_changed.connect(lambda _: self._mark_dirty())
         self.timer_list.list_changed.connect(self._mark_dirty)
@@ -412,15 +460,19 @@ class MainWindow(QMainWindow):
             except Exception as e: logger.exception("Hiba az autostart_checkbox csatlakoztatásakor:")
         logger.debug("_connect_signals Befejeződött.")
 
+    def _selected_capture_type(self):
+        if self.radio_capture_discord.isChecked():
+            return "discord"
+        if self.radio_capture_program.isChecked():
+            return "program"
+        if self.radio_capture_photo.isChecked():
+            return "photo"
+        return "screenshot"
+
     @Slot()
     def _handle_capture_type_change(self):
         prev_width = self._current_width
-        if self.radio_capture_discord.isChecked():
-            capture_type = "discord"
-        elif self.radio_capture_program.isChecked():
-            capture_type = "program"
-        else:
-            capture_type = "screenshot"
+        capture_type = self._selected_capture_type()
         size_enabled = capture_type in ("screenshot", "discord")
         window_enabled = capture_type == "program"
         self.size_widget.setEnabled(size_enabled)
@@ -454,17 +506,14 @@ class MainWindow(QMainWindow):
     def _take_test_picture(self):
         logger.info("Teszt gomb megnyomva, azonnali képkészítés indítása.")
         self.test_button.setEnabled(False)
+        capture_pending = False
         try:
             save_path = self.settings.get("save_path", "")
             if not save_path:
                 QMessageBox.warning(self, "Hiányzó adat", "Nincs mentési mappa!")
                 return
 
-            capture_type = (
-                "discord" if self.radio_capture_discord.isChecked() else (
-                    "program" if self.radio_capture_program.isChecked() else "screenshot"
-                )
-            )
+            capture_type = self._selected_capture_type()
             include_timestamp = self.timestamp_checkbox.isChecked() if hasattr(self, "timestamp_checkbox") else True
             timestamp_position = self.timestamp_widget.get_settings()[1] if hasattr(self, "timestamp_widget") else "top-left"
 
@@ -483,7 +532,10 @@ class MainWindow(QMainWindow):
                     if rect.isValid():
                         area = rect
 
-                img = take_discord_screenshot(
+                # A képkészítő modulok az első tesztképnél töltődnek be.
+                from core.discord_capture import DiscordCaptureJob
+
+                job = DiscordCaptureJob(
                     save_path,
                     "Teszt",
                     area,
@@ -493,7 +545,27 @@ class MainWindow(QMainWindow):
                     use_hotkey=ds.get("use_hotkey", False),
                     hotkey_number=ds.get("hotkey_number", 1),
                     window_title=ds.get("window_title", "Discord"),
+                    delay_after_hotkey=ds.get("delay_after_hotkey", 10.0),
+                    wait_until_stable=ds.get("wait_until_stable", False),
+                    stable_frames=ds.get("stable_frames", 3),
+                    stable_tolerance=ds.get("stable_tolerance", 1.5),
+                    call_later=qt_call_later,
+                    timestamp_style=self.settings.get("timestamp_style"),
+                    on_finished=self._handle_test_picture_finished,
+                    on_saved=self._emit_test_picture_saved,
+                    output_format=self.settings.get("output_format"),
+                    priority=PRIORITY_MANUAL,
                 )
+                job.start()
+                capture_pending = True
+                return
+            elif capture_type == "photo":
+                # A kamera megnyitása másodpercekig tarthat: külön szálon fut.
+                threading.Thread(
+                    target=self._take_test_photo, args=(save_path,), name="TestPhoto", daemon=True
+                ).start()
+                capture_pending = True
+                return
             else:
                 area = None
                 if capture_type == "screenshot":
@@ -503,6 +575,21 @@ class MainWindow(QMainWindow):
                         if rect.isValid():
                             area = rect
                 window_title = self.window_selector.get_selected_title() if capture_type == "program" else ""
+                if capture_type == "program":
+                    # Az előtérre várva nem blokkolhatjuk a főszálat: egy épp futó
+                    # Discord feladat is itt halad előre. Sorra kerüléskor indul.
+                    capture_args = (save_path, include_timestamp, timestamp_position, window_title)
+                    get_capture_arbiter().request(
+                        f"program:{window_title}",
+                        PRIORITY_MANUAL,
+                        on_granted=lambda ticket: qt_call_later(
+                            0.0, lambda: self._take_test_program_picture(ticket, *capture_args)
+                        ),
+                    )
+                    capture_pending = True
+                    return
+                from core.screenshot_taker import take_screenshot
+
                 img = take_screenshot(
                     save_path,
                     "Teszt",
@@ -511,14 +598,79 @@ class MainWindow(QMainWindow):
                     timestamp_position,
                     window_title,
                     capture_type,
+                    timestamp_style=self.settings.get("timestamp_style"),
+                    on_saved=self._emit_test_picture_saved,
+                    output_format=self.settings.get("output_format"),
                 )
 
-            if img is None:
-                QMessageBox.warning(self, "Hiba", "Nem sikerült képet készíteni.")
-            else:
-                self.statusBar().showMessage("Tesztkép elkészült.", 3000)
+            self._handle_test_picture_finished(img)
+        finally:
+            if not capture_pending:
+                self.test_button.setEnabled(True)
+
+    def _take_test_program_picture(self, ticket, save_path, include_timestamp, timestamp_position, window_title):
+        from core.screenshot_taker import take_screenshot
+
+        img = None
+        try:
+            img = take_screenshot(
+                save_path,
+                "Teszt",
+                None,
+                include_timestamp,
+                timestamp_position,
+                window_title,
+                "program",
+                timestamp_style=self.settings.get("timestamp_style"),
+                on_saved=self._emit_test_picture_saved,
+                output_format=self.settings.get("output_format"),
+                foreground_ticket=ticket,
+            )
+        except Exception:
+            logger.exception("Hiba a teszt képkészítés közben.")
         finally:
-            self.test_button.setEnabled(True)
+            ticket.release()
+            self._handle_test_picture_finished(img)
+
+    def _take_test_photo(self, save_path):
+        from core.photo_taker import take_photo
+
+        path = None
+        try:
+            path = take_photo(
+                save_path,
+                "Teszt",
+                self.settings.get("output_format"),
+                session=get_camera_session(self.settings.get("camera")),
+                on_saved=self._emit_test_picture_saved,
+            )
+        except Exception:
+            logger.exception("Hiba a teszt fotó közben.")
+        finally:
+            qt_call_later(0.0, lambda: self._handle_test_picture_finished(path))
+
+    def _handle_test_picture_finished(self, img):
+        self.test_button.setEnabled(True)
+        if img is None:
+            QMessageBox.warning(self, "Hiba", "Nem sikerült képet készíteni.")
+        else:
+            self.statusBar().showMessage("Tesztkép elkészült, mentés folyamatban...")
+
+    def _emit_test_picture_saved(self, future):
+        # A képmentő szálon fut, ezért jelzéssel adjuk át a főszálnak.
+        error = future.exception()
+        result = None if error else future.result()
+        if result is not None and result.error:
+            error = result.error
+        path = result.path if result is not None and result.path else ""
+        self.test_picture_saved.emit("" if error else path, str(error) if error else "")
+
+    @Slot(str, str)
+    def _handle_test_picture_saved(self, path, error):
+        if error:
+            QMessageBox.warning(self, "Hiba", f"Nem sikerült menteni a tesztképet:\n{error}")
+        else:
+            self.statusBar().showMessage(f"Tesztkép elmentve: {path}", 3000)
 
 
     def _update_ui_from_settings(self):
@@ -530,6 +682,8 @@ class MainWindow(QMainWindow):
             self.radio_capture_program.setChecked(True)
         elif capture_loaded == "discord":
             self.radio_capture_discord.setChecked(True)
+        elif capture_loaded == "photo":
+            self.radio_capture_photo.setChecked(True)
         else:
             self.radio_capture_screenshot.setChecked(True)
         self._handle_capture_type_change()
@@ -665,9 +819,7 @@ class MainWindow(QMainWindow):
 
         new_settings = {
             "save_path": save_path,
-            "capture_type": "discord" if self.radio_capture_discord.isChecked() else (
-                "program" if self.radio_capture_program.isChecked() else "screenshot"
-            ),
+            "capture_type": self._selected_capture_type(),
             "screenshot_mode": mode,
             "custom_area": custom_area_dict_to_save,
             "target_window": self.window_selector.get_selected_title() if hasattr(self, 'window_selector') else "",
@@ -677,6 +829,8 @@ class MainWindow(QMainWindow):
             "timestamp_position": self.timestamp_widget.get_settings()[1] if hasattr(self, "timestamp_widget") else "top-left",
             "discord_settings": self.discord_settings,
         }
+        # A felületen nem szerkeszthető kulcsok (pl. output_format) megőrzése
+        new_settings = {**self.settings, **new_settings}
         logger.info(f"Teljes mentendő new_settings: {new_settings}")
         try:
             if self.config_manager.save_settings(new_settings):
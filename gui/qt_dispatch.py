@@ -0,0 +1,19 @@
+# gui/qt_dispatch.py
+
+from PySide6.QtCore import QCoreApplication, QTimer
+
+
+def qt_call_later(delay_seconds, callback):
+    """Időzítő alapú késleltetett hívás a főszál Qt eseményciklusában.
+
+    Bármely szálról hívható: az alkalmazáspéldány mint környezeti objektum
+    biztosítja, hogy a ``callback`` a főszálon fusson (az előtér-sorból
+    kiosztott Discord feladatok indítása pl. a felszabadító szálról érkezik).
+    Ez a ``call_later`` megvalósítás, amelyet a GUI a Qt-mentes
+    :class:`core.scheduler.Scheduler`-nek és a Discord feladatoknak átad.
+    """
+    app = QCoreApplication.instance()
+    if app is not None:
+        QTimer.singleShot(int(round(delay_seconds * 1000)), app, callback)
+    else:
+        QTimer.singleShot(int(round(delay_seconds * 1000)), callback)
@@ -34,14 +34,15 @@ class TimerListWidget(QWidget):
         header_layout.addWidget(header_label)
         header_layout.addStretch(1) # Helykitöltő
         self.add_button = QPushButton("+ Új időzítő")
-        self.add_button.setToolTip("Új időzítési szabály hozzáadása")
+        self.add_button.setToolTip("Új időzítési szabály hozzáadása (időpont, intervallum vagy cron)")
         header_layout.addWidget(self.add_button)
         self.main_layout.addLayout(header_layout)
 
         # --- Gördíthető terület a soroknak ---
         self.scroll_area = QScrollArea()
         self.scroll_area.setWidgetResizable(True) # Fontos, hogy a belső widget méreteződjön
-        self.scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        # Az intervallum/cron mezők miatt egy sor szélesebb lehet az ablaknál
+        self.scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
         self.scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
         self.scroll_area.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
 
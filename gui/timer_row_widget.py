@@ -8,10 +8,17 @@ from PySide6.QtWidgets import (
     QPushButton,
     QLabel,
     QSpacerItem,
-    QSizePolicy
+    QSizePolicy,
+    QComboBox,
+    QSpinBox,
+    QLineEdit,
 )
 from PySide6.QtCore import Signal, Slot, QTime
 
+from core.config_manager import ConfigManager
+from core.image_formats import OUTPUT_FORMAT_PRESETS, normalize_output_format
+from core.triggers import KIND_CRON, KIND_DAILY, KIND_INTERVAL
+
 class TimerRowWidget(QWidget):
     """
     Egy sort reprezentáló widget az időzítő beállításához (időpont, napok).
@@ -25,6 +32,9 @@ class TimerRowWidget(QWidget):
     # Napok rövidítései és sorrendje
     DAYS = ["H", "K", "Sze", "Cs", "P", "Szo", "V"]
 
+    # Ütemezéstípusok a legördülő listában: (felirat, típus)
+    KINDS = [("Időpont", KIND_DAILY), ("Intervallum", KIND_INTERVAL), ("Cron", KIND_CRON)]
+
     def __init__(self, initial_time=None, initial_days=None, parent=None):
         """
         Inicializálja az időzítő sor widgetet.
@@ -37,10 +47,20 @@ class TimerRowWidget(QWidget):
         """
         super().__init__(parent)
 
+        # Stabil azonosító: az ütemező ez alapján ismeri fel a változatlan sorokat
+        self.schedule_id = ConfigManager.new_schedule_id()
+
         # Fő vízszintes elrendezés
         self.main_layout = QHBoxLayout(self)
         self.main_layout.setContentsMargins(0, 5, 0, 5) # Kis függőleges margó
 
+        # Ütemezés típusa
+        self.kind_combo = QComboBox()
+        for label, kind in self.KINDS:
+            self.kind_combo.addItem(label, kind)
+        self.kind_combo.setToolTip("Napi időpont, másodperces intervallum vagy cron kifejezés")
+        self.main_layout.addWidget(self.kind_combo)
+
         # Időpont választó
         self.time_edit = QTimeEdit()
         self.time_edit.setDisplayFormat("HH:mm")
@@ -50,6 +70,32 @@ class TimerRowWidget(QWidget):
             self.time_edit.setTime(QTime.currentTime()) # Alapértelmezett: aktuális idő
         self.main_layout.addWidget(self.time_edit)
 
+        # Intervallum: N másodpercenként, opcionálisan egy napi időablakon belül
+        self.interval_spin = QSpinBox()
+        self.interval_spin.setRange(1, 24 * 3600)
+        self.interval_spin.setValue(60)
+        self.interval_spin.setSuffix(" mp")
+        self.interval_spin.setToolTip("Ennyi másodpercenként készül kép (a falióra szerint igazítva)")
+        self.main_layout.addWidget(self.interval_spin)
+        self.window_checkbox = QCheckBox("Ablak:")
+        self.window_checkbox.setToolTip(
+            "Csak a megadott napi időablakban. Ha a vége nem későbbi a kezdeténél "
+            "(pl. 22:00-06:00), az ablak éjfélen át a következő napig tart."
+        )
+        self.main_layout.addWidget(self.window_checkbox)
+        self.window_start_edit = QTimeEdit(QTime(8, 0))
+        self.window_start_edit.setDisplayFormat("HH:mm")
+        self.main_layout.addWidget(self.window_start_edit)
+        self.window_end_edit = QTimeEdit(QTime(18, 0))
+        self.window_end_edit.setDisplayFormat("HH:mm")
+        self.main_layout.addWidget(self.window_end_edit)
+
+        # Cron kifejezés másodperc mezővel
+        self.cron_edit = QLineEdit()
+        self.cron_edit.setPlaceholderText("mp perc óra nap hónap hétnap, pl. */30 * 8-17 * * mon-fri")
+        self.cron_edit.setMinimumWidth(220)
+        self.main_layout.addWidget(self.cron_edit)
+
         # Elválasztó
         self.main_layout.addSpacing(15)
 
@@ -65,6 +111,16 @@ class TimerRowWidget(QWidget):
             # Jelzés összekötése
             checkbox.stateChanged.connect(self._on_settings_changed)
 
+        # Kimeneti formátum (üres adat = a globális beállítás érvényes)
+        self.main_layout.addSpacing(10)
+        self.format_combo = QComboBox()
+        self.format_combo.setToolTip("A mentett kép formátuma ennél az időzítőnél")
+        self.format_combo.addItem("Alapértelmezett", None)
+        for label, preset in OUTPUT_FORMAT_PRESETS:
+            self.format_combo.addItem(label, normalize_output_format(preset))
+        self.format_combo.currentIndexChanged.connect(self._on_settings_changed)
+        self.main_layout.addWidget(self.format_combo)
+
         # Térkitöltő, hogy a törlés gomb jobbra tolódjon
         self.main_layout.addStretch(1)
 
@@ -76,9 +132,33 @@ class TimerRowWidget(QWidget):
 
         # Jelek összekötése
         self.time_edit.timeChanged.connect(self._on_settings_changed)
+        self.kind_combo.currentIndexChanged.connect(self._on_kind_changed)
+        self.interval_spin.valueChanged.connect(self._on_settings_changed)
+        self.window_checkbox.stateChanged.connect(self._on_kind_changed)
+        self.window_start_edit.timeChanged.connect(self._on_settings_changed)
+        self.window_end_edit.timeChanged.connect(self._on_settings_changed)
+        self.cron_edit.editingFinished.connect(self._on_settings_changed)
         self.remove_button.clicked.connect(self._on_remove_clicked)
 
         self.setLayout(self.main_layout)
+        self._update_kind_visibility()
+
+    def _update_kind_visibility(self):
+        """Csak az aktuális ütemezéstípushoz tartozó mezőket mutatja."""
+        kind = self.kind_combo.currentData()
+        self.time_edit.setVisible(kind == KIND_DAILY)
+        for widget in (self.interval_spin, self.window_checkbox, self.window_start_edit, self.window_end_edit):
+            widget.setVisible(kind == KIND_INTERVAL)
+        self.window_start_edit.setEnabled(self.window_checkbox.isChecked())
+        self.window_end_edit.setEnabled(self.window_checkbox.isChecked())
+        self.cron_edit.setVisible(kind == KIND_CRON)
+        for checkbox in self.day_checkboxes.values():
+            checkbox.setVisible(kind != KIND_CRON)
+
+    @Slot()
+    def _on_kind_changed(self):
+        self._update_kind_visibility()
+        self._on_settings_changed()
 
     @Slot()
     def _on_settings_changed(self):
@@ -99,11 +179,32 @@ class TimerRowWidget(QWidget):
 
         Returns:
             dict: A beállításokat tartalmazó szótár, pl.:
-                  {'time': '14:35', 'days': ['H', 'Sze', 'P']}
+                  {'id': '3f2a...', 'time': '14:35', 'days': ['H', 'Sze', 'P']}
+                  Egyedi formátum esetén 'output_format' kulccsal kiegészítve.
         """
         selected_time = self.time_edit.time().toString("HH:mm")
         selected_days = [day for day, checkbox in self.day_checkboxes.items() if checkbox.isChecked()]
-        return {"time": selected_time, "days": selected_days}
+        kind = self.kind_combo.currentData()
+        if kind == KIND_INTERVAL:
+            settings = {
+                "id": self.schedule_id,
+                "kind": KIND_INTERVAL,
+                "every_seconds": self.interval_spin.value(),
+                "days": selected_days,
+            }
+            if self.window_checkbox.isChecked():
+                settings["window"] = {
+                    "start": self.window_start_edit.time().toString("HH:mm"),
+                    "end": self.window_end_edit.time().toString("HH:mm"),
+                }
+        elif kind == KIND_CRON:
+            settings = {"id": self.schedule_id, "kind": KIND_CRON, "cron": self.cron_edit.text().strip()}
+        else:
+            settings = {"id": self.schedule_id, "time": selected_time, "days": selected_days}
+        output_format = self.format_combo.currentData()
+        if output_format:
+            settings["output_format"] = dict(output_format)
+        return settings
 
     def set_settings(self, settings_dict):
         """
@@ -114,7 +215,11 @@ class TimerRowWidget(QWidget):
                                   pl. {'time': '09:00', 'days': ['Szo', 'V']}
         """
         try:
-            # Idő beállítása
+            # Az azonosító megtartása, hogy mentéskor ne számítson új szabálynak
+            if settings_dict.get("id"):
+                self.schedule_id = str(settings_dict["id"])
+
+            # Idő beállítása (intervallum és cron szabálynál nincs 'time' kulcs)
             time_str = settings_dict.get("time", "00:00")
             qtime = QTime.fromString(time_str, "HH:mm")
             if qtime.isValid():
@@ -128,6 +233,22 @@ class TimerRowWidget(QWidget):
             for day_abbr, checkbox in self.day_checkboxes.items():
                 checkbox.setChecked(day_abbr in selected_days)
 
+            # Intervallum és cron mezők
+            self.interval_spin.setValue(int(settings_dict.get("every_seconds", 60) or 60))
+            window = settings_dict.get("window") or {}
+            self.window_checkbox.setChecked(bool(window))
+            for edit, key in ((self.window_start_edit, "start"), (self.window_end_edit, "end")):
+                qtime = QTime.fromString(window.get(key, ""), "HH:mm")
+                if qtime.isValid():
+                    edit.setTime(qtime)
+            self.cron_edit.setText(settings_dict.get("cron", ""))
+            kind_index = self.kind_combo.findData(settings_dict.get("kind") or KIND_DAILY)
+            self.kind_combo.setCurrentIndex(max(0, kind_index))
+            self._update_kind_visibility()
+
+            # Kimeneti formátum beállítása
+            self._set_output_format(settings_dict.get("output_format"))
+
             # A beállítások programatikus megváltoztatása is kiváltja a changed jeleket,
             # de ez általában nem probléma. Ha mégis, akkor a jelek átmeneti blokkolása/feloldása
             # (self.time_edit.blockSignals(True/False)) lehet egy megoldás.
@@ -135,6 +256,19 @@ class TimerRowWidget(QWidget):
         except Exception as e:
             print(f"Hiba a TimerRowWidget beállításakor: {e}")
 
+    def _set_output_format(self, output_format):
+        """Kiválasztja a formátumnak megfelelő elemet, szükség esetén 'Egyéni' elemmel."""
+        if not output_format:
+            self.format_combo.setCurrentIndex(0)
+            return
+        normalized = normalize_output_format(output_format)
+        for index in range(1, self.format_combo.count()):
+            if self.format_combo.itemData(index) == normalized:
+                self.format_combo.setCurrentIndex(index)
+                return
+        self.format_combo.addItem(f"Egyéni ({normalized['format']})", normalized)
+        self.format_combo.setCurrentIndex(self.format_combo.count() - 1)
+
 
 # Egyszerű teszteléshez
 if __name__ == '__main__':
@@ -14,14 +14,7 @@ from PySide6.QtCore import Signal
 import platform
 import re
 
-_import_error = False
-gw = None
-
-if platform.system() == "Windows":
-    try:
-        import pygetwindow as gw  # type: ignore
-    except Exception:
-        _import_error = True
+from core.window_index import get_window_index
 
 
 class WindowSelectorWidget(QWidget):
@@ -40,9 +33,11 @@ class WindowSelectorWidget(QWidget):
 
         group_layout = QVBoxLayout(group_box)
 
-        if gw is None:
-            if _import_error:
-                message = "Hiányzik a pygetwindow modul"
+        # Ugyanaz az ablakindex, amelyet a képkészítés is használ
+        self.window_index = get_window_index()
+        if not self.window_index.available:
+            if platform.system() == "Windows":
+                message = "Hiányzik a pywin32 modul"
             else:
                 message = "Nem támogatott rendszer"
             self.info_label = QLabel(message)
@@ -57,7 +52,7 @@ class WindowSelectorWidget(QWidget):
         combo_layout.addWidget(self.refresh_button)
         group_layout.addLayout(combo_layout)
 
-        self.refresh_button.clicked.connect(self.refresh_list)
+        self.refresh_button.clicked.connect(lambda: self.refresh_list(force=True))
         self.combo.currentTextChanged.connect(self._emit_change)
 
         self.refresh_list()
@@ -66,16 +61,17 @@ class WindowSelectorWidget(QWidget):
         parts = re.split(r" - |\|", title)
         return parts[-1].strip()
 
-    def refresh_list(self):
-        if self.combo is None or gw is None:
+    def refresh_list(self, force=False):
+        if self.combo is None:
             return
         current = self.get_selected_title()
         self.combo.blockSignals(True)
         self.combo.clear()
         self.combo.addItem("", "")
         try:
-            windows = [w for w in gw.getAllWindows() if w.title.strip()]
-            for w in windows:
+            if force:
+                self.window_index.refresh()
+            for w in self.window_index.windows():
                 simple = self._simplify_title(w.title)
                 self.combo.addItem(w.title, simple)
         except Exception:
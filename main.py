@@ -1,9 +1,13 @@
 # main.py
 
+import time
+
+# Az indítás óta eltelt idő méréséhez (az ütemező elindulásáig)
+_STARTED = time.perf_counter()
+
 import sys
 import os
 import logging
-from logging.handlers import RotatingFileHandler
 
 # Sys.path módosítás a biztonság kedvéért (főleg EXE-hez)
 try:
@@ -16,38 +20,40 @@ try:
 except Exception:
     pass
 
-from PySide6.QtCore import QCoreApplication
+# Az indítási profilozásnak a nehéz importok előtt kell elindulnia.
+from core import startup_profile
+if startup_profile.PROFILE_FLAG in sys.argv:
+    startup_profile.start()
+
+from PySide6.QtCore import QCoreApplication, QTimer
 from PySide6.QtWidgets import QApplication
 from PySide6.QtNetwork import QLocalSocket, QLocalServer
 from gui.main_window import MainWindow
+from core.logging_setup import setup_logging
 
 ORG_NAME = "UMKGL Solutions"
 APP_NAME = "FOTOapp"
 SERVER_NAME = f"{APP_NAME}_InstanceServer_UniqueId12345"
 
+startup_profile.mark("modulok importálása")
+
+
+def _report_startup_profile():
+    report = startup_profile.finish("első eseményciklus")
+    if report:
+        logging.info("\n%s", report)
+
+
 def main():
     # A QApplication példányosítása a legelső dolog!
     # Ez kulcsfontosságú a stílusok helyes betöltéséhez.
     app = QApplication(sys.argv)
+    startup_profile.mark("QApplication")
+
+    # Logging beállítása CSAK az app létrehozása után (a démonnal közös beállítás)
+    setup_logging()
+    startup_profile.mark("naplózás beállítása")
 
-    # Logging beállítása CSAK az app létrehozása után
-    log_dir = os.path.join(os.path.expanduser("~"), "Documents", ORG_NAME, APP_NAME, "logs")
-    os.makedirs(log_dir, exist_ok=True)
-    log_file_path = os.path.join(log_dir, "fotoapp.log")
-    
-    file_handler = RotatingFileHandler(
-        log_file_path,
-        maxBytes=10 * 1024 * 1024,
-        backupCount=0,
-        encoding='utf-8',
-    )
-    stream_handler = logging.StreamHandler(sys.stdout)
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[file_handler, stream_handler],
-    )
-    
     QCoreApplication.setOrganizationName(ORG_NAME)
     QCoreApplication.setApplicationName(APP_NAME)
     app.setQuitOnLastWindowClosed(False)
@@ -63,6 +69,7 @@ def main():
         sys.exit(0)
     
     logging.info("Ez az első példány, szerver indul.")
+    startup_profile.mark("egypéldányos ellenőrzés")
     
     # Rejtett indítás ellenőrzése
     start_hidden = "--start-hidden" in sys.argv
@@ -70,9 +77,15 @@ def main():
         logging.info("Indítás rejtett módban.")
 
     # A főablak létrehozása és futtatás
-    main_window = MainWindow(start_hidden=start_hidden, server_name=SERVER_NAME)
+    main_window = MainWindow(start_hidden=start_hidden, server_name=SERVER_NAME, startup_started=_STARTED)
+    startup_profile.mark("főablak létrehozásának vége")
     if not start_hidden:
         main_window.show()
+        startup_profile.mark("főablak megjelenítése")
+
+    if startup_profile.active():
+        # Az első eseményciklus-iteráció után (az ablak kirajzolása is ide esik)
+        QTimer.singleShot(0, _report_startup_profile)
 
     sys.exit(app.exec())
 
@@ -0,0 +1,173 @@
+"""CameraSession against the hardware-free SyntheticCamera."""
+
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from core import camera_session
+from core.camera_session import (
+    CameraError,
+    CameraSession,
+    SyntheticCamera,
+    benchmark,
+    close_all_sessions,
+    get_camera_session,
+    mean_brightness,
+)
+
+
+class CameraFactory:
+    """Camera source that records every SyntheticCamera it opens."""
+
+    def __init__(self, **options):
+        self.options = {"open_delay": 0.0, "fps": 0.0, **options}
+        self.cameras = []
+
+    def __call__(self):
+        camera = SyntheticCamera(**self.options)
+        self.cameras.append(camera)
+        return camera
+
+
+def test_warmup_discards_frames_until_exposure_settles():
+    factory = CameraFactory(exposure_ramp_frames=8, target_level=128)
+    session = CameraSession(
+        factory, idle_timeout=0, warmup_frames=2, warmup_until_stable=True, stable_frames=3, exposure_tolerance=2.0
+    )
+
+    frame = session.grab()
+
+    # A 8. képkockától állandó a fényerő, a 3 egyforma a 10.-nél teljes
+    assert session.last_warmup_frames == 10
+    settled = SyntheticCamera(open_delay=0, fps=0, exposure_ramp_frames=1).read()[1]
+    assert mean_brightness(frame) == pytest.approx(mean_brightness(settled), abs=1)
+    assert {"camera_open", "warmup", "grab"} <= set(session.last_stages)
+
+
+def test_warmup_frame_count_only():
+    session = CameraSession(CameraFactory(), idle_timeout=0, warmup_frames=3, warmup_until_stable=False)
+
+    session.grab()
+
+    assert session.last_warmup_frames == 3
+
+
+def test_idle_timeout_closes_and_next_grab_reopens():
+    factory = CameraFactory()
+    session = CameraSession(factory, idle_timeout=0.05, warmup_frames=0, warmup_until_stable=False)
+
+    session.grab()
+    assert session.is_open
+    session.grab()
+    assert session.opens == 1
+
+    deadline = time.monotonic() + 2.0
+    while session.is_open and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not session.is_open
+    assert not factory.cameras[0].isOpened()
+
+    session.grab()
+    assert session.opens == 2
+    session.close()
+
+
+def test_zero_idle_timeout_closes_after_every_grab():
+    session = CameraSession(CameraFactory(), idle_timeout=0, warmup_frames=0, warmup_until_stable=False)
+
+    session.grab()
+
+    assert not session.is_open
+
+
+def test_failed_read_reopens_camera():
+    factory = CameraFactory(fail_after=1)
+    session = CameraSession(factory, idle_timeout=10, warmup_frames=0, warmup_until_stable=False)
+
+    session.grab()
+    frame = session.grab()
+
+    assert frame is not None
+    assert session.opens == 2
+    assert session.read_failures == 1
+    assert not factory.cameras[0].isOpened()
+    session.close()
+
+
+def test_camera_that_never_delivers_raises():
+    factory = CameraFactory(fail_after=0)
+    session = CameraSession(factory, idle_timeout=10, warmup_frames=0, warmup_until_stable=False, reopen_attempts=2)
+
+    with pytest.raises(CameraError):
+        session.grab()
+    assert session.opens == 3
+    assert not session.is_open
+
+
+def test_grab_after_pause_flushes_stale_frames():
+    interval = 1 / 30
+    factory = CameraFactory(fps=30, buffer_size=4)
+    session = CameraSession(factory, idle_timeout=10, warmup_frames=0, warmup_until_stable=False)
+    session.grab()
+
+    time.sleep(0.3)
+    started = time.perf_counter()
+    session.grab()
+
+    # A sorban álló legrégebbi képkocka ~4 képkockányi idős lenne
+    assert started - factory.cameras[0].last_frame_time < 2 * interval
+    assert session.last_flushed_frames > 0
+    assert "flush" in session.last_stages
+    session.close()
+
+
+def test_without_flush_grab_after_pause_returns_stale_frame():
+    factory = CameraFactory(fps=30, buffer_size=4)
+    session = CameraSession(factory, idle_timeout=10, warmup_frames=0, warmup_until_stable=False, flush_frames=0)
+    session.grab()
+
+    time.sleep(0.3)
+    started = time.perf_counter()
+    session.grab()
+
+    assert started - factory.cameras[0].last_frame_time > 3 / 30
+    session.close()
+
+
+def test_burst_returns_quality():
+    pytest.importorskip("cv2")
+    session = CameraSession(
+        CameraFactory(), idle_timeout=0, warmup_frames=0, warmup_until_stable=False, burst_frames=3, burst_window=0
+    )
+
+    frame, quality = session.grab_best()
+
+    assert frame is not None
+    assert quality["burst_frames"] == 3
+    assert 0 <= quality["frame_index"] < 3
+
+
+def test_close_all_sessions_releases_shared_cameras(monkeypatch):
+    monkeypatch.setattr(camera_session, "_sessions", {})
+    factory = CameraFactory()
+    settings = {"source": factory, "idle_timeout": 10, "warmup_frames": 0, "warmup_until_stable": False}
+    session = get_camera_session(settings)
+    assert get_camera_session(settings) is session
+    session.grab()
+
+    assert close_all_sessions() == 1
+    assert not session.is_open
+    assert not factory.cameras[0].isOpened()
+    assert get_camera_session(settings) is not session
+    assert close_all_sessions() == 0
+
+
+def test_benchmark_warm_session_beats_open_per_photo():
+    factory = CameraFactory(open_delay=0.02)
+
+    report = benchmark(factory, shots=3, settings={"warmup_frames": 0, "warmup_until_stable": False, "idle_timeout": 10})
+
+    assert report["shots"] == 3
+    assert report["session_warm"]["median"] < report["per_call_open"]["median"]
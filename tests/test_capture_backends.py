@@ -0,0 +1,118 @@
+"""Backend selection of core.capture_backends, without a display."""
+
+import threading
+import time
+
+import pytest
+
+from core import capture_backends
+from core.capture_backends import BackendSelector, CaptureBackend, SyntheticBackend
+from core.frame_pool import release_frame
+
+REGION = (0, 0, 64, 48)
+
+
+class GuiBoundBackend(SyntheticBackend):
+    """Like ``qscreen`` from a worker thread: every grab waits for the "GUI thread"."""
+
+    name = "guibound"
+    gui_idle = threading.Event()
+    grabs_started = threading.Event()
+
+    def grab(self, region):
+        self.grabs_started.set()
+        if not self.gui_idle.wait(2.0):
+            raise TimeoutError("a GUI szál nem válaszolt")
+        return super().grab(region)
+
+
+class BrokenBackend(CaptureBackend):
+    name = "broken"
+
+    def grab(self, region):
+        raise RuntimeError("nincs kijelző")
+
+
+@pytest.fixture
+def backends(monkeypatch):
+    monkeypatch.setitem(capture_backends.BACKEND_TYPES, GuiBoundBackend.name, GuiBoundBackend)
+    monkeypatch.setitem(capture_backends.BACKEND_TYPES, BrokenBackend.name, BrokenBackend)
+    monkeypatch.setattr(capture_backends, "AUTO_CANDIDATES", [GuiBoundBackend.name, BrokenBackend.name])
+    monkeypatch.setattr(capture_backends, "FALLBACK_BACKEND", SyntheticBackend.name)
+    GuiBoundBackend.gui_idle.clear()
+    GuiBoundBackend.grabs_started.clear()
+
+
+def test_grab_during_selection_does_not_wait_for_benchmark(backends):
+    selector = BackendSelector(rounds=1)
+    warm_up = threading.Thread(target=selector.warm_up, args=([REGION],))
+    warm_up.start()
+    assert GuiBoundBackend.grabs_started.wait(2.0)
+
+    # A "GUI szál" képet kér, miközben a mérés rá vár
+    started = time.perf_counter()
+    frame = selector.grab(REGION)
+    elapsed = time.perf_counter() - started
+    GuiBoundBackend.gui_idle.set()
+    warm_up.join(5.0)
+
+    assert elapsed < 1.0
+    assert frame.size == (64, 48)
+    release_frame(frame)
+    assert selector.choices() == {"64x48": GuiBoundBackend.name}
+
+
+def test_broken_backends_are_skipped(backends):
+    GuiBoundBackend.gui_idle.set()
+    selector = BackendSelector(rounds=1)
+
+    assert selector.backend_for(REGION).name == GuiBoundBackend.name
+
+
+def test_pinned_backend_that_fails_falls_back_to_benchmark(backends):
+    GuiBoundBackend.gui_idle.set()
+    selector = BackendSelector(preferred=BrokenBackend.name, rounds=1)
+
+    assert selector.backend_for(REGION).name == GuiBoundBackend.name
+
+
+def test_configure_during_selection_discards_stale_choice(backends):
+    selector = BackendSelector(rounds=1)
+    warm_up = threading.Thread(target=selector.warm_up, args=([REGION],))
+    warm_up.start()
+    assert GuiBoundBackend.grabs_started.wait(2.0)
+
+    selector.configure(SyntheticBackend.name)
+    GuiBoundBackend.gui_idle.set()
+    warm_up.join(5.0)
+
+    assert selector.backend_for(REGION).name == SyntheticBackend.name
+
+
+class PrimaryScreenBackend(SyntheticBackend):
+    """Like ``qscreen`` on a multi-monitor desktop: full-screen grabs cover only the primary screen."""
+
+    name = "primary"
+
+    def __init__(self):
+        super().__init__(size=(320, 200))
+
+
+def test_full_screen_backend_with_other_area_is_rejected(backends, monkeypatch):
+    monkeypatch.setitem(capture_backends.BACKEND_TYPES, PrimaryScreenBackend.name, PrimaryScreenBackend)
+    monkeypatch.setattr(capture_backends, "AUTO_CANDIDATES", [PrimaryScreenBackend.name, SyntheticBackend.name])
+    selector = BackendSelector(rounds=1)
+
+    frame = selector.grab(None)
+
+    assert frame.size == capture_backends.SYNTHETIC_SIZE
+    assert selector.choices() == {"teljes": SyntheticBackend.name}
+    release_frame(frame)
+
+
+def test_pinned_full_screen_backend_with_other_area_is_not_used(backends, monkeypatch):
+    monkeypatch.setitem(capture_backends.BACKEND_TYPES, PrimaryScreenBackend.name, PrimaryScreenBackend)
+    monkeypatch.setattr(capture_backends, "AUTO_CANDIDATES", [SyntheticBackend.name])
+    selector = BackendSelector(preferred=PrimaryScreenBackend.name, rounds=1)
+
+    assert selector.backend_for(None).name == SyntheticBackend.name
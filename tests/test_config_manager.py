@@ -0,0 +1,33 @@
+"""Loading configs with ConfigManager."""
+
+import json
+
+from core.config_manager import ConfigManager
+
+
+def test_old_config_gets_ids_that_survive_a_restart(tmp_path):
+    path = tmp_path / "fotoapp_config.json"
+    path.write_text(
+        json.dumps({"schedules": [{"time": "08:00", "days": ["H"]}, {"kind": "cron", "cron": "0 * * * *"}]}),
+        encoding="utf-8",
+    )
+
+    first = ConfigManager(config_path=str(path)).load_settings()
+    second = ConfigManager(config_path=str(path)).load_settings()
+
+    ids = [item["id"] for item in first["schedules"]]
+    assert all(ids) and len(set(ids)) == 2
+    assert [item["id"] for item in second["schedules"]] == ids
+    stored = json.loads(path.read_text(encoding="utf-8"))
+    assert [item["id"] for item in stored["schedules"]] == ids
+
+
+def test_config_with_ids_is_not_rewritten(tmp_path):
+    path = tmp_path / "fotoapp_config.json"
+    original = json.dumps({"schedules": [{"id": "abc", "time": "08:00", "days": ["H"]}]})
+    path.write_text(original, encoding="utf-8")
+
+    settings = ConfigManager(config_path=str(path)).load_settings()
+
+    assert settings["schedules"][0]["id"] == "abc"
+    assert path.read_text(encoding="utf-8") == original
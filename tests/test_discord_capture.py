@@ -0,0 +1,65 @@
+"""DiscordCaptureJob steps and the blocking wrapper, without Windows."""
+
+import threading
+import time
+
+import pytest
+
+from core import screenshot_taker as shots
+from core.capture_arbiter import get_capture_arbiter
+from core.capture_backends import configure_capture_backend
+from core.discord_capture import DiscordCaptureJob
+
+WAIT = 5.0
+
+
+@pytest.fixture
+def synthetic_screen():
+    configure_capture_backend("synthetic")
+    yield
+    configure_capture_backend("auto")
+
+
+def test_grab_records_activation_like_blocking_capture(tmp_path, synthetic_screen):
+    finished, saved = [], threading.Event()
+    job = DiscordCaptureJob(
+        str(tmp_path),
+        area=(0, 0, 40, 30),
+        call_later=lambda delay, callback: callback(),
+        on_finished=finished.append,
+        on_saved=lambda future: saved.set(),
+    )
+    job._activation = shots.WindowActivation(hwnd=1, seconds=0.25, window_size=(800, 600))
+
+    job._step_grab()
+
+    frame = finished[0]
+    assert job.state == "done"
+    assert frame.info["activate_seconds"] == 0.25
+    assert frame.info["skipped_capture_bytes"] == 800 * 600 * 4
+    assert saved.wait(WAIT)
+
+
+def test_blocking_capture_drives_the_job_and_returns_its_result(tmp_path, monkeypatch):
+    monkeypatch.setattr(shots.platform, "system", lambda: "Linux")
+
+    started = time.monotonic()
+    frame = shots.take_discord_screenshot(str(tmp_path), delay_after_hotkey=0)
+
+    # Windows nélkül a job első lépése hibával zárul
+    assert frame is None
+    assert time.monotonic() - started < WAIT
+    assert get_capture_arbiter().pending() == 0
+
+
+def test_blocking_capture_gives_up_its_place_in_the_queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(shots, "DEFAULT_FOREGROUND_TIMEOUT", 0.1)
+    arbiter = get_capture_arbiter()
+    holder = arbiter.acquire("teszt", timeout=WAIT)
+    try:
+        frame = shots.take_discord_screenshot(str(tmp_path))
+
+        assert frame is None
+        assert arbiter.pending() == 0
+    finally:
+        holder.release()
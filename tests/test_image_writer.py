@@ -0,0 +1,131 @@
+"""ImageWriter submit/shutdown ordering and frame ownership of the capture functions."""
+
+import os
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+from core import image_writer
+from core.capture_backends import configure_capture_backend
+from core.frame_pool import FramePool
+from core.image_writer import ImageWriter
+from core.screenshot_taker import CapturedFrame, take_screenshot
+
+WAIT = 5.0
+
+
+class GatedPut:
+    """Wraps a queue's put(): a frame waits until ``gate`` is set (the leállító jel nem vár)."""
+
+    def __init__(self, put):
+        self._put = put
+        self.gate = threading.Event()
+        self.waiting = threading.Event()
+
+    def __call__(self, item, block=True, timeout=None):
+        if item[0] is not image_writer._STOP:
+            self.waiting.set()
+            self.gate.wait(WAIT)
+        self._put(item, block, timeout)
+
+
+def _reserve(tmp_path, name):
+    path = tmp_path / name
+    path.touch()
+    return str(path)
+
+
+def test_frame_submitted_during_shutdown_is_written_or_rejected(tmp_path):
+    writer = ImageWriter(workers=1, max_queue=4)
+    gated = writer._queue.put = GatedPut(writer._queue.put)
+    pool = FramePool()
+    img = pool.acquire("RGB", (8, 8))
+
+    futures = []
+    submitter = threading.Thread(target=lambda: futures.append(writer.submit(img, _reserve(tmp_path, "a.png"))))
+    submitter.start()
+    assert gated.waiting.wait(WAIT)
+
+    # A leállítás a sorba tétel közben indul
+    stopper = threading.Thread(target=writer.shutdown)
+    stopper.start()
+    time.sleep(0.1)
+    gated.gate.set()
+    submitter.join(WAIT)
+    stopper.join(WAIT)
+
+    result = futures[0].result(timeout=WAIT)
+    assert result.ok or result.error_type == "WriterClosed"
+    assert pool.stats()["free_bytes"] > 0
+
+
+def test_submit_after_shutdown_is_rejected_and_released(tmp_path):
+    writer = ImageWriter(workers=1)
+    writer.shutdown()
+    pool = FramePool()
+    img = pool.acquire("RGB", (8, 8))
+    path = _reserve(tmp_path, "b.png")
+    called = []
+
+    future = writer.submit(img, path, callback=called.append)
+
+    result = future.result(timeout=0)
+    assert result.error_type == "WriterClosed"
+    assert called == [future]
+    assert not os.path.exists(path)
+    assert pool.stats()["free_bytes"] > 0
+
+
+def test_full_queue_rejects_after_timeout(tmp_path, monkeypatch):
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow_encode(img, output_format):
+        started.set()
+        release.wait(WAIT)
+        return b"x"
+
+    monkeypatch.setattr(image_writer, "encode_image", slow_encode)
+    writer = ImageWriter(workers=1, max_queue=1)
+    try:
+        first = writer.submit(Image.new("RGB", (4, 4)), _reserve(tmp_path, "1.png"))
+        assert started.wait(WAIT)
+        second = writer.submit(Image.new("RGB", (4, 4)), _reserve(tmp_path, "2.png"))
+        third_path = _reserve(tmp_path, "3.png")
+        third = writer.submit(Image.new("RGB", (4, 4)), third_path, timeout=0.05)
+
+        assert third.result(timeout=0).error_type == "QueueFull"
+        assert not os.path.exists(third_path)
+    finally:
+        release.set()
+        writer.shutdown()
+    assert first.result(timeout=WAIT).ok
+    assert second.result(timeout=WAIT).ok
+
+
+@pytest.fixture
+def synthetic_screen():
+    configure_capture_backend("synthetic")
+    yield
+    configure_capture_backend("auto")
+
+
+def test_take_screenshot_returns_detached_frame(tmp_path, synthetic_screen):
+    done = threading.Event()
+    results = []
+
+    def on_saved(future):
+        results.append(future.result())
+        done.set()
+
+    frame = take_screenshot(str(tmp_path), "Teszt", (0, 0, 48, 32), on_saved=on_saved)
+    assert done.wait(WAIT)
+    # A készletből a következő kép ugyanazt a puffert kapja, és kiüríti az info-t
+    take_screenshot(str(tmp_path), "Teszt", (0, 0, 48, 32))
+
+    assert isinstance(frame, CapturedFrame)
+    assert frame.size == (48, 32)
+    assert "grab_seconds" in frame.info
+    assert results[0].ok
@@ -0,0 +1,19 @@
+"""Cold import-time regression test for the core modules (see core.import_budget)."""
+
+import os
+
+import pytest
+
+from core.import_budget import DEFAULT_RUNS, IMPORT_BUDGETS_MS, measure_import
+
+# Lassabb gépen (pl. CI) szorzó a korlátokra: FOTOAPP_IMPORT_BUDGET_SCALE=2
+SCALE = float(os.environ.get("FOTOAPP_IMPORT_BUDGET_SCALE", "1.0"))
+
+
+@pytest.mark.parametrize("module", sorted(IMPORT_BUDGETS_MS))
+def test_cold_import_within_budget(module):
+    median_ms, lazy_loaded = measure_import(module, runs=DEFAULT_RUNS)
+
+    assert not lazy_loaded, f"{module} idő előtt betöltötte: {', '.join(lazy_loaded)}"
+    limit_ms = IMPORT_BUDGETS_MS[module] * SCALE
+    assert median_ms <= limit_ms, f"{module}: {median_ms:.1f} ms > {limit_ms:.0f} ms"
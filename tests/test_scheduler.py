@@ -0,0 +1,88 @@
+"""Scheduled fire time lookup and screenshot jobs of core.scheduler.Scheduler."""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("apscheduler")
+
+from core import scheduler as core_scheduler
+from core.scheduler import Scheduler
+from core.triggers import WindowedIntervalTrigger
+
+
+class CountingTrigger(WindowedIntervalTrigger):
+    """Interval trigger that counts get_next_fire_time calls."""
+
+    calls = 0
+
+    def get_next_fire_time(self, previous_fire_time, now):
+        CountingTrigger.calls += 1
+        return super().get_next_fire_time(previous_fire_time, now)
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = Scheduler()
+    trigger = CountingTrigger(1, timezone=scheduler.scheduler.timezone)
+    scheduler.scheduler.add_job(lambda: None, trigger, id="job", misfire_grace_time=3600)
+    CountingTrigger.calls = 0
+    return scheduler
+
+
+def _now(scheduler):
+    return datetime(2026, 10, 12, 9, 30, 0, 400_000, tzinfo=scheduler.scheduler.timezone)
+
+
+def test_walk_starts_at_previous_fire_time(scheduler):
+    now = _now(scheduler)
+    scheduler._last_run_times["job"] = now.replace(microsecond=0) - timedelta(seconds=1)
+
+    assert scheduler._scheduled_fire_time("job", now) == now.replace(microsecond=0)
+    assert CountingTrigger.calls <= 3
+
+
+def test_this_runs_own_fire_time_as_anchor(scheduler):
+    now = _now(scheduler)
+    scheduler._last_run_times["job"] = now.replace(microsecond=0)
+
+    assert scheduler._scheduled_fire_time("job", now) == now.replace(microsecond=0)
+    assert CountingTrigger.calls <= 2
+
+
+def test_first_run_searches_within_grace_time(scheduler):
+    now = _now(scheduler)
+
+    assert scheduler._scheduled_fire_time("job", now) == now.replace(microsecond=0)
+
+
+def test_catch_up_run_reports_its_own_fire_time(scheduler):
+    fire_time = _now(scheduler) - timedelta(hours=2)
+    scheduler._run_context.scheduled_time = fire_time
+    try:
+        assert scheduler._scheduled_fire_time("job", _now(scheduler)) == fire_time
+    finally:
+        scheduler._run_context.scheduled_time = None
+    assert CountingTrigger.calls == 0
+
+
+def test_failed_screenshot_is_reported_without_scanning_the_folder(tmp_path, monkeypatch, caplog):
+    scheduler = Scheduler()
+    scheduler.current_settings = {
+        "save_path": str(tmp_path),
+        "capture_type": "screenshot",
+        "schedules": [{"id": "reggel", "time": "08:00", "days": ["H"]}],
+    }
+    scheduler._schedule_jobs()
+    monkeypatch.setattr(
+        core_scheduler, "_screenshot_taker", lambda: SimpleNamespace(take_screenshot=lambda *args, **kwargs: None)
+    )
+    scans = []
+    monkeypatch.setattr(scheduler, "_verify_capture_completion", lambda *args, **kwargs: scans.append(args))
+
+    (job,) = scheduler.scheduler.get_jobs()
+    job.func()
+
+    assert scans == []
+    assert "Nem készült képernyőkép" in caplog.text
@@ -0,0 +1,139 @@
+"""Packed tile storage of core.tile_store."""
+
+import io
+import json
+import os
+import zlib
+
+import pytest
+from PIL import Image, ImageDraw
+
+from core.tile_store import (
+    MANIFEST_SUFFIX,
+    STORE_DIRNAME,
+    TileStore,
+    directory_stats,
+    export_capture,
+    load_capture,
+)
+
+
+def _window_frame(lines):
+    """A flat, chat-like window: mostly background, a few lines of text."""
+    img = Image.new("RGB", (640, 360), (54, 57, 63))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((0, 0, 120, 360), fill=(47, 49, 54))
+    for line in range(lines):
+        draw.text((140, 10 + line * 16), f"üzenet {line}", fill=(220, 221, 222))
+    return img
+
+
+def _png_size(img):
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG", compress_level=6)
+    return len(buffer.getvalue())
+
+
+def _store(tmp_path, img, name):
+    path = str(tmp_path / f"{name}{MANIFEST_SUFFIX}")
+    stats = TileStore.for_directory(str(tmp_path)).store(img, path)
+    return path, stats
+
+
+@pytest.mark.parametrize("mode", ["RGB", "RGBA", "L"])
+def test_round_trip_with_edge_tiles(tmp_path, mode):
+    img = _window_frame(4).convert(mode).resize((200, 150))
+
+    path, stats = _store(tmp_path, img, f"Kép {mode}")
+
+    assert stats["tiles"] == 4 * 3
+    assert load_capture(path).tobytes() == img.tobytes()
+
+
+def test_new_tiles_of_a_capture_go_into_one_pack(tmp_path):
+    path, first = _store(tmp_path, _window_frame(3), "Kép 1")
+    _path, second = _store(tmp_path, _window_frame(4), "Kép 2")
+
+    packs = os.listdir(tmp_path / STORE_DIRNAME / "packs")
+    assert sorted(packs) == ["Kép 1.png", "Kép 2.png"]
+    assert 0 < second["new_tiles"] < first["new_tiles"]
+    assert not (tmp_path / STORE_DIRNAME / "objects").exists()
+
+
+def test_repeated_frame_writes_only_manifest(tmp_path):
+    _store(tmp_path, _window_frame(3), "Kép 1")
+    path, stats = _store(tmp_path, _window_frame(3), "Kép 2")
+
+    assert stats["new_tiles"] == 0
+    assert stats["bytes_written"] == os.path.getsize(path)
+
+
+def test_equal_tiles_are_run_length_encoded(tmp_path):
+    path, _stats = _store(tmp_path, Image.new("RGB", (640, 384), (10, 20, 30)), "Kép")
+
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    assert len(manifest["tiles"]) == 1
+    assert manifest["tiles"][0][1] == 10 * 6
+
+
+def test_index_written_by_another_store_is_picked_up(tmp_path):
+    path, _stats = _store(tmp_path, _window_frame(2), "Kép")
+
+    # Friss példány, mintha egy másik folyamat olvasná
+    fresh = TileStore(str(tmp_path / STORE_DIRNAME))
+    with open(path, encoding="utf-8") as f:
+        assert fresh.load(json.load(f)).tobytes() == _window_frame(2).tobytes()
+
+
+def test_version_1_store_is_still_readable(tmp_path):
+    img = _window_frame(1).crop((0, 0, 128, 64))
+    store = TileStore(str(tmp_path / STORE_DIRNAME))
+    digests = []
+    for _box, data in store._iter_tiles(img):
+        digest = f"{len(digests):032x}"
+        object_path = store._object_path(digest)
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        with open(object_path, "wb") as f:
+            f.write(zlib.compress(data))
+        digests.append(digest)
+    manifest = {"version": 1, "width": 128, "height": 64, "mode": "RGB", "tile_size": 64,
+                "store": STORE_DIRNAME, "tiles": digests}
+    path = tmp_path / f"Régi{MANIFEST_SUFFIX}"
+    path.write_text(json.dumps(manifest), encoding="utf-8")
+
+    exported = export_capture(str(path), str(tmp_path / "régi.png"))
+
+    with Image.open(exported) as restored:
+        assert restored.tobytes() == img.tobytes()
+
+
+def test_stats_compare_against_plain_png(tmp_path):
+    frames = [_window_frame(lines) for lines in range(1, 6)]
+    for index, frame in enumerate(frames):
+        _store(tmp_path, frame, f"Kép {index}")
+
+    stats = directory_stats(str(tmp_path))
+
+    assert stats["captures"] == 5
+    assert stats["png_bytes"] == sum(_png_size(frame) for frame in frames)
+    # Keveset változó ablaknál a csempetár kisebb a sima PNG-nél
+    assert stats["stored_bytes"] < stats["png_bytes"]
+
+
+def test_tile_sizes_of_one_directory_do_not_mix(tmp_path):
+    small = TileStore.for_directory(str(tmp_path), 32)
+    large = TileStore.for_directory(str(tmp_path), 128)
+    img = _window_frame(3)
+
+    paths = []
+    for store, name in ((small, "Kicsi"), (large, "Nagy"), (small, "Kicsi 2")):
+        path = str(tmp_path / f"{name}{MANIFEST_SUFFIX}")
+        store.store(img, path)
+        paths.append(path)
+
+    assert TileStore.for_directory(str(tmp_path), 32) is small
+    for path, size in zip(paths, (32, 128, 32)):
+        with open(path, encoding="utf-8") as f:
+            assert json.load(f)["tile_size"] == size
+        assert load_capture(path).tobytes() == img.tobytes()
@@ -0,0 +1,80 @@
+"""Fire times of WindowedIntervalTrigger and build_trigger."""
+
+from datetime import datetime, time, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("apscheduler")
+
+from core.triggers import WindowedIntervalTrigger, build_trigger
+
+UTC = timezone.utc
+# 2026-10-12 hétfő
+MONDAY = datetime(2026, 10, 12, tzinfo=UTC)
+
+
+def at(day_offset, hour, minute=0, second=0):
+    return MONDAY + timedelta(days=day_offset, hours=hour, minutes=minute, seconds=second)
+
+
+def fire_times(trigger, now, count):
+    times, previous = [], None
+    for _ in range(count):
+        previous = trigger.get_next_fire_time(previous, now)
+        times.append(previous)
+    return times
+
+
+def night(**options):
+    return WindowedIntervalTrigger(3600, window_start=time(22, 0), window_end=time(6, 0), timezone=UTC, **options)
+
+
+def test_grid_is_anchored_to_window_start():
+    trigger = WindowedIntervalTrigger(15, window_start=time(8, 0), window_end=time(18, 0), timezone=UTC)
+
+    assert trigger.get_next_fire_time(None, at(0, 8, 0, 7)) == at(0, 8, 0, 15)
+    assert trigger.get_next_fire_time(None, at(0, 7)) == at(0, 8)
+    assert trigger.get_next_fire_time(None, at(0, 18)) == at(1, 8)
+
+
+def test_wrapping_window_continues_after_midnight():
+    trigger = night()
+
+    assert trigger.get_next_fire_time(None, at(1, 2, 30)) == at(1, 3)
+    assert trigger.get_next_fire_time(None, at(1, 6)) == at(1, 22)
+    assert fire_times(trigger, at(0, 21), 9) == [at(0, 22 + hour) for hour in range(8)] + [at(1, 22)]
+
+
+def test_wrapping_window_belongs_to_its_start_day():
+    trigger = night(weekdays={0})  # csak hétfő este
+
+    # Kedd hajnal a hétfő esti ablak része, kedd este már nem indul új
+    assert trigger.get_next_fire_time(None, at(1, 4, 10)) == at(1, 5)
+    assert trigger.get_next_fire_time(None, at(1, 6)) == at(7, 22)
+
+
+def test_equal_start_and_end_is_a_full_day_from_start():
+    trigger = WindowedIntervalTrigger(3600, window_start=time(8, 0), window_end=time(8, 0), timezone=UTC)
+
+    assert trigger.get_next_fire_time(None, at(1, 3, 30)) == at(1, 4)
+
+
+def test_end_at_midnight_runs_until_end_of_day():
+    trigger = WindowedIntervalTrigger(3600, window_start=time(20, 0), window_end=time(0, 0), timezone=UTC)
+
+    assert trigger.get_next_fire_time(None, at(0, 23, 30)) == at(1, 20)
+
+
+def test_build_trigger_accepts_wrapping_window():
+    trigger, key, description = build_trigger(
+        {"kind": "interval", "every_seconds": 600, "days": ["H"], "window": {"start": "22:00", "end": "06:00"}},
+        timezone=UTC,
+    )
+
+    assert trigger.get_next_fire_time(None, at(1, 1, 55)) == at(1, 2)
+    assert "22:00-06:00" in description
+
+
+def test_invalid_interval_is_rejected():
+    with pytest.raises(ValueError):
+        build_trigger({"kind": "interval", "every_seconds": 0})
@@ -0,0 +1,223 @@
+"""WindowIndex over the in-memory FakeWindowTable."""
+
+import pytest
+
+from core.window_index import FakeWindowTable, WindowIndex, _fake_desktop
+
+# Eseményfigyelés nélkül ennyi ideig nem olvassa újra az ablakokat (a tesztek alatt soha)
+NEVER = 1e9
+
+
+@pytest.fixture(params=[False, True], ids=["poll", "events"])
+def desktop(request):
+    table = FakeWindowTable(events=request.param)
+    notepad = table.add_window("Jegyzet - Notepad", executable="notepad.exe")
+    discord = table.add_window("#general - Discord", executable="Discord.exe")
+    index = WindowIndex(table, sync_interval=NEVER)
+    return table, index, notepad, discord
+
+
+def test_find_by_title_and_executable(desktop):
+    table, index, notepad, discord = desktop
+
+    assert index.find("DISCORD") == discord
+    assert index.find("discord", "discord.exe") == discord
+    assert index.find("notepad", "discord.exe") is None
+    assert index.find("nincs ilyen") is None
+
+
+def test_executable_is_resolved_once_per_window(desktop):
+    table, index, notepad, discord = desktop
+
+    for _ in range(5):
+        assert index.find("discord", "discord.exe") == discord
+
+    assert table.calls["executable"] == 1
+    assert table.calls["handles"] == 1
+
+
+def test_repeated_lookups_do_not_enumerate_or_describe_every_window():
+    table = _fake_desktop(200, events=False)
+    index = WindowIndex(table, sync_interval=NEVER)
+    index.find("discord", "discord.exe")
+    table.calls.clear()
+
+    for _ in range(10):
+        assert index.find("discord", "discord.exe") is not None
+
+    assert table.calls["handles"] == 0
+    assert table.calls["executable"] == 0
+    # Csak a találat ellenőrzése: IsWindow, folyamat, cím, láthatóság
+    assert table.calls["title"] == 10
+
+
+def test_renamed_window_is_not_returned(desktop):
+    table, index, notepad, discord = desktop
+    assert index.find("discord") == discord
+
+    table.set_title(discord, "Beállítások")
+
+    assert index.find("discord") is None
+    assert index.find("beállítások") == discord
+
+
+def test_window_renamed_to_match_is_found_by_resync(desktop):
+    table, index, notepad, discord = desktop
+    assert index.find("notepad") == notepad
+
+    table.set_title(notepad, "Discord-jegyzetek - Notepad")
+
+    # Eseményekkel azonnal, anélkül a tévesztés utáni teljes újraolvasással
+    assert index.find("jegyzetek") == notepad
+
+
+def test_destroyed_window_is_dropped(desktop):
+    table, index, notepad, discord = desktop
+    assert index.find("discord") == discord
+
+    table.close_window(discord)
+
+    assert index.find("discord") is None
+    assert [window.hwnd for window in index.windows()] == [notepad]
+
+
+def test_new_window_is_found(desktop):
+    table, index, notepad, discord = desktop
+    index.find("notepad")
+
+    browser = table.add_window("Böngésző", executable="browser.exe")
+
+    assert index.find("böngésző") == browser
+
+
+def test_reused_handle_resolves_executable_again(desktop):
+    table, index, notepad, discord = desktop
+    assert index.find("discord", "discord.exe") == discord
+
+    table.close_window(discord)
+    table.add_window("Discord rajongói oldal - Böngésző", executable="browser.exe", hwnd=discord)
+
+    assert index.find("discord", "discord.exe") is None
+    assert index.find("discord", "browser.exe") == discord
+    assert table.calls["executable"] == 2
+
+
+def test_events_avoid_enumeration():
+    table = FakeWindowTable(events=True)
+    table.add_window("Notepad")
+    index = WindowIndex(table, sync_interval=0)
+    index.find("notepad")
+    table.calls.clear()
+
+    discord = table.add_window("Discord", executable="Discord.exe")
+    table.set_title(discord, "#general - Discord")
+
+    assert index.uses_events
+    assert index.find("#general", "discord.exe") == discord
+    assert table.calls["handles"] == 0
+    assert index.stats()["event_updates"] == 1
+
+
+def test_polling_resyncs_after_interval():
+    table = FakeWindowTable(events=False)
+    table.add_window("Notepad")
+    index = WindowIndex(table, sync_interval=0)
+
+    index.find("notepad")
+    index.find("notepad")
+
+    assert not index.uses_events
+    assert table.calls["handles"] == 2
+    assert index.stats()["full_syncs"] == 2
+
+
+def test_polling_within_interval_uses_cache_until_miss():
+    table = FakeWindowTable(events=False)
+    table.add_window("Notepad")
+    index = WindowIndex(table, sync_interval=NEVER)
+
+    index.find("notepad")
+    index.find("notepad")
+    assert table.calls["handles"] == 1
+
+    # Tévesztés: egy teljes újraolvasás, ami az új ablakot is megtalálja
+    discord = table.add_window("Discord")
+    assert index.find("discord") == discord
+    assert table.calls["handles"] == 2
+
+
+def test_topmost_matching_window_wins(desktop):
+    table, index, notepad, discord = desktop
+    second = table.add_window("#random - Discord", executable="Discord.exe")
+
+    assert index.find("discord", "discord.exe") == second
+
+    table.raise_window(discord)
+    if not table.events:
+        # Esemény nélkül a z-sorrend a következő újraolvasáskor frissül
+        index.refresh()
+
+    assert index.find("discord", "discord.exe") == discord
+
+
+def test_windows_lists_visible_titled_windows_topmost_first(desktop):
+    table, index, notepad, discord = desktop
+    table.add_window("", executable="tray.exe")
+    table.add_window("Rejtett", visible=False)
+    index.refresh()
+
+    assert [window.hwnd for window in index.windows()] == [discord, notepad]
+    assert len(index.windows(visible_only=False)) == 3
+
+
+class TestValidateStalePaths:
+    """The cache is older than the table (no events, no resync); hits must be re-checked."""
+
+    @pytest.fixture
+    def stale(self):
+        table = FakeWindowTable(events=False)
+        first = table.add_window("Discord - régi", executable="Discord.exe")
+        second = table.add_window("Discord - új", executable="Discord.exe")
+        index = WindowIndex(table, sync_interval=NEVER)
+        assert index.find("discord") == second
+        return table, index, first, second
+
+    def test_closed_window_falls_through_to_next_match(self, stale):
+        table, index, first, second = stale
+        table._windows.pop(second)  # bezárás esemény nélkül
+
+        assert index.find("discord") == first
+        assert index.stats()["stale"] == 1
+        assert second not in [window.hwnd for window in index.windows()]
+
+    def test_hidden_window_is_skipped(self, stale):
+        table, index, first, second = stale
+        table.set_visible(second, False)
+
+        assert index.find("discord") == first
+        assert index.stats()["stale"] == 1
+
+    def test_renamed_window_is_skipped(self, stale):
+        table, index, first, second = stale
+        table.set_title(second, "Jegyzet")
+
+        assert index.find("discord") == first
+        assert index.stats()["stale"] == 1
+
+    def test_all_stale_hits_force_one_resync(self, stale):
+        table, index, first, second = stale
+        table._windows.pop(first)
+        table._windows.pop(second)
+        table.calls.clear()
+
+        assert index.find("discord") is None
+        assert table.calls["handles"] == 1
+        assert index.stats()["misses"] == 1
+
+
+def test_unavailable_index_finds_nothing():
+    index = WindowIndex(None)
+
+    assert not index.available
+    assert index.find("discord") is None
+    assert index.windows() == []
@@ -0,0 +1,180 @@
+"""X11 MIT-SHM backend: real grabs under an X server (e.g. Xvfb) and the fallback paths."""
+
+import ctypes
+import ctypes.util
+import os
+import shutil
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from core import capture_backends, x11_shm
+from core.capture_backends import BackendSelector, SyntheticBackend
+from core.frame_pool import release_frame
+from core.x11_shm import XShmBackend, XShmError
+
+linux_only = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="csak Linuxon")
+
+FILL_RECT = (20, 30, 64, 48)
+FILL_RGB = (0x33, 0x66, 0x99)
+XVFB_DISPLAY = ":97"
+
+
+def _start_xvfb(extra_args=()):
+    if not shutil.which("Xvfb"):
+        return None
+    process = subprocess.Popen(
+        ["Xvfb", XVFB_DISPLAY, "-screen", "0", "320x240x24", "-nolisten", "tcp", *extra_args],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    # Megvárjuk, hogy a kiszolgáló fogadja a kapcsolatokat
+    socket = f"/tmp/.X11-unix/X{XVFB_DISPLAY[1:]}"
+    deadline = time.monotonic() + 5.0
+    while not os.path.exists(socket) and time.monotonic() < deadline:
+        if process.poll() is not None:
+            return None
+        time.sleep(0.05)
+    return process
+
+
+@pytest.fixture
+def x_display(monkeypatch):
+    """A running X server: the current ``DISPLAY`` or a private Xvfb; skip when neither exists."""
+    if os.environ.get("DISPLAY"):
+        yield os.environ["DISPLAY"]
+        return
+    process = _start_xvfb()
+    if process is None:
+        pytest.skip("nincs DISPLAY és Xvfb sem indítható")
+    monkeypatch.setenv("DISPLAY", XVFB_DISPLAY)
+    try:
+        yield XVFB_DISPLAY
+    finally:
+        process.terminate()
+        process.wait(5)
+
+
+def _fill_root_rect(display_name, rect, rgb):
+    """Paint a solid rectangle on the root window with plain Xlib calls."""
+    x11 = ctypes.CDLL(ctypes.util.find_library("X11"))
+    x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    x11.XOpenDisplay.restype = ctypes.c_void_p
+    x11.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+    x11.XDefaultRootWindow.restype = ctypes.c_ulong
+    x11.XCreateGC.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.c_ulong, ctypes.c_void_p]
+    x11.XCreateGC.restype = ctypes.c_void_p
+    x11.XSetForeground.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_ulong]
+    x11.XFillRectangle.argtypes = [
+        ctypes.c_void_p, ctypes.c_ulong, ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_uint, ctypes.c_uint,
+    ]
+    x11.XFreeGC.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+    x11.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+
+    display = x11.XOpenDisplay(display_name.encode())
+    assert display, "az X kijelző nem nyitható meg"
+    root = x11.XDefaultRootWindow(display)
+    gc = x11.XCreateGC(display, root, 0, None)
+    x11.XSetForeground(display, gc, (rgb[0] << 16) | (rgb[1] << 8) | rgb[2])
+    x11.XFillRectangle(display, root, gc, *rect)
+    x11.XSync(display, 0)
+    x11.XFreeGC(display, gc)
+    x11.XCloseDisplay(display)
+
+
+@linux_only
+def test_grab_matches_fallback_backend(x_display):
+    backend = XShmBackend()
+    if not backend.available():
+        pytest.skip(f"a kiszolgálón nincs MIT-SHM: {backend._unavailable}")
+    left, top, width, height = FILL_RECT
+    _fill_root_rect(x_display, FILL_RECT, FILL_RGB)
+    # A kitöltött téglalapnál nagyobb régió, hogy a széle is összevethető legyen
+    region = (left - 8, top - 8, left + width + 8, top + height + 8)
+
+    try:
+        frame = backend.grab(region)
+        reference = capture_backends.ImageGrabBackend().grab(region)
+
+        assert frame.size == reference.size == (width + 16, height + 16)
+        assert frame.mode == "RGB"
+        assert frame.getpixel((8, 8)) == FILL_RGB
+        assert frame.getpixel((8 + width - 1, 8 + height - 1)) == FILL_RGB
+        assert frame.tobytes() == reference.convert("RGB").tobytes()
+
+        # A második, azonos méretű kép ugyanazt a szegmenst használja
+        release_frame(frame)
+        again = backend.grab(region)
+        assert again.tobytes() == reference.convert("RGB").tobytes()
+        assert len(backend._segments) == 1
+        release_frame(again)
+
+        with pytest.raises(XShmError):
+            backend.grab((300, 200, 400, 300))
+    finally:
+        backend.close()
+
+
+@linux_only
+def test_server_without_mit_shm_is_unavailable(monkeypatch):
+    process = _start_xvfb(["-extension", "MIT-SHM"])
+    if process is None:
+        pytest.skip("az Xvfb nem indítható")
+    monkeypatch.setenv("DISPLAY", XVFB_DISPLAY)
+    try:
+        backend = XShmBackend()
+        assert not backend.available()
+        assert "MIT-SHM" in backend._unavailable
+    finally:
+        process.terminate()
+        process.wait(5)
+
+
+class _FakeLibraries:
+    """Xlib stand-in: the display opens but the server has no MIT-SHM."""
+
+    def __init__(self):
+        self.closed = []
+        self.x11 = SimpleNamespace(XOpenDisplay=lambda name: 0x1234, XCloseDisplay=self.closed.append)
+        self.xext = SimpleNamespace(XShmQueryExtension=lambda display: 0)
+
+
+@pytest.fixture
+def no_mit_shm(monkeypatch):
+    libraries = _FakeLibraries()
+    monkeypatch.setenv("DISPLAY", ":55")
+    monkeypatch.setattr(x11_shm, "_load_libraries", lambda: libraries)
+    return libraries
+
+
+@linux_only
+def test_missing_extension_makes_backend_unavailable(no_mit_shm):
+    backend = XShmBackend()
+
+    assert not backend.available()
+    assert no_mit_shm.closed == [0x1234]
+    with pytest.raises(XShmError, match="MIT-SHM"):
+        backend.grab((0, 0, 10, 10))
+
+
+@linux_only
+def test_selector_falls_back_when_mit_shm_is_missing(no_mit_shm, monkeypatch):
+    monkeypatch.setitem(capture_backends.BACKEND_TYPES, SyntheticBackend.name, SyntheticBackend)
+    monkeypatch.setattr(capture_backends, "AUTO_CANDIDATES", [XShmBackend.name, SyntheticBackend.name])
+    selector = BackendSelector(preferred=XShmBackend.name, rounds=1)
+
+    frame = selector.grab((0, 0, 32, 24))
+
+    assert frame.size == (32, 24)
+    assert selector.choices() == {"32x24": SyntheticBackend.name}
+    release_frame(frame)
+
+
+def test_no_display_means_unavailable(monkeypatch):
+    monkeypatch.delenv("DISPLAY", raising=False)
+
+    assert not XShmBackend().available()